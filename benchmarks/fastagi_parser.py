@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Time spent parsing the AGI environment and the command responses, line by
+# line with the regular expressions compared to the buffered environment read
+# and the response fast path, e.g.:
+#
+#   python3 benchmarks/fastagi_parser.py --number 100000
+
+from __future__ import annotations
+
+import argparse
+import io
+import timeit
+from collections.abc import Callable
+
+from wazo_agid.fastagi import FastAGI, _parse_result_line, _read_env_block
+
+ENV = b'''\
+agi_network: yes
+agi_network_script: incoming_user_set_features
+agi_request: agi://127.0.0.1/incoming_user_set_features
+agi_channel: PJSIP/ycetqvtr-00000004
+agi_language: en
+agi_type: PJSIP
+agi_uniqueid: 1700000000.4
+agi_version: 20.5.0
+agi_callerid: 1001
+agi_calleridname: Alice
+agi_callingpres: 0
+agi_callingani2: 0
+agi_callington: 0
+agi_callingtns: 0
+agi_dnid: 1002
+agi_rdnis: unknown
+agi_context: user
+agi_extension: s
+agi_priority: 2
+agi_enhanced: 0.0
+agi_accountcode:
+agi_threadid: 140000000000000
+agi_arg_1: 42
+
+'''
+
+RESPONSES = [
+    b'200 result=1\n',
+    b'200 result=0\n',
+    b'200 result=1 (8d1bb5a0-a1c9-4e8a-b6b7-8f5a8e1d9c2f)\n',
+    b'200 result=1 (PJSIP/ycetqvtr-00000004)\n',
+]
+
+
+def _env_line_by_line() -> None:
+    inf = io.BytesIO(ENV)
+    env: dict[str, str] = {}
+    while 1:
+        line = inf.readline().strip().decode('utf8')
+        if line == '':
+            break
+        # as the environment was parsed before the buffered read
+        key, _, value = line.partition(':')
+        key = key.strip()
+        if key:
+            env[key] = value.strip()
+
+
+def _env_buffered() -> None:
+    inf = io.BufferedReader(io.BytesIO(ENV))
+    FastAGI._parse_env_block({}, _read_env_block(inf))  # type: ignore[arg-type]
+
+
+def _results_regex() -> None:
+    for line in RESPONSES:
+        FastAGI._parse_result(*FastAGI._parse_response(line.strip().decode('utf8')))
+
+
+def _results_fast_path() -> None:
+    for line in RESPONSES:
+        _parse_result_line(line)
+
+
+def _measure(name: str, fn: Callable[[], None], number: int, count: int) -> float:
+    duration = min(timeit.repeat(fn, number=number, repeat=5)) / (number * count)
+    print(f'{name:>24}: {duration * 1e6:6.2f} us')
+    return duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    before = _measure('env, line by line', _env_line_by_line, args.number, 1)
+    after = _measure('env, buffered', _env_buffered, args.number, 1)
+    print(f'{"speedup":>24}: {before / after:6.2f}x')
+
+    count = len(RESPONSES)
+    before = _measure('response, regex', _results_regex, args.number, count)
+    after = _measure('response, fast path', _results_fast_path, args.number, count)
+    print(f'{"speedup":>24}: {before / after:6.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Latency of handler calls while the handlers are reloaded in a loop, compared
+# to the latency without reload. Requires the wazo-agid dependencies, e.g.:
+#
+#   python3 benchmarks/reload_latency.py --threads 32 --duration 5
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+import types
+
+from wazo_agid.agid import Handler
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+def _run(handler: Handler, threads: int, duration: float, reload: bool) -> None:
+    latencies: list[list[float]] = [[] for _ in range(threads)]
+    reloads = 0
+    stopped = threading.Event()
+
+    def call(results: list[float]) -> None:
+        agi = types.SimpleNamespace(hangup_callback=None, flush=lambda: None)
+        while not stopped.is_set():
+            start = time.perf_counter()
+            handler.handle(agi, None, [])  # type: ignore[arg-type]
+            results.append(time.perf_counter() - start)
+
+    def reload_forever() -> None:
+        nonlocal reloads
+        while not stopped.is_set():
+            handler.reload(None)  # type: ignore[arg-type]
+            reloads += 1
+
+    workers = [threading.Thread(target=call, args=(r,)) for r in latencies]
+    if reload:
+        workers.append(threading.Thread(target=reload_forever))
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stopped.set()
+    for worker in workers:
+        worker.join()
+
+    values = [value for results in latencies for value in results]
+    print(
+        f'{"during reload" if reload else "no reload":>14}: '
+        f'{len(values):7d} calls, {reloads:5d} reloads, '
+        f'p50 {_percentile(values, 50) * 1000:7.3f} ms, '
+        f'p99 {_percentile(values, 99) * 1000:7.3f} ms, '
+        f'max {max(values) * 1000:7.3f} ms'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument(
+        '--handle-time', type=float, default=0.002, help='seconds per call'
+    )
+    parser.add_argument(
+        '--setup-time', type=float, default=0.05, help='seconds per reload'
+    )
+    args = parser.parse_args()
+
+    def setup(cursor):
+        time.sleep(args.setup_time)
+
+    def handle(agi, cursor, handler_args):
+        time.sleep(args.handle_time)
+
+    handler = Handler('benchmark', setup, handle)
+    handler.configure({'handlers': {}, 'bulkheads': {}, 'request_timeout': 0})
+
+    _run(handler, args.threads, args.duration, reload=False)
+    _run(handler, args.threads, args.duration, reload=True)
+
+
+if __name__ == '__main__':
+    main()
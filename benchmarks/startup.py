@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Time spent and memory used before the AGI port can be bound, with the modules
+# imported at startup (eager) or on first use (lazy). Each mode runs in a new
+# interpreter. Requires the wazo-agid dependencies, e.g.:
+#
+#   python3 benchmarks/startup.py --runs 5
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+_STARTUP = '''
+import time
+start = time.monotonic()
+
+from wazo_agid import agid
+from wazo_agid.prefork import current_rss
+
+agid.register_modules({{'disabled_modules': []}})
+if {eager}:
+    for handler in agid._handlers.values():
+        if handler.handle_fn is None:
+            __import__(f'wazo_agid.modules.{{handler.module_name}}')
+
+print(time.monotonic() - start, current_rss())
+'''
+
+
+def _measure(eager: bool, runs: int) -> None:
+    durations = []
+    rss = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _STARTUP.format(eager=eager)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        durations.append(float(output[0]))
+        rss.append(int(output[1]))
+
+    print(
+        f'{"eager" if eager else "lazy":>5}: '
+        f'time to listen {statistics.median(durations) * 1000:7.1f} ms, '
+        f'RSS {statistics.median(rss) / 2**20:6.1f} MiB'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    _measure(eager=True, runs=args.runs)
+    _measure(eager=False, runs=args.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,135 +3,646 @@
 
 from __future__ import annotations
 
+import functools
+import importlib
+import inspect
 import logging
+import re
 import signal
+import socket
 import socketserver
+import threading
 import time
-from collections.abc import Callable
-from contextlib import contextmanager
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractContextManager, nullcontext
 from types import FrameType
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import psycopg2
 from psycopg2.extras import DictCursor
-from sqlalchemy.engine.url import URL, make_url
-from xivo import agitb, moresynchro
+from sqlalchemy import exc as sqlalchemy_exc
+from xivo import agitb
+from xivo_dao.helpers import db_manager
 from xivo_dao.helpers.db_utils import session_scope
 
-from wazo_agid.fastagi import FastAGI, FastAGIDialPlanBreak
+from wazo_agid import call_context, deadline
+from wazo_agid import dialplan_variables as dv
+from wazo_agid import metrics, systemd
+from wazo_agid.ami_transport import AMITransport, AsyncAGISession
+from wazo_agid.bulkhead import Bulkhead, BulkheadFull
+from wazo_agid.database import Database, LazyCursor, PoolTimeout, RequestSession
+from wazo_agid.deadline import DeadlineExceeded
+from wazo_agid.fair_queue import FlowPolicy
+from wazo_agid.fastagi import (
+    AsyncFastAGI,
+    FastAGI,
+    FastAGIDialPlanBreak,
+    FastAGIHangup,
+)
+from wazo_agid.file_watcher import FileWatcher
+from wazo_agid.hangup_monitor import HangupMonitor, has_hung_up
+from wazo_agid.modules.manifest import HANDLERS
+from wazo_agid.prefork import current_rss
+from wazo_agid.warm_up import (
+    WarmUp,
+    load_phone_metadata,
+    warm_up_database,
+    warm_up_sqlalchemy,
+)
+from wazo_agid.worker_pool import WorkerPool
+
+if TYPE_CHECKING:
+    from wazo_agid.async_agid import AsyncAGID
+    from wazo_agid.variable_cache import VariableCache
 
 logger = logging.getLogger(__name__)
 
 SetupFunction = Callable[[DictCursor], None]
 HandleFunction = Callable[[FastAGI, DictCursor, list], None]
+AsyncHandleFunction = Callable[[AsyncFastAGI, DictCursor, list], Awaitable[None]]
 
 CONNECTION_TIMEOUT = 60
+# Rejected requests are answered on the accept thread, do not wait for long
+REJECT_TIMEOUT = 1
+# Asterisk sends the AGI environment as soon as it connects. A peer sending
+# nothing must not hold a worker for long.
+ENV_TIMEOUT = 5
+
+ENGINES = ('threading', 'asyncio')
+
+# Worker queues are served in this order when all the workers are busy
+PRIORITIES = ('critical', 'normal', 'background')
+PRIORITY_CRITICAL = PRIORITIES.index('critical')
+PRIORITY_NORMAL = PRIORITIES.index('normal')
+
+# agi://host/chain?steps=a+b+c runs the handlers a, b and c one after the other
+# in the same request
+CHAIN_HANDLER = 'chain'
+# Commas separate the AGI arguments in the dialplan, steps are also separated
+# by '+', read as a space
+_STEPS_SEPARATOR = re.compile(r'[\s,]+')
 
-_server: AGID = None  # type: ignore[assignment]
+_server: AGID | AsyncAGID = None  # type: ignore[assignment]
 _handlers: dict[str, Handler] = {}
+_bulkheads: dict[str, Bulkhead] = {}
+_reloader: Reloader | None = None
+_watched_files: dict[str, list[Callable[[], None]]] = {}
+_file_watcher: FileWatcher | None = None
+_lazy_loading = False
+_warm_up_tasks: list[tuple[str, Callable[[], None]]] = []
 
 
-def info_from_db_uri(db_uri: str) -> dict[str, str | int]:
-    parsed_url: URL = make_url(db_uri)
-    exceptions = {'database': 'dbname', 'username': 'user'}
-    connect_args = {
-        exceptions.get(name, name): value
-        for name, value in parsed_url.translate_connect_args().items()
-    }
-    query_args = parsed_url.query
-    return dict(query_args, **connect_args)
+class AGIConnection:
+    """An accepted FastAGI connection. It can be handed over to another worker
+    once its environment has been read."""
 
+    def __init__(self, request: socket.socket, config: dict[str, Any]) -> None:
+        self.request = request
+        self.config = config
+        self.accepted_at = time.monotonic()
+        self.rfile = request.makefile('rb')
+        self.wfile = request.makefile('wb')
+        self.fagi: FastAGI | None = None
 
-class Database:
-    def __init__(self, db_uri: str):
-        self.connection_info = info_from_db_uri(db_uri)
+    def read_env(self) -> FastAGI:
+        if self.fagi is None:
+            self.fagi = FastAGI(self.rfile, self.wfile, self.config)
+        return self.fagi
 
-    @contextmanager
-    def connection(self):
-        with psycopg2.connect(**self.connection_info) as connection:
-            yield connection
+    def close(self) -> None:
+        for f in (self.wfile, self.rfile):
+            try:
+                f.close()
+            except OSError:
+                pass
+
+
+# The AGI commands answering a failed request, as (method, arguments) of
+# FastAGI and AsyncFastAGI
+AGICommands = list[tuple[str, tuple[Any, ...]]]
+FAIL_RESPONSE: AGICommands = [('appexec', ('Goto', 'agi_fail,s,1')), ('fail', ())]
+# Flag the overload so that the dialplan can react in agi_fail
+OVERLOAD_RESPONSE: AGICommands = [
+    ('set_variable', (dv.AGID_OVERLOAD, '1')),
+    *FAIL_RESPONSE,
+]
+# Errors answered without traceback
+HANDLED_ERRORS = (
+    BulkheadFull,
+    PoolTimeout,
+    DeadlineExceeded,
+    FastAGIHangup,
+    FastAGIDialPlanBreak,
+)
+
+
+def reject_request(fagi: FastAGI) -> None:
+    send_response(fagi, OVERLOAD_RESPONSE)
 
-    @contextmanager
-    def transaction(self, connection: psycopg2.connection) -> DictCursor:
-        try:
-            with connection.cursor(cursor_factory=DictCursor) as cursor:
-                yield cursor
-                connection.commit()
-        except psycopg2.DatabaseError:
-            logger.debug("Database error encountered. Rolling back.")
-            connection.rollback()
-            raise
 
+def failure_response(
+    agi: FastAGI | AsyncFastAGI, error: Exception, handler_name: str | None
+) -> AGICommands:
+    """Logs the error of a request and returns the AGI commands answering it,
+    shared by the threading and asyncio engines"""
+    if isinstance(error, (BulkheadFull, PoolTimeout)):
+        logger.warning("rejecting request: %s", error)
+        return OVERLOAD_RESPONSE
+    if isinstance(error, DeadlineExceeded):
+        logger.warning("aborting request %r: %s", handler_name, error)
+        metrics.counter('requests.deadline_exceeded').inc()
+        return FAIL_RESPONSE
+    if isinstance(error, FastAGIHangup):
+        logger.info("request %r aborted: %s", handler_name, error)
+        metrics.counter('requests.hangup').inc()
+        call_context.evict(agi)
+        return []
+    if isinstance(error, FastAGIDialPlanBreak):
+        logger.info("invalid request, dial plan broken")
+        return [('verbose', (error,)), *FAIL_RESPONSE]
+    logger.error("unexpected exception", exc_info=error)
+    return FAIL_RESPONSE
 
-class FastAGIRequestHandler(socketserver.StreamRequestHandler):
-    config: dict[str, Any]
 
-    def handle(self):
+def send_response(fagi: FastAGI, commands: AGICommands) -> None:
+    # Attempt to relay errors to Asterisk, but if it fails, we just give up.
+    # Each command is tried, the channel must get the failure result.
+    if not commands:
+        return
+    try:
+        # The deferred commands of the handler go first, their responses
+        # must not be read as those of the failure commands
+        fagi.flush()
+    except Exception:
+        pass
+    for method, args in commands:
         try:
-            logger.debug("handling request")
+            getattr(fagi, method)(*args)
+        except Exception:
+            pass
 
-            fagi = FastAGI(self.rfile, self.wfile, self.config)
-            except_hook = agitb.Hook(agi=fagi)
 
-            handler_name = fagi.env['agi_network_script']
-            logger.debug("delegating request handling %r", handler_name)
-            with _server.database.connection() as conn:
-                with _server.database.transaction(conn) as cursor:
-                    _handlers[handler_name].handle(fagi, cursor, fagi.args)
+def request_handler_names(fagi: FastAGI) -> list[str]:
+    """The handlers run by a request, the steps of a chain"""
+    handler_name = fagi.env.get('agi_network_script', '')
+    if handler_name != CHAIN_HANDLER:
+        return [handler_name]
+    steps = _STEPS_SEPARATOR.split(fagi.params.get('steps', ''))
+    return [step for step in steps if step]
 
-                fagi.verbose(f'AGI handler {handler_name!r} successfully executed')
-                logger.debug("request successfully handled")
 
-        # Attempt to relay errors to Asterisk, but if it fails, we
-        # just give up.
-        # XXX It may be here that dropped database connection
-        # exceptions could be caught.
-        except FastAGIDialPlanBreak as message:
-            logger.info("invalid request, dial plan broken")
+def process_request(fagi: FastAGI) -> None:
+    handler_name = None
+    try:
+        except_hook = agitb.Hook(agi=fagi)
 
-            try:
-                fagi.verbose(message)
-                # TODO: see under
-                fagi.appexec('Goto', 'agi_fail,s,1')
-                fagi.fail()
-            except Exception:
-                pass
-        except Exception:
-            logger.exception("unexpected exception")
+        handler_name = fagi.env['agi_network_script']
+        logger.debug("delegating request handling %r", handler_name)
+        if handler_name == CHAIN_HANDLER:
+            steps = [_handlers[name] for name in request_handler_names(fagi)]
+            if not steps:
+                raise FastAGIDialPlanBreak('chain without steps')
+        else:
+            steps = [_handlers[handler_name]]
+        # Requests that do not query the database do not use a connection
+        with _server.database.request_cursor(
+            statement_timeout=deadline.statement_timeout,
+            read_only=all(step.read_only for step in steps),
+        ) as cursor:
+            if handler_name == CHAIN_HANDLER:
+                error = _handle_chain(fagi, cursor, steps)
+            else:
+                error = None
+                steps[0].handle(fagi, cursor, fagi.args)
+        # The steps done before the failed one are committed, as if they
+        # had been separate requests
+        if error:
+            raise error
+
+        if _server.config['agi_success_verbose']:
+            fagi.verbose(f'AGI handler {handler_name!r} successfully executed')
+            fagi.flush()
+        logger.debug("request successfully handled")
+
+    except Exception as e:
+        response = failure_response(fagi, e, handler_name)
+        if not isinstance(e, HANDLED_ERRORS):
             try:
                 except_hook.handle()
-                # TODO: (important!)
-                #   - rename agi_fail, or find a better way
-                #   - move at the beginning of a safe block
-                fagi.appexec('Goto', 'agi_fail,s,1')
-                fagi.fail()
             except Exception:
                 pass
+        send_response(fagi, response)
+    finally:
+        if fagi.hungup:
+            call_context.evict(fagi)
+        if fagi.variable_cache:
+            _record_variable_cache(fagi.env['agi_network_script'], fagi.variable_cache)
+
+
+def _handle_chain(
+    fagi: FastAGI, cursor: DictCursor, steps: list[Handler]
+) -> Exception | None:
+    """Runs the steps until one fails, its changes are rolled back and its
+    error is returned"""
+    for step in steps:
+        logger.debug("chain step %r", step.handler_name)
+        savepoint = _StepSavepoint(cursor)
+        try:
+            step.handle(fagi, cursor, fagi.args)
+        except Exception as e:
+            logger.debug("chain step %r failed", step.handler_name)
+            try:
+                savepoint.rollback()
+            except (psycopg2.Error, sqlalchemy_exc.DBAPIError):
+                # The connection is lost, nothing is committed
+                raise e
+            return e
+        savepoint.release()
+    return None
+
+
+class _StepSavepoint:
+    """The changes of a chain step. No savepoint is needed while the request
+    has not used the database: the transaction begun by the step only holds
+    its changes. Read-only requests have no transaction."""
+
+    def __init__(self, cursor: DictCursor) -> None:
+        self.cursor = cursor
+        self.read_only = isinstance(cursor, LazyCursor) and cursor.read_only
+        self.created = _is_open(cursor) and not self.read_only
+        self.nested: Any = None
+        if not self.created:
+            return
+        if isinstance(cursor, LazyCursor) and cursor.shares_dao_connection:
+            # Known to SQLAlchemy: the xivo_dao session of the step releases or
+            # rolls back the savepoint instead of the whole transaction
+            self.nested = cursor.dao_connection.begin_nested()  # type: ignore
+        else:
+            cursor.execute('SAVEPOINT chain_step')
+
+    def rollback(self) -> None:
+        if not self.created:
+            if _is_open(self.cursor) and not self.read_only:
+                self.cursor.connection.rollback()
+        elif self.nested is not None:
+            if self.nested.is_active:
+                self.nested.rollback()
+        else:
+            self.cursor.execute('ROLLBACK TO SAVEPOINT chain_step')
+
+    def release(self) -> None:
+        if not self.created:
+            return
+        if self.nested is not None:
+            if self.nested.is_active:
+                self.nested.commit()
+        else:
+            self.cursor.execute('RELEASE SAVEPOINT chain_step')
+
 
+def _record_variable_cache(handler_name: str, cache: VariableCache) -> None:
+    if not cache.hits and not cache.misses:
+        return
+    logger.debug(
+        'handler %r variable cache: %d hits, %d misses',
+        handler_name,
+        cache.hits,
+        cache.misses,
+    )
+    metrics.counter(f'handler.{handler_name}.variable_cache.hits').inc(cache.hits)
+    metrics.counter(f'handler.{handler_name}.variable_cache.misses').inc(cache.misses)
 
-class AGID(socketserver.ThreadingTCPServer):
+
+class AGID(socketserver.TCPServer):
     allow_reuse_address = True
     initialized = False
-    # Use Daemon threads to avoid memory leak
-    # see bpo-37193 https://bugs.python.org/issue37193
-    daemon_threads = True
 
     def __init__(self, config: dict[str, Any]) -> None:
         logger.info('wazo-agid starting...')
 
         self.config = config
         signal.signal(signal.SIGHUP, sighup_handle)
+        signal.signal(signal.SIGUSR1, sigusr1_handle)
 
-        self.database = Database(self.config["db_uri"])
+        self.database = Database.from_config(self.config)
         self.setup()
 
-        FastAGIRequestHandler.config = config
-        socketserver.ThreadingTCPServer.__init__(
-            self, (self.listen_addr, self.listen_port), FastAGIRequestHandler
+        # On SIGTERM, no new request is accepted and the in-flight ones are
+        # given drain_timeout seconds to finish
+        self.drain_timeout = float(self.config['drain_timeout'])
+        logger.debug("drain_timeout: %s", self.drain_timeout)
+
+        self.worker_pool = WorkerPool(
+            'worker_pool',
+            size=int(self.config['max_workers']),
+            queue_size=int(self.config['worker_queue_size']),
+            stack_size=self.config['worker_stack_size'],
+            priorities=len(PRIORITIES),
+            flow_policy=FlowPolicy.from_config(self.config['tenant_scheduling']),
+        )
+        self.queue_timeout = float(self.config['worker_queue_timeout'])
+        logger.debug("worker_queue_timeout: %s", self.queue_timeout)
+        self._expired = metrics.counter('worker_pool.expired')
+
+        # Requests of the same priority are shared fairly between tenants
+        tenant_scheduling = self.config['tenant_scheduling']
+        self.tenant_scheduling = bool(tenant_scheduling.get('enabled'))
+        self.tenant_read_variable = bool(tenant_scheduling.get('read_variable'))
+        logger.debug("tenant_scheduling: %s", self.tenant_scheduling)
+
+        # Handlers stop working for callers that hung up. The monitor is
+        # created by each worker process.
+        self.hangup_detection = bool(self.config['hangup_detection'])
+        self.hangup_monitor: HangupMonitor | None = None
+
+        # Worker processes are recycled after serving max_requests requests or
+        # when their memory usage goes over max_memory
+        self.max_requests = int(self.config['process_max_requests'])
+        self.max_memory = int(self.config['process_max_memory']) * 1024 * 1024
+        self._served = 0
+        self._served_lock = threading.Lock()
+        self._stopping = False
+
+        # Every worker process binds its own socket, the kernel spreads the
+        # connections across them
+        self.allow_reuse_port = int(self.config['processes']) > 1
+
+        self._listeners: list[PriorityListener] = []
+
+        # AGI sessions can also be received as AsyncAGI events over AMI
+        self.ami_transport: AMITransport | None = None
+        ami_config = self.config['ami_transport']
+        if ami_config.get('enabled'):
+            if int(self.config['processes']) > 1:
+                # Every process would receive the events of every channel
+                logger.warning('ami_transport requires processes: 1, disabled')
+            else:
+                self.ami_transport = AMITransport(
+                    ami_config, self.config, self.process_async_agi
+                )
+
+        # With systemd socket activation, the listening sockets stay open while
+        # the service restarts: connections wait in the backlog instead of
+        # being refused
+        self._activated_socket: socket.socket | None = None
+        self._activated_listeners: dict[str, socket.socket] = {}
+        for name, sock in systemd.listen_sockets():
+            if name in PRIORITIES:
+                self._activated_listeners[name] = sock
+            elif self._activated_socket is None:
+                self._activated_socket = sock
+            else:
+                logger.warning('ignoring extra socket %r from systemd', name)
+
+        # Requests are not handled by a socketserver request handler, see
+        # process_request
+        socketserver.TCPServer.__init__(
+            self,
+            (self.listen_addr, self.listen_port),
+            socketserver.BaseRequestHandler,
+            bind_and_activate=False,
         )
 
         self.initialized = True
 
+    def listen(self) -> None:
+        self.socket.close()
+        if self._activated_socket:
+            # Worker processes share the socket received from systemd
+            self.socket = self._activated_socket.dup()
+            logger.info(
+                'listening on %s (socket activation)', self.socket.getsockname()
+            )
+        else:
+            # A new socket is created since the one created by the constructor
+            # is shared by every forked worker process
+            self.socket = socket.socket(self.address_family, self.socket_type)
+            try:
+                self.server_bind()
+                self.server_activate()
+            except BaseException:
+                self.server_close()
+                raise
+            logger.info('listening on %s:%d', self.listen_addr, self.listen_port)
+
+        self._listeners = []
+        for priority in PRIORITIES:
+            sock = self._activated_listeners.get(priority)
+            port = self.priority_listen_ports.get(priority)
+            if sock or port:
+                listener = PriorityListener(
+                    self, PRIORITIES.index(priority), port, sock and sock.dup()
+                )
+                self._listeners.append(listener)
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        self.listen()
+        if self.hangup_detection:
+            self.hangup_monitor = HangupMonitor()
+            self.hangup_monitor.start()
+        self.worker_pool.start()
+        if self.ami_transport:
+            self.ami_transport.start()
+        for listener in self._listeners:
+            threading.Thread(
+                target=listener.serve_forever, args=(poll_interval,), daemon=True
+            ).start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            for listener in self._listeners:
+                listener.shutdown()
+                listener.server_close()
+            self.worker_pool.stop(self.drain_timeout)
+            if self.ami_transport:
+                self.ami_transport.stop()
+            if self.hangup_monitor:
+                self.hangup_monitor.stop()
+            self.server_close()
+            logger.info('stopped')
+
+    def stop(self) -> None:
+        """Stops accepting requests, serve_forever returns once the in-flight
+        requests are done or after drain_timeout seconds"""
+        with self._served_lock:
+            if self._stopping:
+                return
+            self._stopping = True
+
+        logger.info(
+            'stopping: waiting up to %ss for in-flight requests', self.drain_timeout
+        )
+        # shutdown() waits for serve_forever to return, it must not block the
+        # caller, which may be a worker or a signal handler
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def process_request(
+        self, request, client_address, priority: int | None = None
+    ) -> None:
+        connection = AGIConnection(request, self.config)
+
+        # The handler, and so the priority, of a request accepted on the main
+        # port is only known once its environment has been read. Reading it is
+        # quick, it is done from the highest priority queue.
+        queued = self.worker_pool.submit(
+            self._intake,
+            connection,
+            priority,
+            priority=PRIORITY_CRITICAL if priority is None else priority,
+        )
+        if not queued:
+            logger.warning('worker queue is full, rejecting request')
+            self._reject_request(connection)
+
+    def _intake(self, connection: AGIConnection, priority: int | None) -> None:
+        if self._has_expired(connection):
+            self._reject_request(connection)
+            return
+
+        connection.request.settimeout(ENV_TIMEOUT)
+        try:
+            fagi = connection.read_env()
+        except TimeoutError:
+            logger.warning('no AGI environment received, closing request')
+            self._close_request(connection)
+            return
+        except Exception:
+            logger.exception("unexpected exception")
+            self._close_request(connection)
+            return
+        connection.request.settimeout(None)
+
+        try:
+            tenant_uuid = self._tenant_of(fagi)
+        except Exception:
+            logger.exception("unexpected exception")
+            self._close_request(connection)
+            return
+
+        # The requests of a tenant always go through its queue, for its
+        # concurrency limit to apply
+        requeue = tenant_uuid is not None
+        if priority is None:
+            priority = self._priority_of(fagi)
+            # Other requests are waiting for a worker, let those with a higher
+            # priority go first
+            if priority != PRIORITY_CRITICAL and self.worker_pool.queue_depth:
+                requeue = True
+
+        if requeue:
+            if self.worker_pool.submit(
+                self._dispatch, connection, priority=priority, flow=tenant_uuid
+            ):
+                return
+            logger.warning('worker queue is full, rejecting request')
+            self._reject_request(connection)
+            return
+
+        self._dispatch(connection)
+
+    def _dispatch(self, connection: AGIConnection) -> None:
+        if self._has_expired(connection):
+            self._reject_request(connection)
+            return
+
+        fagi = connection.read_env()
+        monitor = self.hangup_monitor
+        try:
+            if monitor:
+                if has_hung_up(connection.request):
+                    logger.info('caller hung up while the request was queued')
+                    metrics.counter('requests.hangup').inc()
+                    return
+                monitor.watch(connection.request, fagi)
+            process_request(fagi)
+        finally:
+            if monitor:
+                monitor.unwatch(connection.request)
+            self._close_request(connection)
+            self._request_done()
+
+    def process_async_agi(self, session: AsyncAGISession) -> None:
+        # Called by the AMI connection, which must not wait: the tenant is only
+        # taken from the parameters
+        tenant_uuid = None
+        if self.tenant_scheduling:
+            tenant_uuid = session.fagi.params.get('tenant_uuid') or None
+        queued = self.worker_pool.submit(
+            self._dispatch_async_agi,
+            session,
+            priority=self._priority_of(session.fagi),
+            flow=tenant_uuid,
+        )
+        if not queued:
+            logger.warning('worker queue is full, rejecting request')
+            session.reject()
+
+    def _dispatch_async_agi(self, session: AsyncAGISession) -> None:
+        if self._has_expired(session):
+            session.reject()
+            return
+
+        try:
+            process_request(session.fagi)
+        finally:
+            session.close()
+            self._request_done()
+
+    def _tenant_of(self, fagi: FastAGI) -> str | None:
+        if not self.tenant_scheduling:
+            return None
+        tenant_uuid = fagi.params.get('tenant_uuid')
+        if not tenant_uuid and self.tenant_read_variable:
+            tenant_uuid = fagi.get_variable(dv.TENANT_UUID)
+        return tenant_uuid or None
+
+    def _priority_of(self, fagi: FastAGI) -> int:
+        # A chain has the highest priority of its steps
+        priorities = [
+            handler.priority
+            for handler in map(_handlers.get, request_handler_names(fagi))
+            if handler
+        ]
+        return min(priorities, default=PRIORITY_NORMAL)
+
+    def _has_expired(self, connection: AGIConnection | AsyncAGISession) -> bool:
+        if time.monotonic() - connection.accepted_at <= self.queue_timeout:
+            return False
+        logger.warning('request waited too long in queue, rejecting request')
+        self._expired.inc()
+        return True
+
+    def _request_done(self) -> None:
+        if not self.max_requests and not self.max_memory:
+            return
+
+        with self._served_lock:
+            self._served += 1
+            if self._stopping:
+                return
+            if self.max_requests and self._served >= self.max_requests:
+                logger.info('served %d requests, recycling process', self._served)
+            elif self.max_memory and current_rss() > self.max_memory:
+                logger.info('memory usage is over the limit, recycling process')
+            else:
+                return
+
+        self.stop()
+
+    def _reject_request(self, connection: AGIConnection) -> None:
+        # Rejected requests may be answered on the accept thread
+        connection.request.settimeout(REJECT_TIMEOUT)
+        try:
+            reject_request(connection.read_env())
+        except Exception:
+            logger.exception("unexpected exception")
+        finally:
+            self._close_request(connection)
+
+    def _close_request(self, connection: AGIConnection) -> None:
+        connection.close()
+        self.shutdown_request(connection.request)
+
     def setup(self) -> None:
         if not self.initialized:
             self.listen_addr = self.config["listen_address"]
@@ -143,17 +654,65 @@ class AGID(socketserver.ThreadingTCPServer):
             self.request_queue_size = int(self.config["listen_backlog"])
             logger.debug("listen_backlog: %d", self.request_queue_size)
 
-        for i in range(1, CONNECTION_TIMEOUT + 1):
-            try:
-                with self.database.connection():
-                    pass
-                break
-            except psycopg2.OperationalError:
-                if i < CONNECTION_TIMEOUT:
-                    time.sleep(1)
-                    continue
-                logger.error('Connecting to database timed out. Giving up.')
-                raise
+            self.priority_listen_ports = {
+                priority: int(port)
+                for priority, port in self.config['priority_listen_ports'].items()
+            }
+            unknown = set(self.priority_listen_ports) - set(PRIORITIES)
+            if unknown:
+                raise ValueError(f'unknown priorities {sorted(unknown)}')
+            logger.debug("priority_listen_ports: %s", self.priority_listen_ports)
+
+        wait_for_database(self.database)
+
+
+class PriorityListener(socketserver.TCPServer):
+    """Accepts the connections of a port dedicated to a priority class, the
+    requests are processed by the AGID worker pool."""
+
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        agid: AGID,
+        priority: int,
+        port: int | None = None,
+        sock: socket.socket | None = None,
+    ) -> None:
+        self.agid = agid
+        self.priority = priority
+        self.allow_reuse_port = agid.allow_reuse_port
+        self.request_queue_size = agid.request_queue_size
+        super().__init__(
+            (agid.listen_addr, port or 0),
+            socketserver.BaseRequestHandler,
+            bind_and_activate=sock is None,
+        )
+        if sock:
+            self.socket.close()
+            self.socket = sock
+        logger.info(
+            'listening on %s for %s requests',
+            self.socket.getsockname(),
+            PRIORITIES[priority],
+        )
+
+    def process_request(self, request, client_address) -> None:
+        self.agid.process_request(request, client_address, self.priority)
+
+
+def wait_for_database(database: Database) -> None:
+    for i in range(1, CONNECTION_TIMEOUT + 1):
+        try:
+            with database.connection():
+                pass
+            break
+        except psycopg2.OperationalError:
+            if i < CONNECTION_TIMEOUT:
+                time.sleep(1)
+                continue
+            logger.error('Connecting to database timed out. Giving up.')
+            raise
 
 
 class Handler:
@@ -161,48 +720,295 @@ class Handler:
         self,
         handler_name: str,
         setup_fn: SetupFunction | None,
-        handle_fn: HandleFunction,
+        handle_fn: HandleFunction | AsyncHandleFunction | None,
+        bulkhead: str | None = None,
+        priority: str = 'normal',
+        module_name: str | None = None,
+        timeout: float | None = None,
+        read_only: bool = False,
     ) -> None:
         self.handler_name = handler_name
         self.setup_fn = setup_fn
         self.handle_fn = handle_fn
-        self.lock = moresynchro.RWLock()
+        self.is_coroutine = inspect.iscoroutinefunction(handle_fn)
+        self.bulkhead_name = bulkhead
+        self.bulkhead: Bulkhead | None = None
+        self.priority_name = priority
+        self.priority = PRIORITIES.index(priority)
+        # None for the request_timeout of the configuration
+        self.default_timeout = timeout
+        self.timeout: float | None = timeout
+        # Declared by the handlers that never write to the database
+        self.default_read_only = read_only
+        self.read_only = read_only
+        # Lazy handlers are registered from the manifest, their module is
+        # imported on first use
+        self.module_name = module_name
+        self.loaded = False
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def lazy(cls, handler_name: str, options: dict[str, Any]) -> Handler:
+        handler = cls(
+            handler_name,
+            None,
+            None,
+            bulkhead=options.get('bulkhead'),
+            priority=options.get('priority', 'normal'),
+            module_name=options['module'],
+            timeout=options.get('timeout'),
+            read_only=options.get('read_only', False),
+        )
+        handler.is_coroutine = options.get('coroutine', False)
+        return handler
+
+    def bind(
+        self,
+        handle_fn: HandleFunction | AsyncHandleFunction,
+        setup_fn: SetupFunction | None,
+    ) -> None:
+        self.setup_fn = setup_fn
+        self.handle_fn = handle_fn
+        self.is_coroutine = inspect.iscoroutinefunction(handle_fn)
+
+    def load(self, cursor: DictCursor) -> None:
+        """Imports the module of the handler if needed and sets it up, once"""
+        if self.loaded:
+            return
+        with self._load_lock:
+            if self.loaded:
+                return
+            start = time.monotonic()
+            if self.handle_fn is None:
+                importlib.import_module(f'wazo_agid.modules.{self.module_name}')
+                if self.handle_fn is None:
+                    raise RuntimeError(
+                        f'module {self.module_name!r} does not register handler '
+                        f'{self.handler_name!r}, the manifest is not up to date'
+                    )
+            self.setup(cursor)
+            self.loaded = True
+            logger.debug(
+                'handler %r loaded in %.3f s',
+                self.handler_name,
+                time.monotonic() - start,
+            )
+
+    def configure(self, config: dict[str, Any]) -> None:
+        options = config['handlers'].get(self.handler_name) or {}
+
+        bulkhead_name = options.get('bulkhead', self.bulkhead_name)
+        self.bulkhead = get_bulkhead(bulkhead_name, config) if bulkhead_name else None
+        if self.bulkhead:
+            logger.debug(
+                'handler %r uses bulkhead %r', self.handler_name, bulkhead_name
+            )
+
+        priority = options.get('priority', self.priority_name)
+        if priority in PRIORITIES:
+            self.priority = PRIORITIES.index(priority)
+        else:
+            logger.warning(
+                'unknown priority %r for handler %r, expected one of %s',
+                priority,
+                self.handler_name,
+                PRIORITIES,
+            )
+
+        timeout = options.get('timeout', self.default_timeout)
+        if timeout is None:
+            timeout = config['request_timeout']
+        self.timeout = float(timeout)
+
+        self.read_only = bool(options.get('read_only', self.default_read_only))
 
     def setup(self, cursor: DictCursor) -> None:
         if self.setup_fn:
             self.setup_fn(cursor)
 
     def reload(self, cursor: DictCursor) -> None:
+        # Requests are not blocked during a reload: setup functions must build
+        # their new state aside and publish it with a single assignment
         if self.setup_fn:
-            if not self.lock.acquire_write():
-                logger.error("deadlock detected and avoided for %r", self.handler_name)
-                logger.error("%r has not be reloaded", self.handler_name)
-                return
+            self.setup_fn(cursor)
+            logger.debug('handler %r reloaded', self.handler_name)
+
+    def handle(self, agi: FastAGI, cursor: DictCursor, args: list[str]):
+        if self.is_coroutine:
+            raise RuntimeError(
+                f'coroutine handler {self.handler_name!r} requires the asyncio engine'
+            )
+
+        self.load(cursor)
+        with deadline.deadline(self.timeout) as request_deadline:
+            agi.hangup_callback = functools.partial(
+                _abort_on_hangup, request_deadline, cursor
+            )
             try:
-                self.setup_fn(cursor)
-                logger.debug('handler %r reloaded', self.handler_name)
+                with self._bulkhead():
+                    _set_statement_timeout(cursor)
+                    with _dao_session_scope(cursor):
+                        self.handle_fn(agi, cursor, args)
+                        # The deferred AGI commands must succeed for the
+                        # transactions to be committed
+                        agi.flush()
+            except BulkheadFull:
+                if not self.bulkhead or not self.bulkhead.skip_when_full:
+                    raise
+                logger.info('bulkhead full, skipping handler %r', self.handler_name)
+            except Exception as e:
+                self._raise_if_expired(request_deadline, e)
+                raise
             finally:
-                self.lock.release()
+                agi.hangup_callback = None
 
-    def handle(self, agi: FastAGI, cursor: DictCursor, args: list[str]):
-        self.lock.acquire_read()
-        try:
-            with session_scope():
-                self.handle_fn(agi, cursor, args)
-        finally:
-            self.lock.release()
+    async def handle_async(
+        self, agi: AsyncFastAGI, cursor: DictCursor, args: list[str]
+    ) -> None:
+        # Blocks the event loop once if the handler was not preloaded
+        self.load(cursor)
+        # No session_scope here: the xivo_dao session is thread-local and would
+        # be shared by every coroutine running on the event loop.
+        with deadline.deadline(self.timeout) as request_deadline:
+            try:
+                # Waiting for the bulkhead would block the event loop
+                with self._bulkhead(blocking=False):
+                    _set_statement_timeout(cursor)
+                    await self.handle_fn(agi, cursor, args)  # type: ignore[misc]
+            except BulkheadFull:
+                if not self.bulkhead or not self.bulkhead.skip_when_full:
+                    raise
+                logger.info('bulkhead full, skipping handler %r', self.handler_name)
+            except Exception as e:
+                self._raise_if_expired(request_deadline, e)
+                raise
+
+    def _raise_if_expired(
+        self, request_deadline: deadline.Deadline, error: Exception
+    ) -> None:
+        # Queries and HTTP requests interrupted by the deadline fail with
+        # their own error
+        if (
+            isinstance(error, DeadlineExceeded)
+            or error is request_deadline.cancel_error
+        ):
+            return
+        if request_deadline.expired:
+            cancel_error = request_deadline.cancel_error
+            raise cancel_error or DeadlineExceeded(request_deadline.timeout) from error
+
+    def _bulkhead(self, blocking: bool = True) -> AbstractContextManager:
+        if self.bulkhead:
+            return self.bulkhead.acquire(blocking)
+        return nullcontext()
+
+
+def _is_open(cursor: DictCursor) -> bool:
+    return not isinstance(cursor, LazyCursor) or cursor.opened
+
+
+def _set_statement_timeout(cursor: DictCursor) -> None:
+    if isinstance(cursor, LazyCursor):
+        deadline.check()
+        # Set when the cursor is opened, if the handler uses it
+        cursor.set_statement_timeout()
+    else:
+        deadline.set_statement_timeout(cursor)
+
+
+def _dao_session_scope(cursor: DictCursor) -> AbstractContextManager:
+    if isinstance(cursor, LazyCursor) and cursor.shares_dao_connection:
+        # session_scope() uses the session of the thread, which queries
+        # through the connection of the request
+        db_manager.Session.remove()
+        db_manager.Session.registry.set(RequestSession(cursor))
+    return session_scope()
+
+
+def _abort_on_hangup(request_deadline: deadline.Deadline, cursor: DictCursor) -> None:
+    # The next AGI command, query or HTTP request of the handler fails
+    request_deadline.cancel(FastAGIHangup('the caller hung up'))
+    # Interrupts the running query, if any
+    if _is_open(cursor):
+        cursor.connection.cancel()
+
+
+def get_bulkhead(name: str, config: dict[str, Any]) -> Bulkhead | None:
+    if name not in _bulkheads:
+        bulkhead_config = config['bulkheads'].get(name)
+        if not bulkhead_config:
+            logger.warning('unknown bulkhead %r, concurrency is not limited', name)
+            return None
+        _bulkheads[name] = Bulkhead.from_config(name, bulkhead_config)
+    return _bulkheads[name]
 
 
-def register(handle_fn: HandleFunction, setup_fn: SetupFunction | None = None) -> None:
+def register(
+    handle_fn: HandleFunction | AsyncHandleFunction,
+    setup_fn: SetupFunction | None = None,
+    bulkhead: str | None = None,
+    priority: str = 'normal',
+    timeout: float | None = None,
+    read_only: bool = False,
+) -> None:
+    """Registers a handler under the name of handle_fn. A read_only handler
+    never writes to the database, its queries can run without transaction
+    (see read_only_autocommit)."""
     handler_name = handle_fn.__name__
 
     if handler_name in _handlers:
+        handler = _handlers[handler_name]
+        if handler.handle_fn is None:
+            # The module of a lazy handler is being imported
+            handler.bind(handle_fn, setup_fn)
+            return
         raise ValueError("handler %r already registered", handler_name)
 
-    _handlers[handler_name] = Handler(handler_name, setup_fn, handle_fn)
+    if priority not in PRIORITIES:
+        raise ValueError(f'unknown priority {priority!r}, expected one of {PRIORITIES}')
 
+    handler = Handler(
+        handler_name,
+        setup_fn,
+        handle_fn,
+        bulkhead=bulkhead,
+        priority=priority,
+        timeout=timeout,
+        read_only=read_only,
+    )
+    if _server:
+        handler.configure(_server.config)
+    _handlers[handler_name] = handler
 
-def sighup_handle(signum: int, frame: FrameType | None) -> None:
+
+class Reloader(threading.Thread):
+    """Reloads the core engine and the handlers, outside of the signal handler
+    and of the request path. Reload requests received during a reload are
+    coalesced."""
+
+    def __init__(self) -> None:
+        super().__init__(name='reloader', daemon=True)
+        self._requested = threading.Event()
+        self._duration = metrics.summary('reload.duration')
+        self._failed = metrics.counter('reload.failed')
+
+    def request(self) -> None:
+        self._requested.set()
+
+    def run(self) -> None:
+        while True:
+            self._requested.wait()
+            self._requested.clear()
+            start = time.monotonic()
+            try:
+                reload_handlers()
+            except Exception:
+                logger.exception("reload failed")
+                self._failed.inc()
+            self._duration.observe(time.monotonic() - start)
+
+
+def reload_handlers() -> None:
     logger.debug("reloading core engine")
     _server.setup()
 
@@ -210,20 +1016,163 @@ def sighup_handle(signum: int, frame: FrameType | None) -> None:
     with _server.database.connection() as conn:
         with _server.database.transaction(conn) as cursor:
             for handler in _handlers.values():
-                handler.reload(cursor)
+                if not handler.loaded:
+                    continue
+                try:
+                    handler.reload(cursor)
+                except Exception:
+                    # The handler keeps its previous state
+                    logger.exception(
+                        "failed to reload handler %r", handler.handler_name
+                    )
             logger.debug("finished reload")
 
 
-def run() -> None:
+def request_reload() -> None:
+    if _reloader:
+        _reloader.request()
+    else:
+        logger.info("not serving yet, ignoring reload request")
+
+
+def watch_file(path: str, load_fn: Callable[[], None]) -> None:
+    """Calls load_fn when the file changes. load_fn must only replace the
+    module state once the new file is parsed and validated, the previous
+    state is kept when it raises."""
+    _watched_files.setdefault(path, []).append(load_fn)
+    if _file_watcher:
+        _file_watcher.watch(path, load_fn)
+
+
+def register_warm_up(name: str, fn: Callable[[], None]) -> None:
+    """Runs fn before accepting requests, e.g. to wait for a resource needed
+    by the first calls"""
+    _warm_up_tasks.append((name, fn))
+
+
+def warm_up(timeout: float) -> bool:
+    stage = WarmUp(timeout)
+    stage.add('database', lambda: warm_up_database(_server.database))
+    stage.add('sqlalchemy', warm_up_sqlalchemy)
+    stage.add('phone metadata', lambda: load_phone_metadata(_server.database))
+    if _lazy_loading:
+        stage.add('handlers', preload_handlers)
+    for name, fn in _warm_up_tasks:
+        stage.add(name, fn)
+    return stage.run()
+
+
+def sighup_handle(signum: int, frame: FrameType | None) -> None:
+    request_reload()
+
+
+def sigusr1_handle(signum: int, frame: FrameType | None) -> None:
+    metrics.log_metrics()
+
+
+def sigterm_handle(signum: int, frame: FrameType | None) -> None:
+    _server.stop()
+
+
+def setup_handlers() -> None:
     logger.debug("list of handlers: %s", ', '.join(sorted(_handlers)))
+    if _lazy_loading:
+        logger.debug("handlers are loaded on first use")
+        return
+
     with _server.database.connection() as conn:
         with _server.database.transaction(conn) as cursor:
             for handler in _handlers.values():
-                handler.setup(cursor)
+                handler.load(cursor)
+
+
+def preload_handlers() -> None:
+    """Loads the handlers that were not used yet, so that their first call does
+    not pay for the import of their module"""
+    start = time.monotonic()
+    for handler in list(_handlers.values()):
+        if handler.loaded:
+            continue
+        try:
+            with _server.database.connection() as conn:
+                with _server.database.transaction(conn) as cursor:
+                    handler.load(cursor)
+        except Exception:
+            logger.exception("failed to load handler %r", handler.handler_name)
+    logger.info(
+        "handlers preloaded in %.3f s (RSS %d MiB)",
+        time.monotonic() - start,
+        current_rss() // 2**20,
+    )
+
+
+def serve() -> None:
+    global _reloader, _file_watcher
+
+    _reloader = Reloader()
+    _reloader.start()
+
+    if _server.config['watch_config_files']:
+        _file_watcher = FileWatcher(
+            _watched_files, poll_interval=float(_server.config['watch_poll_interval'])
+        )
+        _file_watcher.start()
+
+    # Requests are accepted once warmed up, or after the warm-up timeout
+    warm_up_config = _server.config['warm_up']
+    if warm_up_config['enabled']:
+        warm_up(float(warm_up_config['timeout']))
 
+    if _lazy_loading and _server.config['preload_modules']:
+        threading.Thread(target=preload_handlers, name='preload', daemon=True).start()
+
+    metrics_log_interval = _server.config['metrics_log_interval']
+    if metrics_log_interval:
+        metrics.MetricsReporter(float(metrics_log_interval)).start()
+
+    # Until then, the process can be stopped right away
+    signal.signal(signal.SIGTERM, sigterm_handle)
     _server.serve_forever()
 
 
+def run() -> None:
+    setup_handlers()
+    serve()
+
+
+def register_modules(config: dict[str, Any]) -> None:
+    """Registers the handlers of the manifest without importing their module.
+    The handlers of disabled modules are not registered."""
+    disabled = set(config['disabled_modules'] or [])
+    unknown = disabled - {options['module'] for options in HANDLERS.values()}
+    if unknown:
+        logger.warning('unknown disabled modules: %s', ', '.join(sorted(unknown)))
+
+    for handler_name, options in HANDLERS.items():
+        if options['module'] in disabled or handler_name in _handlers:
+            continue
+        _handlers[handler_name] = Handler.lazy(handler_name, options)
+
+
 def init(config) -> None:
-    global _server
-    _server = AGID(config)
+    global _server, _lazy_loading
+
+    engine = config.get('engine', 'threading')
+    logger.debug("engine: %s", engine)
+    if engine == 'asyncio':
+        from wazo_agid.async_agid import AsyncAGID
+
+        _server = AsyncAGID(config)
+    elif engine == 'threading':
+        _server = AGID(config)
+    else:
+        raise ValueError(f'unknown engine {engine!r}, expected one of {ENGINES}')
+
+    deadline.install_session_statement_timeout()
+    call_context.configure(config['call_context'])
+
+    # Worker processes share the modules imported before the fork
+    _lazy_loading = bool(config['lazy_load_modules']) and int(config['processes']) <= 1
+    register_modules(config)
+    for handler in _handlers.values():
+        handler.configure(config)
@@ -0,0 +1,410 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# AsyncAGI over AMI. The dialplan runs AGI(agi:async,<handler>,<args...>) and
+# Asterisk delivers the AGI session as AMI events instead of opening a FastAGI
+# connection: AsyncAGIStart with the AGI environment, AsyncAGIExec with the
+# result of each command sent with the AGI action, and AsyncAGIEnd when the
+# channel leaves the AGI. The sessions of all the channels share a few AMI
+# connections. Each session is adapted to the FastAGI interface, so that the
+# handlers work unchanged.
+
+from __future__ import annotations
+
+import io
+import itertools
+import logging
+import socket
+import threading
+import time
+import zlib
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+from urllib.parse import unquote
+
+from wazo_agid import dialplan_variables as dv
+from wazo_agid import metrics
+from wazo_agid.fastagi import FastAGI
+
+logger = logging.getLogger(__name__)
+
+# Ends the AsyncAGI of the channel, the dialplan continues
+BREAK_COMMAND = 'ASYNCAGI BREAK'
+# Read by the commands waiting for a result when the session ends, as for a
+# channel that hung up
+HANGUP_RESULT = b'200 result=-1 (hangup)\n'
+CONNECT_TIMEOUT = 5
+
+Message = dict[str, str]
+
+
+def session_env(env: dict[str, str]) -> dict[str, str] | None:
+    """The FastAGI environment of an AsyncAGI session: the first argument is
+    the handler, as the script of agi://host/<handler>. None without handler."""
+    args = FastAGI._get_agi_args(env)
+    if not args or not args[0]:
+        return None
+    env = {key: value for key, value in env.items() if not key.startswith('agi_arg_')}
+    env['agi_network_script'] = args[0]
+    for i, arg in enumerate(args[1:], 1):
+        env[f'agi_arg_{i:d}'] = arg
+    return env
+
+
+class _SessionInput(io.RawIOBase):
+    """The command results of a session, fed by the AMI connection"""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._chunks: deque[bytes] = deque()
+        self._ended = False
+
+    def readable(self) -> bool:
+        return True
+
+    def feed(self, data: bytes) -> None:
+        with self._condition:
+            self._chunks.append(data)
+            self._condition.notify()
+
+    def end(self) -> None:
+        with self._condition:
+            self._ended = True
+            self._condition.notify()
+
+    def readinto(self, buffer: Any) -> int:
+        with self._condition:
+            while not self._chunks and not self._ended:
+                self._condition.wait()
+            chunk = self._chunks.popleft() if self._chunks else HANGUP_RESULT
+            size = min(len(buffer), len(chunk))
+            buffer[:size] = chunk[:size]
+            if size < len(chunk):
+                self._chunks.appendleft(chunk[size:])
+            return size
+
+
+class _SessionOutput(io.RawIOBase):
+    """Sends each command line written by FastAGI with an AGI action"""
+
+    def __init__(self, send_command: Callable[[str], None]) -> None:
+        self._send_command = send_command
+        self._partial = b''
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        size = len(data)
+        *lines, self._partial = (self._partial + bytes(data)).split(b'\n')
+        for line in lines:
+            self._send_command(line.decode('utf8'))
+        return size
+
+
+class AsyncAGISession:
+    """The AsyncAGI session of a channel, used through its FastAGI"""
+
+    def __init__(
+        self,
+        connection: AMIConnection,
+        channel: str,
+        env: dict[str, str],
+        config: dict[str, Any],
+    ) -> None:
+        self.connection = connection
+        self.channel = channel
+        # Compared to worker_queue_timeout, as for FastAGI connections
+        self.accepted_at = time.monotonic()
+        self.ended = False
+        self._input = _SessionInput()
+        self.fagi = FastAGI(
+            io.BufferedReader(self._input),
+            io.BufferedWriter(_SessionOutput(self._send_command)),
+            config,
+            env=env,
+        )
+
+    def _send_command(self, command: str) -> None:
+        if self.ended or not self.connection.send_command(self, command):
+            raise BrokenPipeError(32, 'AsyncAGI session ended')
+
+    def result(self, data: bytes) -> None:
+        self._input.feed(data)
+
+    def end(self) -> None:
+        """Called when the channel leaves the AGI, usually on hangup"""
+        if self.ended:
+            return
+        self.ended = True
+        self._input.end()
+        try:
+            self.fagi.notify_hangup()
+        except Exception:
+            logger.exception('failed to abort the request')
+
+    def close(self) -> None:
+        """Returns the channel to the dialplan"""
+        self.connection.remove(self)
+        if not self.ended:
+            self.ended = True
+            self.connection.send_command(self, BREAK_COMMAND)
+        self._input.end()
+
+    def reject(self) -> None:
+        """Sends the channel to agi_fail without waiting for the results, the
+        AMI connection must not wait for a worker"""
+        self.connection.remove(self)
+        if not self.ended:
+            self.ended = True
+            for command in (
+                f'SET VARIABLE {dv.AGID_OVERLOAD} 1',
+                'EXEC Goto agi_fail,s,1',
+                BREAK_COMMAND,
+            ):
+                self.connection.send_command(self, command)
+        self._input.end()
+
+
+class AMIConnection(threading.Thread):
+    """An AMI connection receiving the AsyncAGI events. Every connection
+    receives the events of all the channels, each one only handles the
+    sessions assigned to it."""
+
+    def __init__(
+        self,
+        index: int,
+        count: int,
+        ami_config: dict[str, Any],
+        agi_config: dict[str, Any],
+        dispatch: Callable[[AsyncAGISession], None],
+    ) -> None:
+        super().__init__(name=f'ami-{index}', daemon=True)
+        self.index = index
+        self.count = count
+        self.host = ami_config.get('host', 'localhost')
+        self.port = int(ami_config.get('port', 5038))
+        self.username = ami_config.get('username', '')
+        self.password = ami_config.get('password', '')
+        self.reconnect_interval = float(ami_config.get('reconnect_interval', 5))
+        self.agi_config = agi_config
+        self.dispatch = dispatch
+        self.connected = threading.Event()
+
+        self._sock: socket.socket | None = None
+        self._write_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._sessions: dict[str, AsyncAGISession] = {}
+        # The session of each AGI action waiting for its response
+        self._actions: dict[str, AsyncAGISession] = {}
+        self._action_ids = itertools.count(1)
+        self._stopped = threading.Event()
+        self._reconnects = metrics.counter('ami_transport.reconnects')
+
+    def owns(self, unique_id: str) -> bool:
+        return zlib.crc32(unique_id.encode()) % self.count == self.index
+
+    def send_command(self, session: AsyncAGISession, command: str) -> bool:
+        action_id = str(next(self._action_ids))
+        with self._lock:
+            self._actions[action_id] = session
+        try:
+            self._send(
+                {
+                    'Action': 'AGI',
+                    'Channel': session.channel,
+                    'Command': command,
+                    'CommandID': action_id,
+                    'ActionID': action_id,
+                }
+            )
+        except OSError:
+            with self._lock:
+                self._actions.pop(action_id, None)
+            return False
+        return True
+
+    def remove(self, session: AsyncAGISession) -> None:
+        with self._lock:
+            if self._sessions.get(session.channel) is session:
+                del self._sessions[session.channel]
+
+    @property
+    def session_count(self) -> int:
+        return len(self._sessions)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        sock = self._sock
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._serve()
+            except OSError as e:
+                if not self._stopped.is_set():
+                    logger.warning('AMI connection %d: %s', self.index, e)
+            finally:
+                self._disconnected()
+            if self._stopped.wait(self.reconnect_interval):
+                break
+            self._reconnects.inc()
+
+    def _serve(self) -> None:
+        sock = socket.create_connection((self.host, self.port), CONNECT_TIMEOUT)
+        sock.settimeout(None)
+        self._sock = sock
+        with sock.makefile('rb') as reader:
+            # Asterisk Call Manager/<version>
+            reader.readline()
+            self._send(
+                {
+                    'Action': 'Login',
+                    'Username': self.username,
+                    'Secret': self.password,
+                    'Events': 'agi',
+                    'ActionID': 'login',
+                }
+            )
+            response = self._read_message(reader)
+            if response.get('Response') != 'Success':
+                raise ConnectionError(f'AMI login failed: {response.get("Message")}')
+            logger.info(
+                'AMI connection %d established to %s:%d',
+                self.index,
+                self.host,
+                self.port,
+            )
+            self.connected.set()
+            while True:
+                message = self._read_message(reader)
+                if not message:
+                    raise ConnectionError('AMI connection closed')
+                self._handle(message)
+
+    def _disconnected(self) -> None:
+        self.connected.clear()
+        sock, self._sock = self._sock, None
+        if sock:
+            sock.close()
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._actions.clear()
+        for session in sessions:
+            session.end()
+
+    def _send(self, message: Message) -> None:
+        sock = self._sock
+        if sock is None:
+            raise BrokenPipeError(32, 'AMI connection is down')
+        data = ''.join(
+            f'{key}: {value.replace(chr(13), " ").replace(chr(10), " ")}\r\n'
+            for key, value in message.items()
+        )
+        with self._write_lock:
+            sock.sendall(f'{data}\r\n'.encode('utf8'))
+
+    @staticmethod
+    def _read_message(reader: io.BufferedReader) -> Message:
+        message = {}
+        while True:
+            line = reader.readline()
+            if not line:
+                # connection closed, the partial message is dropped
+                return {}
+            line = line.rstrip(b'\r\n')
+            if not line:
+                if message:
+                    return message
+                continue
+            key, _, value = line.decode('utf8', 'replace').partition(':')
+            message[key.strip()] = value.strip()
+
+    def _handle(self, message: Message) -> None:
+        event = message.get('Event')
+        if event == 'AsyncAGI':
+            # Asterisk < 12
+            event = f'AsyncAGI{message.get("SubEvent", "")}'
+
+        if event == 'AsyncAGIExec':
+            with self._lock:
+                session = self._sessions.get(message.get('Channel', ''))
+            if session:
+                result = unquote(message.get('Result', ''))
+                if not result.endswith('\n'):
+                    result += '\n'
+                session.result(result.encode('utf8'))
+        elif event == 'AsyncAGIStart':
+            self._start(message)
+        elif event == 'AsyncAGIEnd':
+            with self._lock:
+                session = self._sessions.pop(message.get('Channel', ''), None)
+            if session:
+                session.end()
+        elif 'Response' in message:
+            with self._lock:
+                session = self._actions.pop(message.get('ActionID', ''), None)
+            if session and message['Response'] != 'Success':
+                # e.g. the channel hung up or is not waiting for AsyncAGI
+                logger.info(
+                    'AGI action failed on %s: %s',
+                    session.channel,
+                    message.get('Message'),
+                )
+                session.end()
+
+    def _start(self, message: Message) -> None:
+        channel = message.get('Channel', '')
+        if not self.owns(message.get('Uniqueid') or channel):
+            return
+
+        env: dict[str, str] = {}
+        FastAGI._parse_env_block(env, unquote(message.get('Env', '')).encode('utf8'))
+        fastagi_env = session_env(env)
+        session = AsyncAGISession(self, channel, fastagi_env or env, self.agi_config)
+        if fastagi_env is None:
+            logger.warning('AsyncAGI on %s without handler argument', channel)
+            session.close()
+            return
+
+        with self._lock:
+            self._sessions[channel] = session
+        self.dispatch(session)
+
+
+class AMITransport:
+    """Receives the AsyncAGI sessions over ami_config['connections'] AMI
+    connections and hands them to dispatch, which must not block"""
+
+    def __init__(
+        self,
+        ami_config: dict[str, Any],
+        agi_config: dict[str, Any],
+        dispatch: Callable[[AsyncAGISession], None],
+    ) -> None:
+        count = max(1, int(ami_config.get('connections', 1)))
+        self.connections = [
+            AMIConnection(index, count, ami_config, agi_config, dispatch)
+            for index in range(count)
+        ]
+        metrics.gauge(
+            'ami_transport.sessions',
+            lambda: sum(c.session_count for c in self.connections),
+        )
+
+    def start(self) -> None:
+        for connection in self.connections:
+            connection.start()
+
+    def stop(self) -> None:
+        for connection in self.connections:
+            connection.stop()
+        for connection in self.connections:
+            connection.join(CONNECT_TIMEOUT)
@@ -0,0 +1,220 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from wazo_agid import agid, deadline, metrics, systemd
+from wazo_agid.fastagi import AsyncFastAGI, FastAGI
+
+logger = logging.getLogger(__name__)
+
+
+class _BlockingReader:
+    """File-like reader used by FastAGI in a worker thread, backed by the
+    StreamReader owned by the event loop."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        self._reader = reader
+        self._loop = loop
+
+    def readline(self) -> bytes:
+        future = asyncio.run_coroutine_threadsafe(self._reader.readline(), self._loop)
+        return future.result()
+
+
+class _BlockingWriter:
+    """File-like writer used by FastAGI in a worker thread, backed by the
+    StreamWriter owned by the event loop."""
+
+    def __init__(
+        self, writer: asyncio.StreamWriter, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        self._writer = writer
+        self._loop = loop
+
+    def write(self, data: bytes) -> None:
+        self._loop.call_soon_threadsafe(self._writer.write, data)
+
+    def flush(self) -> None:
+        future = asyncio.run_coroutine_threadsafe(self._writer.drain(), self._loop)
+        future.result()
+
+
+class AsyncAGID:
+    def __init__(self, config: dict[str, Any]) -> None:
+        logger.info('wazo-agid starting (asyncio engine)...')
+
+        self.config = config
+        # Until the event loop runs, see _serve
+        signal.signal(signal.SIGHUP, agid.sighup_handle)
+        signal.signal(signal.SIGUSR1, agid.sigusr1_handle)
+
+        self.database = agid.Database.from_config(self.config)
+        self.setup()
+
+        max_workers = int(self.config['max_workers'])
+        logger.debug("max_workers: %d", max_workers)
+        # Synchronous handlers are run on a bounded executor instead of a
+        # thread per connection
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='agid-worker'
+        )
+        self._loop: asyncio.AbstractEventLoop = None  # type: ignore[assignment]
+        self._connections: set[asyncio.Task] = set()
+        self._stopping: asyncio.Event | None = None
+        # stop() may be called before the event loop runs, e.g. on SIGTERM
+        # during the warm-up
+        self._stop_requested = False
+
+        # On SIGTERM, no new request is accepted and the in-flight ones are
+        # given drain_timeout seconds to finish
+        self.drain_timeout = float(self.config['drain_timeout'])
+        logger.debug("drain_timeout: %s", self.drain_timeout)
+
+        self._activated_socket: socket.socket | None = None
+        for name, sock in systemd.listen_sockets():
+            if self._activated_socket is None and name not in agid.PRIORITIES:
+                self._activated_socket = sock
+            else:
+                logger.warning('ignoring extra socket %r from systemd', name)
+
+    def setup(self) -> None:
+        self.listen_addr = self.config["listen_address"]
+        logger.debug("listen_addr: %s", self.listen_addr)
+
+        self.listen_port = int(self.config["listen_port"])
+        logger.debug("listen_port: %d", self.listen_port)
+
+        self.request_queue_size = int(self.config["listen_backlog"])
+        logger.debug("listen_backlog: %d", self.request_queue_size)
+
+        agid.wait_for_database(self.database)
+
+    def serve_forever(self) -> None:
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def stop(self) -> None:
+        """Stops accepting requests, serve_forever returns once the in-flight
+        requests are done or after drain_timeout seconds"""
+        if self._stop_requested:
+            logger.info('stopped')
+            return
+        self._stop_requested = True
+
+        logger.info(
+            'stopping: waiting up to %ss for in-flight requests', self.drain_timeout
+        )
+        if self._loop and self._stopping:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def _serve(self) -> None:
+        self._stopping = stopping = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_signal_handler(signal.SIGHUP, agid.request_reload)
+        self._loop.add_signal_handler(signal.SIGUSR1, metrics.log_metrics)
+        self._loop.add_signal_handler(signal.SIGTERM, self.stop)
+        if self._stop_requested:
+            return
+
+        if self._activated_socket:
+            server = await asyncio.start_server(
+                self._handle_connection,
+                sock=self._activated_socket.dup(),
+                backlog=self.request_queue_size,
+            )
+        else:
+            server = await asyncio.start_server(
+                self._handle_connection,
+                self.listen_addr,
+                self.listen_port,
+                backlog=self.request_queue_size,
+                reuse_address=True,
+                reuse_port=int(self.config['processes']) > 1,
+            )
+        for sock in server.sockets:
+            logger.info('listening on %s', sock.getsockname())
+
+        try:
+            await stopping.wait()
+        finally:
+            server.close()
+
+        if self._connections:
+            _, pending = await asyncio.wait(
+                self._connections, timeout=self.drain_timeout
+            )
+            if pending:
+                logger.warning('%d requests still in progress', len(pending))
+        logger.info('stopped')
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        logger.debug("handling request")
+        task = asyncio.current_task()
+        if task:
+            self._connections.add(task)
+        try:
+            env = await AsyncFastAGI.read_agi_env(reader)
+            handler = agid._handlers.get(env.get('agi_network_script', ''))
+            if handler and handler.is_coroutine:
+                agi = AsyncFastAGI(reader, writer, self.config, env)
+                await process_request_async(agi, handler)
+            else:
+                fagi = FastAGI(
+                    _BlockingReader(reader, self._loop),  # type: ignore[arg-type]
+                    _BlockingWriter(writer, self._loop),  # type: ignore[arg-type]
+                    self.config,
+                    env=env,
+                )
+                await self._loop.run_in_executor(
+                    self._executor, agid.process_request, fagi
+                )
+        except Exception:
+            logger.exception("unexpected exception")
+        finally:
+            self._connections.discard(task)  # type: ignore[arg-type]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+async def process_request_async(agi: AsyncFastAGI, handler: agid.Handler) -> None:
+    try:
+        logger.debug("delegating request handling %r", handler.handler_name)
+        # The cursor is blocking, coroutine handlers should keep their
+        # database work short since it runs on the event loop.
+        with agid._server.database.request_cursor(
+            statement_timeout=deadline.statement_timeout, read_only=handler.read_only
+        ) as cursor:
+            await handler.handle_async(agi, cursor, agi.args)
+
+        if agid._server.config['agi_success_verbose']:
+            await agi.verbose(
+                f'AGI handler {handler.handler_name!r} successfully executed'
+            )
+        logger.debug("request successfully handled")
+    except Exception as e:
+        await send_response(agi, agid.failure_response(agi, e, handler.handler_name))
+
+
+async def send_response(agi: AsyncFastAGI, commands: agid.AGICommands) -> None:
+    for method, args in commands:
+        try:
+            await getattr(agi, method)(*args)
+        except Exception:
+            pass
@@ -0,0 +1,91 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from wazo_agid import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BulkheadFull(Exception):
+    def __init__(self, name: str) -> None:
+        super().__init__(f'bulkhead {name!r} is full')
+        self.name = name
+
+
+class Bulkhead:
+    """Limits the number of concurrent executions of the handlers sharing it,
+    so that a slow dependency only degrades those handlers."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_wait: float = 0,
+        skip_when_full: bool = False,
+    ) -> None:
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        # Best-effort handlers are skipped instead of sending the call to agi_fail
+        self.skip_when_full = skip_when_full
+
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._waiting = 0
+
+        self._rejected = metrics.counter(f'bulkhead.{name}.rejected')
+        self._wait = metrics.summary(f'bulkhead.{name}.wait')
+        metrics.gauge(f'bulkhead.{name}.in_use', lambda: self._in_use)
+        metrics.gauge(f'bulkhead.{name}.waiting', lambda: self._waiting)
+        metrics.gauge(
+            f'bulkhead.{name}.saturation', lambda: self._in_use / self.max_concurrent
+        )
+
+    @classmethod
+    def from_config(cls, name: str, config: dict[str, Any]) -> Bulkhead:
+        return cls(
+            name,
+            max_concurrent=int(config['max_concurrent']),
+            max_wait=float(config.get('max_wait', 0)),
+            skip_when_full=bool(config.get('skip_when_full', False)),
+        )
+
+    @contextmanager
+    def acquire(self, blocking: bool = True) -> Iterator[None]:
+        start = time.monotonic()
+        with self._condition:
+            if self._in_use >= self.max_concurrent:
+                if not blocking or not self.max_wait:
+                    self._reject()
+                self._waiting += 1
+                try:
+                    acquired = self._condition.wait_for(
+                        lambda: self._in_use < self.max_concurrent, self.max_wait
+                    )
+                finally:
+                    self._waiting -= 1
+                if not acquired:
+                    self._reject()
+            self._in_use += 1
+        self._wait.observe(time.monotonic() - start)
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+
+    def _reject(self) -> None:
+        self._rejected.inc()
+        logger.warning('bulkhead %r is full', self.name)
+        raise BulkheadFull(self.name)
@@ -0,0 +1,145 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Objects loaded by the handlers, kept for the other AGI requests of the same
+# call. A call is identified by the linkedid parameter of the AGI URL, e.g.
+# agi://127.0.0.1/incoming_user_set_features?linkedid=${CHANNEL(linkedid)},
+# or by the uniqueid of the channel, which Asterisk always sends.
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from wazo_agid import metrics
+
+logger = logging.getLogger(__name__)
+
+# Objects kept per call, the first ones are dropped
+MAX_ENTRIES_PER_CALL = 32
+
+
+class _CallContext:
+    __slots__ = ('expires_at', 'entries')
+
+    def __init__(self, expires_at: float) -> None:
+        self.expires_at = expires_at
+        self.entries: dict[Hashable, Any] = {}
+
+
+class CallContextStore:
+    """Objects of the calls in progress, kept for ttl seconds after the first
+    one of a call is stored. The oldest calls are dropped when more than
+    max_calls are kept."""
+
+    def __init__(self, ttl: float, max_calls: int) -> None:
+        self.ttl = ttl
+        self.max_calls = max_calls
+        self._lock = threading.Lock()
+        # In creation order, which is also the expiry order
+        self._calls: OrderedDict[str, _CallContext] = OrderedDict()
+        self._hits = metrics.counter('call_context.hits')
+        self._misses = metrics.counter('call_context.misses')
+        self._evictions = metrics.counter('call_context.evictions')
+        metrics.gauge('call_context.calls', lambda: len(self._calls))
+
+    def get(self, call_id: str, key: Hashable) -> Any | None:
+        now = time.monotonic()
+        with self._lock:
+            context = self._calls.get(call_id)
+            if context and context.expires_at <= now:
+                del self._calls[call_id]
+                context = None
+            value = context.entries.get(key) if context else None
+        if value is None:
+            self._misses.inc()
+        else:
+            self._hits.inc()
+        return value
+
+    def set(self, call_id: str, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            context = self._calls.get(call_id)
+            if context is None:
+                context = self._calls[call_id] = _CallContext(now + self.ttl)
+                while len(self._calls) > self.max_calls:
+                    self._calls.popitem(last=False)
+                    self._evictions.inc()
+            entries = context.entries
+            entries.pop(key, None)
+            entries[key] = value
+            while len(entries) > MAX_ENTRIES_PER_CALL:
+                del entries[next(iter(entries))]
+
+    def evict(self, call_id: str) -> None:
+        with self._lock:
+            if self._calls.pop(call_id, None):
+                self._evictions.inc()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _expire(self, now: float) -> None:
+        calls = self._calls
+        while calls:
+            call_id, context = next(iter(calls.items()))
+            if context.expires_at > now:
+                break
+            del calls[call_id]
+
+
+_store: CallContextStore | None = None
+
+
+def configure(config: dict[str, Any]) -> None:
+    global _store
+
+    if not config.get('enabled'):
+        _store = None
+        return
+    _store = CallContextStore(
+        float(config.get('ttl', 10)), int(config.get('max_calls', 10000))
+    )
+    logger.debug('call context: ttl %ss, max %d calls', _store.ttl, _store.max_calls)
+
+
+def enabled() -> bool:
+    return _store is not None
+
+
+def call_id(agi: Any) -> str | None:
+    return agi.params.get('linkedid') or agi.env.get('agi_uniqueid') or None
+
+
+def lookup(agi: Any, key: Hashable) -> Any | None:
+    """The object stored for the call of the request, if any"""
+    calls = _store
+    if calls is None:
+        return None
+    call = call_id(agi)
+    return calls.get(call, key) if call else None
+
+
+def store(agi: Any, key: Hashable, value: Any) -> None:
+    calls = _store
+    if calls is None:
+        return
+    call = call_id(agi)
+    if call:
+        calls.set(call, key, value)
+
+
+def evict(agi: Any) -> None:
+    """Called when the call is over, e.g. the caller hung up"""
+    calls = _store
+    if calls is None:
+        return
+    call = call_id(agi)
+    if call:
+        calls.evict(call)
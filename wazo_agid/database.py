@@ -0,0 +1,513 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import DictCursor
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from wazo_agid import metrics
+
+logger = logging.getLogger(__name__)
+
+# Idle connections are checked with a query when they were not used for this
+# many seconds, a connection closed by the server is only noticed on use
+PING_AFTER_IDLE = 30
+# Execution option of the SQLAlchemy connections sharing the transaction of
+# the request, which already has its statement timeout
+REQUEST_TRANSACTION = 'wazo_request_transaction'
+
+# The connection of the request, while SQLAlchemy wraps it
+_borrowed: ContextVar[psycopg2.extensions.connection] = ContextVar('borrowed')
+
+
+def info_from_db_uri(db_uri: str) -> dict[str, str | int]:
+    parsed_url: URL = make_url(db_uri)
+    exceptions = {'database': 'dbname', 'username': 'user'}
+    connect_args = {
+        exceptions.get(name, name): value
+        for name, value in parsed_url.translate_connect_args().items()
+    }
+    query_args = parsed_url.query
+    return dict(query_args, **connect_args)
+
+
+class PoolTimeout(Exception):
+    def __init__(self, timeout: float) -> None:
+        super().__init__(f'no database connection available after {timeout}s')
+        self.timeout = timeout
+
+
+class _PooledConnection:
+    __slots__ = ('connection', 'created_at', 'idle_since')
+
+    def __init__(self, connection: psycopg2.extensions.connection) -> None:
+        self.connection = connection
+        self.created_at = self.idle_since = time.monotonic()
+
+
+class ConnectionPool:
+    """psycopg2 connections reused by the requests. At most max_size
+    connections are open, callers wait up to timeout seconds for one to be
+    returned. Connections are closed after max_lifetime seconds, and idle ones
+    after max_idle seconds while more than min_size are open."""
+
+    def __init__(
+        self,
+        connect: Callable[[], psycopg2.extensions.connection],
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 5,
+        max_lifetime: float = 3600,
+        max_idle: float = 300,
+    ) -> None:
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+
+        self._condition = threading.Condition()
+        # Most recently used last, so that the others become idle and are closed
+        self._idle: deque[_PooledConnection] = deque()
+        self._in_use: dict[int, _PooledConnection] = {}
+        # Open, being opened or in use
+        self._size = 0
+        self._waiting = 0
+        self._pid = os.getpid()
+        # Worker processes do not share the connections of the parent process
+        pool_ref = weakref.ref(self)
+        os.register_at_fork(
+            before=functools.partial(_before_fork, pool_ref),
+            after_in_child=functools.partial(_after_fork_in_child, pool_ref),
+        )
+
+        self._created = metrics.counter('db_pool.created')
+        self._closed = metrics.counter('db_pool.closed')
+        self._timeouts = metrics.counter('db_pool.timeouts')
+        self._checkout_time = metrics.summary('db_pool.checkout')
+        metrics.gauge('db_pool.in_use', lambda: len(self._in_use))
+        metrics.gauge('db_pool.idle', lambda: len(self._idle))
+        metrics.gauge('db_pool.waiting', lambda: self._waiting)
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg2.extensions.connection]:
+        """A connection for the duration of the block. Its transaction is
+        committed when the block succeeds and rolled back otherwise."""
+        pooled = self._acquire()
+        try:
+            with pooled.connection:
+                yield pooled.connection
+        finally:
+            self._release(pooled)
+
+    def fill(self) -> None:
+        """Opens connections up to min_size"""
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = self._open()
+            except BaseException:
+                self._discard(None)
+                raise
+            self._release(pooled, checked_out=False)
+
+    def close(self) -> None:
+        """Closes the idle connections, those in use are closed when returned"""
+        with self._condition:
+            idle, self._idle = self._idle, deque()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close(pooled)
+
+    def _acquire(self) -> _PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            pooled = self._checkout(deadline)
+            if pooled is None:
+                try:
+                    pooled = self._open()
+                except BaseException:
+                    self._discard(None)
+                    raise
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                continue
+
+            with self._condition:
+                self._in_use[id(pooled)] = pooled
+            self._checkout_time.observe(time.monotonic() - start)
+            return pooled
+
+    def _checkout(self, deadline: float) -> _PooledConnection | None:
+        """An idle connection, or None when a new one must be opened"""
+        expired: list[_PooledConnection] = []
+        try:
+            with self._condition:
+                while True:
+                    expired += self._reap(time.monotonic())
+                    if self._idle:
+                        return self._idle.pop()
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts.inc()
+                        raise PoolTimeout(self.timeout)
+                    self._waiting += 1
+                    try:
+                        self._condition.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+        finally:
+            for pooled in expired:
+                self._close(pooled)
+
+    def _release(self, pooled: _PooledConnection, checked_out: bool = True) -> None:
+        connection = pooled.connection
+        now = time.monotonic()
+        with self._condition:
+            if checked_out:
+                self._in_use.pop(id(pooled), None)
+        if connection.closed or now - pooled.created_at >= self.max_lifetime:
+            self._discard(pooled)
+            return
+        if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            # e.g. the block was interrupted in the middle of a query
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                self._discard(pooled)
+                return
+
+        pooled.idle_since = now
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        connection = pooled.connection
+        now = time.monotonic()
+        if connection.closed or now - pooled.created_at >= self.max_lifetime:
+            return False
+        if now - pooled.idle_since < PING_AFTER_IDLE:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except psycopg2.Error:
+            logger.info('dropping a broken database connection')
+            return False
+        return True
+
+    def _reap(self, now: float) -> list[_PooledConnection]:
+        # Called with the lock held, the oldest idle connections are first. The
+        # connections removed are closed by the caller, without the lock.
+        idle = self._idle
+        expired = []
+        while idle and self._size > self.min_size:
+            pooled = idle[0]
+            if (
+                now - pooled.idle_since < self.max_idle
+                and now - pooled.created_at < self.max_lifetime
+            ):
+                break
+            expired.append(idle.popleft())
+            self._size -= 1
+        return expired
+
+    def _reset(self) -> None:
+        # The connections in use belong to the threads of the parent process
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self._pid = os.getpid()
+
+    def _open(self) -> _PooledConnection:
+        pooled = _PooledConnection(self._connect())
+        self._created.inc()
+        return pooled
+
+    def _discard(self, pooled: _PooledConnection | None) -> None:
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        if pooled:
+            self._close(pooled)
+
+    def _close(self, pooled: _PooledConnection) -> None:
+        self._closed.inc()
+        if os.getpid() != self._pid:
+            # Closing would end the session of the parent process
+            return
+        try:
+            pooled.connection.close()
+        except psycopg2.Error:
+            pass
+
+
+def _before_fork(pool_ref: weakref.ref[ConnectionPool]) -> None:
+    pool = pool_ref()
+    if pool:
+        pool.close()
+
+
+def _after_fork_in_child(pool_ref: weakref.ref[ConnectionPool]) -> None:
+    pool = pool_ref()
+    if pool:
+        pool._reset()
+
+
+class _BorrowingPool(NullPool):
+    """The pool of the SQLAlchemy engine wrapping the connections of the
+    requests, they are returned to the ConnectionPool by the request"""
+
+    def _close_connection(self, connection: Any, terminate: bool = False) -> None:
+        pass
+
+
+def _borrowed_connection() -> psycopg2.extensions.connection:
+    return _borrowed.get()
+
+
+def _dao_engine(db_uri: str) -> Engine:
+    return create_engine(
+        db_uri,
+        creator=_borrowed_connection,
+        poolclass=_BorrowingPool,
+        # The transaction is ended by the request
+        pool_reset_on_return=None,
+        # The types registered on the connection by the dialect would change
+        # the values returned to the cursor of the handlers, SQLAlchemy
+        # converts them itself
+        use_native_uuid=False,
+        use_native_hstore=False,
+        execution_options={REQUEST_TRANSACTION: True},
+    )
+
+
+class Database:
+    def __init__(
+        self,
+        db_uri: str,
+        share_dao_connection: bool = False,
+        read_only_autocommit: bool = False,
+        **pool_options: Any,
+    ) -> None:
+        self.connection_info = info_from_db_uri(db_uri)
+        self.pool = ConnectionPool(self._connect, **pool_options)
+        self.dao_engine = _dao_engine(db_uri) if share_dao_connection else None
+        self.read_only_autocommit = read_only_autocommit
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> Database:
+        return cls(
+            config['db_uri'],
+            share_dao_connection=bool(config.get('dao_share_connection', False)),
+            read_only_autocommit=bool(config.get('read_only_autocommit', False)),
+            min_size=int(config.get('connection_pool_min_size', 1)),
+            max_size=int(
+                config.get('connection_pool_size') or config.get('max_workers', 64)
+            ),
+            timeout=float(config.get('connection_pool_timeout', 5)),
+            max_lifetime=float(config.get('connection_pool_max_lifetime', 3600)),
+            max_idle=float(config.get('connection_pool_max_idle', 300)),
+        )
+
+    def _connect(self) -> psycopg2.extensions.connection:
+        return psycopg2.connect(**self.connection_info)
+
+    def connection(self) -> Any:
+        return self.pool.connection()
+
+    @contextmanager
+    def dao_connection(
+        self, connection: psycopg2.extensions.connection
+    ) -> Iterator[Connection | None]:
+        """Wraps connection for SQLAlchemy until the end of the block, which
+        must include its transaction. The xivo_dao sessions bound to it join
+        the transaction without ending it. None unless dao_share_connection
+        is enabled."""
+        if self.dao_engine is None:
+            yield None
+            return
+
+        token = _borrowed.set(connection)
+        try:
+            dao_connection = self.dao_engine.connect()
+        finally:
+            _borrowed.reset(token)
+        try:
+            # Emits nothing, psycopg2 begins the transaction on the first query
+            dao_connection.begin()
+            yield dao_connection
+        finally:
+            # The rollback of the transaction seen by SQLAlchemy does nothing
+            # once the request has committed it
+            dao_connection.close()
+
+    @contextmanager
+    def request_cursor(
+        self,
+        statement_timeout: Callable[[], int | None] | None = None,
+        read_only: bool = False,
+    ) -> Iterator[LazyCursor]:
+        """The cursor of a request, its connection and transaction are only
+        acquired by the first query. The queries are limited to
+        statement_timeout() milliseconds, if not None. The queries of
+        read-only requests run without transaction with read_only_autocommit."""
+        with ExitStack() as stack:
+            yield LazyCursor(
+                self, stack, statement_timeout, read_only and self.read_only_autocommit
+            )
+
+    @contextmanager
+    def transaction(
+        self, connection: psycopg2.extensions.connection, read_only: bool = False
+    ) -> DictCursor:
+        if read_only:
+            # Each query is its own transaction, neither BEGIN nor COMMIT is
+            # sent. Nothing is rolled back on error.
+            connection.autocommit = True
+            try:
+                with connection.cursor(cursor_factory=DictCursor) as cursor:
+                    yield cursor
+            finally:
+                if not connection.closed:
+                    connection.autocommit = False
+            return
+
+        try:
+            with connection.cursor(cursor_factory=DictCursor) as cursor:
+                yield cursor
+                connection.commit()
+        except psycopg2.DatabaseError:
+            logger.debug("Database error encountered. Rolling back.")
+            connection.rollback()
+            raise
+
+
+class LazyCursor:
+    """A DictCursor opened on first use, with the connection and transaction
+    of the request. The requests that do not query the database do not wait
+    for a connection of the pool."""
+
+    def __init__(
+        self,
+        database: Database,
+        stack: ExitStack,
+        statement_timeout: Callable[[], int | None] | None = None,
+        read_only: bool = False,
+    ) -> None:
+        self._database = database
+        self._stack = stack
+        self._statement_timeout = statement_timeout
+        self.read_only = read_only
+        self._cursor: DictCursor | None = None
+        self._dao_connection: Connection | None = None
+        self._session_timeout = False
+
+    @property
+    def opened(self) -> bool:
+        return self._cursor is not None
+
+    @property
+    def shares_dao_connection(self) -> bool:
+        return self._database.dao_engine is not None
+
+    @property
+    def dao_connection(self) -> Connection | None:
+        """The connection of the request wrapped for SQLAlchemy, if shared"""
+        self._open()
+        return self._dao_connection
+
+    def set_statement_timeout(self) -> None:
+        """Limits the next queries to statement_timeout(), the limit is set
+        when the cursor is opened otherwise"""
+        if self._cursor is not None:
+            self._limit_queries(self._cursor)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            # e.g. looked up by copy before __init__
+            raise AttributeError(name)
+        return getattr(self._open(), name)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._open())
+
+    def _open(self) -> DictCursor:
+        if self._cursor is None:
+            database = self._database
+            connection = self._stack.enter_context(database.connection())
+            self._dao_connection = self._stack.enter_context(
+                database.dao_connection(connection)
+            )
+            cursor = self._cursor = self._stack.enter_context(
+                database.transaction(connection, self.read_only)
+            )
+            self._limit_queries(cursor)
+        return self._cursor
+
+    def _limit_queries(self, cursor: DictCursor) -> None:
+        milliseconds = self._statement_timeout() if self._statement_timeout else None
+        if milliseconds is None:
+            return
+        # SET does not accept query parameters
+        if not self.read_only:
+            cursor.execute(f'SET LOCAL statement_timeout = {milliseconds}')
+            return
+        # Without transaction the limit is set for the session, it is reset
+        # before the connection is returned to the pool
+        cursor.execute(f'SET statement_timeout = {milliseconds}')
+        if not self._session_timeout:
+            self._session_timeout = True
+            self._stack.callback(self._reset_statement_timeout, cursor)
+
+    @staticmethod
+    def _reset_statement_timeout(cursor: DictCursor) -> None:
+        try:
+            cursor.execute('RESET statement_timeout')
+        except psycopg2.Error:
+            # The pool drops it instead of keeping the limit of the request
+            cursor.connection.close()
+
+
+class RequestSession(Session):
+    """A xivo_dao session querying through the connection of a LazyCursor,
+    which is only opened by the first query"""
+
+    def __init__(self, cursor: LazyCursor, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._cursor = cursor
+
+    def get_bind(self, *args: Any, **kwargs: Any) -> Connection | None:
+        return self._cursor.dao_connection
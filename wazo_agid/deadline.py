@@ -0,0 +1,152 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Deadline of the request being handled. Asterisk waits on the AGI socket
+# while a handler runs, the deadline bounds the time spent in SQL queries,
+# HTTP requests and AGI commands. It is also cancelled when the caller hangs
+# up. The current deadline is stored in a context variable, so that it
+# follows the request in worker threads and coroutines.
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import math
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy import event, orm, text
+
+from wazo_agid.database import REQUEST_TRANSACTION
+
+_current: contextvars.ContextVar[Deadline | None] = contextvars.ContextVar(
+    'deadline', default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, timeout: float) -> None:
+        super().__init__(f'request deadline of {timeout}s exceeded')
+        self.timeout = timeout
+
+
+class Deadline:
+    """A deadline without timeout never expires, unless it is cancelled"""
+
+    def __init__(self, timeout: float | None) -> None:
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout if timeout else math.inf
+        self.cancel_error: Exception | None = None
+
+    @property
+    def limited(self) -> bool:
+        return self.expires_at != math.inf
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def cancel(self, error: Exception) -> None:
+        """Expires the deadline now, check() then raises error"""
+        self.cancel_error = error
+        self.expires_at = time.monotonic()
+
+    def check(self) -> None:
+        if self.expired:
+            raise self.cancel_error or DeadlineExceeded(self.timeout)
+
+
+@contextmanager
+def deadline(timeout: float | None) -> Iterator[Deadline]:
+    """Sets the deadline of the current request, no time limit if timeout is
+    0 or None"""
+    request_deadline = Deadline(timeout)
+    token = _current.set(request_deadline)
+    try:
+        yield request_deadline
+    finally:
+        _current.reset(token)
+
+
+def current() -> Deadline | None:
+    return _current.get()
+
+
+def check() -> None:
+    current_deadline = _current.get()
+    if current_deadline:
+        current_deadline.check()
+
+
+def remaining() -> float | None:
+    current_deadline = _current.get()
+    return current_deadline.remaining() if current_deadline else None
+
+
+def statement_timeout() -> int | None:
+    """The remaining time of the deadline in milliseconds, None without limit"""
+    current_deadline = _current.get()
+    if not current_deadline:
+        return None
+    current_deadline.check()
+    if not current_deadline.limited:
+        return None
+    return max(1, int(current_deadline.remaining() * 1000))
+
+
+def set_statement_timeout(cursor: Any) -> None:
+    """Limits the duration of the queries of the current transaction to the
+    remaining time of the deadline"""
+    query = _statement_timeout_query()
+    if query:
+        cursor.execute(query)
+
+
+def install_session_statement_timeout() -> None:
+    """Applies set_statement_timeout() to the SQLAlchemy sessions, when they
+    begin a transaction"""
+    if not event.contains(orm.Session, 'after_begin', _after_begin):
+        event.listen(orm.Session, 'after_begin', _after_begin)
+
+
+def _after_begin(session: orm.Session, transaction: Any, connection: Any) -> None:
+    if connection.get_execution_options().get(REQUEST_TRANSACTION):
+        # Set on the cursor of the request, in the same transaction
+        return
+    query = _statement_timeout_query()
+    if query:
+        connection.execute(text(query))
+
+
+def _statement_timeout_query() -> str | None:
+    milliseconds = statement_timeout()
+    if milliseconds is None:
+        return None
+    # SET does not accept query parameters
+    return f'SET LOCAL statement_timeout = {milliseconds}'
+
+
+def limit_client_timeout(client: Any) -> None:
+    """Limits the timeout of the HTTP requests of a wazo REST client to the
+    remaining time of the deadline"""
+    new_session = client.session
+
+    @functools.wraps(new_session)
+    def session() -> Any:
+        session = new_session()
+        current_deadline = _current.get()
+        if current_deadline:
+            current_deadline.check()
+        if current_deadline and current_deadline.limited:
+            timeout = current_deadline.remaining()
+            if client.timeout:
+                timeout = min(timeout, client.timeout)
+            session.request = functools.partial(session.request, timeout=timeout)
+        return session
+
+    client.session = session
@@ -5,6 +5,7 @@ AGENT_INTERFACE = 'WAZO_AGENT_INTERFACE'
 AGENT_LOGIN_STATUS = 'WAZO_AGENT_LOGIN_STATUS'
 AGENTPREPROCESS_SUBROUTINE = 'WAZO_AGENTPREPROCESS_SUBROUTINE'
 AGENTSTATUS = 'WAZO_AGENTSTATUS'
+AGID_OVERLOAD = 'WAZO_AGID_OVERLOAD'
 AUTHORIZATION = 'WAZO_AUTHORIZATION'
 BASE_CONTEXT = 'WAZO_BASE_CONTEXT'
 BUSYENABLED = 'WAZO_BUSYENABLED'
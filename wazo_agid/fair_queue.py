@@ -0,0 +1,94 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Hashable
+from typing import Any
+
+Flow = Hashable
+
+
+class FlowPolicy:
+    """Weights and concurrency limits of the flows sharing a fair queue. A
+    limit of 0 means unlimited."""
+
+    def __init__(
+        self,
+        default_weight: float = 1,
+        default_max_concurrent: int = 0,
+        flows: dict[Flow, dict[str, Any]] | None = None,
+    ) -> None:
+        self.default_weight = default_weight
+        self.default_max_concurrent = default_max_concurrent
+        self._flows = flows or {}
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> FlowPolicy:
+        return cls(
+            default_weight=float(config.get('default_weight', 1)),
+            default_max_concurrent=int(config.get('default_max_concurrent', 0)),
+            flows=config.get('tenants') or {},
+        )
+
+    def weight(self, flow: Flow) -> float:
+        if flow is None:
+            return 1
+        options = self._flows.get(flow) or {}
+        return float(options.get('weight', self.default_weight))
+
+    def max_concurrent(self, flow: Flow) -> int:
+        if flow is None:
+            return 0
+        options = self._flows.get(flow) or {}
+        return int(options.get('max_concurrent', self.default_max_concurrent))
+
+
+class FairQueue:
+    """Weighted fair queue (start-time fair queuing): each flow gets a share
+    of the dequeues proportional to its weight, whatever the number of items
+    it enqueued. Items of the same flow are dequeued in FIFO order."""
+
+    def __init__(self) -> None:
+        self._flows: dict[Flow, deque[tuple[float, float, Any]]] = {}
+        self._finish_tags: dict[Flow, float] = {}
+        self._virtual_time = 0.0
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, item: Any, flow: Flow = None, weight: float = 1) -> None:
+        start = max(self._virtual_time, self._finish_tags.get(flow, 0.0))
+        finish = start + 1 / weight
+        self._finish_tags[flow] = finish
+        self._flows.setdefault(flow, deque()).append((start, finish, item))
+        self._length += 1
+
+    def pop(
+        self, is_eligible: Callable[[Flow], bool] | None = None
+    ) -> tuple[Flow, Any] | None:
+        selected = None
+        selected_finish = 0.0
+        for flow, items in self._flows.items():
+            if is_eligible and not is_eligible(flow):
+                continue
+            finish = items[0][1]
+            if selected is None or finish < selected_finish:
+                selected, selected_finish = (flow,), finish
+
+        if selected is None:
+            return None
+
+        flow = selected[0]
+        items = self._flows[flow]
+        start, _, item = items.popleft()
+        self._length -= 1
+        self._virtual_time = max(self._virtual_time, start)
+        if not items:
+            del self._flows[flow]
+            # An idle flow does not keep credit from the past
+            if self._finish_tags[flow] <= self._virtual_time:
+                del self._finish_tags[flow]
+        return flow, item
@@ -15,10 +15,16 @@
 
 from __future__ import annotations
 
+import asyncio
 import pprint
 import re
+from collections.abc import Callable, Iterable, Mapping
 from io import BufferedIOBase
 from typing import TYPE_CHECKING, Any, NoReturn
+from urllib.parse import parse_qsl, unquote
+
+from wazo_agid import deadline
+from wazo_agid.variable_cache import VariableCache
 
 if TYPE_CHECKING:
     from typing import Literal
@@ -29,9 +35,32 @@ ResultDict = dict[str, tuple[str, str]]
 
 DEFAULT_TIMEOUT = 2000  # 2sec timeout used as default for functions that take timeouts
 DEFAULT_RECORD = 20000  # 20sec record time
+# Deferred commands are flushed when there are that many waiting
+MAX_DEFERRED_COMMANDS = 64
+# Maximum length of the expression read by get_variables() in one command,
+# Asterisk reads AGI commands of up to 2048 bytes
+MAX_VARIABLES_EXPRESSION = 1024
+# The values read by get_variables() are URI encoded, which escapes the
+# separator and the end marker
+_VARIABLES_SEPARATOR = ','
+_VARIABLES_END = ';'
+# Maximum length of the arguments of an MSet command sent by set_variables()
+MAX_MSET_ARGUMENTS = 1024
+# Maximum number of variables set by an MSet command, Asterisk ignores the
+# following ones
+MAX_MSET_PAIRS = 99
+# Characters escaped in the MSet arguments: the argument separator, and the
+# quotes, parentheses and backslashes interpreted by Asterisk when it splits
+# the arguments
+_MSET_ESCAPED = re.compile(r'([\\,"()\[\]|])')
 
 re_code = re.compile(r'(^\d*)\s*(.*)')
 re_kv = re.compile(r'(?P<key>\w+)=(?P<value>[^\s]+)\s*(?:\((?P<data>.*)\))*')
+# The blank line ending the AGI environment
+re_env_end = re.compile(rb'\n[ \t\r\f\v]*\n')
+re_env_empty = re.compile(rb'[ \t\r\f\v]*\n')
+# Most responses are parsed without the regular expressions above
+_RESULT_PREFIX = b'200 result='
 
 __all__ = [
     'FastAGIException',
@@ -45,6 +74,7 @@ __all__ = [
     'FastAGIUsageError',
     'FastAGIInvalidCommand',
     'FastAGI',
+    'AsyncFastAGI',
 ]
 
 
@@ -103,47 +133,100 @@ class FastAGI:
     """
 
     def __init__(
-        self, inf: BufferedIOBase, outf: BufferedIOBase, config: dict[str, Any]
+        self,
+        inf: BufferedIOBase,
+        outf: BufferedIOBase,
+        config: dict[str, Any],
+        env: dict[str, str] | None = None,
     ) -> None:
         self.inf = inf
         self.outf = outf
         self.config = config
 
         self._got_sighup = False
-        self.env: dict[str, str] = {}
-        self._get_agi_env()
-        self.args: list[str] = []
-        self._get_agi_args()
+        # Watched by the hangup monitor: data received while no command is
+        # in progress is a hangup notification
+        self.in_command = False
+        self.commands = 0
+        self.hungup = False
+        self.hangup_callback: Callable[[], None] | None = None
+
+        # In pipelined mode, the commands whose result is not used are written
+        # with the next command and their responses are read after
+        self.pipelined = bool(config.get('agi_pipelining', False))
+        self._deferred: list[str] = []
+        self._write_buffer: list[bytes] = []
+        # With coalesced writes, the variables set are sent with MSet before
+        # the next command, or by flush()
+        self.coalesce_writes = bool(config.get('agi_coalesce_writes', False))
+        self._pending_writes: dict[str, str | int] = {}
+        # The channel variables read or set by the handler
+        self.variable_cache = (
+            VariableCache() if config.get('agi_variable_cache', False) else None
+        )
+        if env is None:
+            self.env = {}
+            self._get_agi_env()
+        else:
+            # the environment has already been read from the stream
+            self.env = env
+        self.args: list[str] = self._get_agi_args(self.env)
+        self.params: dict[str, str] = self._get_agi_params(self.env)
 
     def _get_agi_env(self) -> None:
-        while 1:
-            line = self.inf.readline().strip().decode('utf8')
-            if line == '':
-                # blank line signals end
-                break
-            key_data = line.split(':', 1)
-            key = key_data[0].strip()
+        block = _read_env_block(self.inf)
+        if block is None:
+            lines = []
+            while 1:
+                line = self.inf.readline()
+                if not line.strip():
+                    # blank line signals end
+                    break
+                lines.append(line)
+            block = b''.join(lines)
+        self._parse_env_block(self.env, block)
+
+    @staticmethod
+    def _parse_env_block(env: dict[str, str], block: bytes) -> None:
+        # Decoded once, the only blank line of the block is the last one
+        for line in block.decode('utf8').split('\n'):
+            key, _, value = line.partition(':')
+            key = key.strip()
             if key:
-                if len(key_data) > 1:
-                    self.env[key] = key_data[1].strip()
-                else:
-                    self.env[key] = ""
+                env[key] = value.strip()
 
-    def _get_agi_args(self) -> None:
+    @staticmethod
+    def _get_agi_args(env: dict[str, str]) -> list[str]:
+        args = []
         i = 1
-        while f"agi_arg_{i:d}" in self.env:
-            self.args.append(self.env[f"agi_arg_{i:d}"])
+        while f"agi_arg_{i:d}" in env:
+            args.append(env[f"agi_arg_{i:d}"])
             i += 1
+        return args
 
     @staticmethod
-    def _quote(string: str | int | bytes | None) -> str:
+    def _get_agi_params(env: dict[str, str]) -> dict[str, str]:
+        # Parameters of the AGI URL, e.g. agi://host/handler?tenant_uuid=...,
+        # are removed from the script name
+        script, _, query = env.get('agi_network_script', '').partition('?')
+        if not query:
+            return {}
+        env['agi_network_script'] = script
+        return dict(parse_qsl(query))
+
+    @staticmethod
+    def _to_str(string: str | int | bytes | None) -> str:
         if string is None:
-            string = ''
+            return ''
         elif isinstance(string, bytes):
-            string = string.decode('utf8')
+            return string.decode('utf8')
         elif not isinstance(string, str):
-            string = str(string)
+            return str(string)
+        return string
 
+    @staticmethod
+    def _quote(string: str | int | bytes | None) -> str:
+        string = FastAGI._to_str(string)
         return '"{}"'.format(
             string.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
         )
@@ -155,22 +238,104 @@ class FastAGI:
         )
 
     def execute(self, command: str, *args: str | int) -> ResultDict:
+        deadline.check()
+        if self._pending_writes:
+            self._send_pending_writes()
+        self.in_command = True
         try:
             self.send_command(command, *args)
-            return self.get_result()
+            error = self._read_deferred_results()
+            try:
+                result = self.get_result()
+            except FastAGIException:
+                if error:
+                    raise error
+                raise
+            if error:
+                raise error
+            return result
         except OSError as e:
             if e.errno == 32:
                 # Broken Pipe * let us go
                 raise FastAGISIGPIPEHangup("Received SIGPIPE")
             else:
                 raise
+        finally:
+            self.in_command = False
+            self.commands += 1
+
+    def execute_deferred(self, command: str, *args: str | int) -> None:
+        """Executes a command whose result is not used. In pipelined mode, it is
+        sent with the next command, or by flush(), and its response is checked
+        then."""
+        if not self.pipelined:
+            self.execute(command, *args)
+            return
+
+        deadline.check()
+        self._write_buffer.append(self._format_command(command, *args))
+        self._deferred.append(command)
+        if len(self._deferred) >= MAX_DEFERRED_COMMANDS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Sends the deferred commands and checks their responses"""
+        if self._pending_writes:
+            self._send_pending_writes()
+        if not self._deferred:
+            return
+
+        self.in_command = True
+        try:
+            self.send_command('')
+            error = self._read_deferred_results()
+        except OSError as e:
+            if e.errno == 32:
+                raise FastAGISIGPIPEHangup("Received SIGPIPE")
+            raise
+        finally:
+            self.in_command = False
+            self.commands += 1
+        if error:
+            raise error
+
+    def _read_deferred_results(self) -> FastAGIException | None:
+        # All the responses are read, so that the next command reads its own
+        # response, and the first error is returned
+        deferred, self._deferred = self._deferred, []
+        first_error = None
+        for command in deferred:
+            try:
+                self.get_result()
+            except FastAGIException as e:
+                e.add_note(f'in response to the deferred command {command!r}')
+                first_error = first_error or e
+        return first_error
+
+    def notify_hangup(self) -> None:
+        """Called when the caller hung up while a handler is running"""
+        self.hungup = True
+        callback = self.hangup_callback
+        if callback:
+            callback()
 
     def send_command(self, command: str, *args: str | int) -> None:
-        """Send a command to Asterisk"""
-        command = ' '.join([command.strip()] + list(map(str, args))).strip() + "\n"
-        self.outf.write(command.encode('utf8'))
+        """Send a command to Asterisk, with the deferred commands if any"""
+        if self._write_buffer:
+            if command:
+                self._write_buffer.append(self._format_command(command, *args))
+            data = b''.join(self._write_buffer)
+            self._write_buffer = []
+        else:
+            data = self._format_command(command, *args)
+        self.outf.write(data)
         self.outf.flush()
 
+    @staticmethod
+    def _format_command(command: str, *args: str | int) -> bytes:
+        command = ' '.join([command.strip()] + list(map(str, args))).strip() + "\n"
+        return command.encode('utf8')
+
     def fail(self) -> None:
         """Force Asterisk to change the result state of the AGI to
         AGI_RESULT_FAILURE so that it will abort the AGI.
@@ -185,15 +350,35 @@ class FastAGI:
 
     def get_result(self) -> ResultDict:
         """Read the result of a command from Asterisk"""
+        raw_line = self.inf.readline()
+        result = _parse_result_line(raw_line)
+        if result is not None:
+            return result
+        line = raw_line.strip().decode('utf8')
+        code, response = self._parse_response(line)
+        if code == 520:
+            usage = [line]
+            line = self.inf.readline().strip().decode('utf8')
+            while line[:3] != '520':
+                usage.append(line)
+                line = self.inf.readline().strip().decode('utf8')
+            usage.append(line)
+            raise FastAGIUsageError('{}\n'.format('\n'.join(usage)))
+        return self._parse_result(code, response)
+
+    @staticmethod
+    def _parse_response(line: str) -> tuple[int, str]:
         code = 0
         response = ''
-        result = {'result': ('', '')}
-        line = self.inf.readline().strip().decode('utf8')
         m = re_code.search(line)
         if m:
             code = int(m.group(1))
             response = m.group(2)
+        return code, response
 
+    @staticmethod
+    def _parse_result(code: int, response: str) -> ResultDict:
+        result = {'result': ('', '')}
         if code == 200:
             for key, value, data in re_kv.findall(response):
                 result[key] = (value, data)
@@ -207,14 +392,6 @@ class FastAGI:
             return result
         if code == 510:
             raise FastAGIInvalidCommand(response)
-        if code == 520:
-            usage = [line]
-            line = self.inf.readline().strip().decode('utf8')
-            while line[:3] != '520':
-                usage.append(line)
-                line = self.inf.readline().strip().decode('utf8')
-            usage.append(line)
-            raise FastAGIUsageError('{}\n'.format('\n'.join(usage)))
 
         raise FastAGIUnknownError(code, 'Unhandled code or undefined response')
 
@@ -528,6 +705,8 @@ class FastAGI:
         Returns whatever the application returns, or -2 on failure to find
         application
         """
+        if self.variable_cache:
+            self.variable_cache.clear()
         result = self.execute('EXEC', application, self._quote(options))
         res = result['result'][0]
         if res == '-2':
@@ -538,6 +717,8 @@ class FastAGI:
         """
         Changes the caller id of the current channel.
         """
+        if self.variable_cache:
+            self.variable_cache.write('CALLERID(num)', number)
         self.execute('SET CALLERID', self._quote(number))
 
     def channel_status(self, channel: str = '') -> int:
@@ -566,7 +747,49 @@ class FastAGI:
 
     def set_variable(self, name: str, value: str | int) -> None:
         """Set a channel variable."""
-        self.execute('SET VARIABLE', self._quote(name), self._quote(value))
+        if self.variable_cache:
+            self.variable_cache.write(name, self._to_str(value).replace('\n', ' '))
+        if self.coalesce_writes and _is_mset_variable(name):
+            # Moved last, the variables are set in the order of the last writes
+            self._pending_writes.pop(name, None)
+            self._pending_writes[name] = value
+            if len(self._pending_writes) >= MAX_DEFERRED_COMMANDS:
+                self._send_pending_writes()
+            return
+        if self._pending_writes:
+            self._send_pending_writes()
+        self.execute_deferred('SET VARIABLE', self._quote(name), self._quote(value))
+
+    def set_variables(self, variables: Mapping[str, str | int]) -> None:
+        """Set several channel variables, in as few commands as possible.
+
+        The variables are set in order by MSet commands. The dialplan functions
+        (e.g. CHANNEL(...) or CALLERID(...)) and the values that MSet cannot
+        set unchanged are set with SET VARIABLE.
+        """
+        if self.coalesce_writes:
+            for name, value in variables.items():
+                self.set_variable(name, value)
+            return
+        if self.variable_cache:
+            for name, value in variables.items():
+                self.variable_cache.write(name, self._to_str(value).replace('\n', ' '))
+        if self._pending_writes:
+            self._send_pending_writes()
+        self._set_variables(variables)
+
+    def _send_pending_writes(self) -> None:
+        variables, self._pending_writes = self._pending_writes, {}
+        self._set_variables(variables)
+
+    def _set_variables(self, variables: Mapping[str, str | int]) -> None:
+        for name, value in _set_variables_commands(variables):
+            if name is None:
+                self.execute_deferred('EXEC', 'MSet', self._quote(value))
+            else:
+                self.execute_deferred(
+                    'SET VARIABLE', self._quote(name), self._quote(value)
+                )
 
     def get_variable(self, name: str) -> str:
         """Get a channel variable.
@@ -574,12 +797,20 @@ class FastAGI:
         This function returns the value of the indicated channel variable.  If
         the variable is not set, an empty string is returned.
         """
+        if self.variable_cache:
+            value = self.variable_cache.get(name)
+            if value is not None:
+                return value
+
         try:
             result = self.execute('GET VARIABLE', self._quote(name))
         except FastAGIResultHangup:
-            result = {'result': ('1', 'hangup')}
+            return 'hangup'
 
-        return result['result'][1]
+        value = result['result'][1]
+        if self.variable_cache:
+            self.variable_cache.store(name, value)
+        return value
 
     def get_full_variable(self, name: str, channel: str | None = None):
         """Get a channel variable.
@@ -599,6 +830,36 @@ class FastAGI:
 
         return result['result'][1]
 
+    def get_variables(self, names: Iterable[str]) -> dict[str, str]:
+        """Get several channel variables in one command.
+
+        The values are URI encoded by Asterisk and joined with a separator
+        that the encoding escapes. Unset variables are empty strings, as with
+        get_variable().
+        """
+        names = list(names)
+        values = {}
+        if self.variable_cache:
+            for name in names:
+                value = self.variable_cache.get(name)
+                if value is not None:
+                    values[name] = value
+        for batch in _variables_batches(n for n in names if n not in values):
+            expression = _variables_expression(batch)
+            try:
+                result = self.execute('GET FULL VARIABLE', self._quote(expression))
+            except FastAGIResultHangup:
+                return {name: 'hangup' for name in names}
+            batch_values = _split_variables(result['result'][1], len(batch))
+            if batch_values is None:
+                # Truncated by Asterisk, the values are too long
+                batch_values = [self.get_variable(name) for name in batch]
+            values.update(zip(batch, batch_values))
+            if self.variable_cache:
+                for name, value in zip(batch, batch_values):
+                    self.variable_cache.store(name, value)
+        return {name: values[name] for name in names}
+
     def verbose(self, message: str | Exception, level: int = 1) -> None:
         """
         Sends <message> to the console via verbose message system.
@@ -606,7 +867,7 @@ class FastAGI:
         """
         if isinstance(message, Exception):
             message = str(message)
-        self.execute('VERBOSE', self._quote(message), level)
+        self.execute_deferred('VERBOSE', self._quote(message), level)
 
     def database_get(self, family: str, key: str) -> str:
         """
@@ -670,3 +931,309 @@ class FastAGI:
         Does nothing
         """
         self.execute('NOOP')
+
+
+class AsyncFastAGI:
+    """
+    asyncio variant of FastAGI, used by coroutine handlers.
+    It speaks the same protocol and raises the same exceptions as FastAGI but
+    only exposes the subset of commands used by the handlers.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        config: dict[str, Any],
+        env: dict[str, str],
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.config = config
+        self.env = env
+        self.args = FastAGI._get_agi_args(env)
+        self.params = FastAGI._get_agi_params(env)
+
+    @classmethod
+    async def from_stream(
+        cls,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        config: dict[str, Any],
+    ) -> AsyncFastAGI:
+        env = await cls.read_agi_env(reader)
+        return cls(reader, writer, config, env)
+
+    @staticmethod
+    async def read_agi_env(reader: asyncio.StreamReader) -> dict[str, str]:
+        env: dict[str, str] = {}
+        lines = []
+        while 1:
+            line = await reader.readline()
+            if not line.strip():
+                # blank line signals end
+                break
+            lines.append(line)
+        FastAGI._parse_env_block(env, b''.join(lines))
+        return env
+
+    dp_break = staticmethod(FastAGI.dp_break)
+    _quote = staticmethod(FastAGI._quote)
+
+    async def execute(self, command: str, *args: str | int) -> ResultDict:
+        deadline.check()
+        try:
+            await self.send_command(command, *args)
+            return await self.get_result()
+        except OSError as e:
+            if e.errno == 32:
+                # Broken Pipe * let us go
+                raise FastAGISIGPIPEHangup("Received SIGPIPE")
+            else:
+                raise
+
+    async def send_command(self, command: str, *args: str | int) -> None:
+        """Send a command to Asterisk"""
+        self.writer.write(FastAGI._format_command(command, *args))
+        await self.writer.drain()
+
+    async def fail(self) -> None:
+        """See FastAGI.fail"""
+        try:
+            await self.send_command("failure to have pure code")
+        except OSError as e:
+            if e.errno != 32:
+                raise
+
+    async def get_result(self) -> ResultDict:
+        """Read the result of a command from Asterisk"""
+        raw_line = await self.reader.readline()
+        result = _parse_result_line(raw_line)
+        if result is not None:
+            return result
+        line = raw_line.strip().decode('utf8')
+        code, response = FastAGI._parse_response(line)
+        if code == 520:
+            usage = [line]
+            line = (await self.reader.readline()).strip().decode('utf8')
+            while line[:3] != '520':
+                usage.append(line)
+                line = (await self.reader.readline()).strip().decode('utf8')
+            usage.append(line)
+            raise FastAGIUsageError('{}\n'.format('\n'.join(usage)))
+        return FastAGI._parse_result(code, response)
+
+    async def answer(self) -> None:
+        await self.execute('ANSWER')
+
+    async def hangup(self, channel: str = '') -> None:
+        await self.execute('HANGUP', channel)
+
+    async def appexec(self, application: str, options: str = '') -> str:
+        result = await self.execute('EXEC', application, self._quote(options))
+        res = result['result'][0]
+        if res == '-2':
+            raise FastAGIAppError(f'Unable to find application: {application}')
+        return res
+
+    async def set_variable(self, name: str, value: str | int) -> None:
+        """Set a channel variable."""
+        await self.execute('SET VARIABLE', self._quote(name), self._quote(value))
+
+    async def set_variables(self, variables: Mapping[str, str | int]) -> None:
+        """Set several channel variables, see FastAGI.set_variables"""
+        for name, value in _set_variables_commands(variables):
+            if name is None:
+                await self.execute('EXEC', 'MSet', self._quote(value))
+            else:
+                await self.execute(
+                    'SET VARIABLE', self._quote(name), self._quote(value)
+                )
+
+    async def get_variable(self, name: str) -> str:
+        """Get a channel variable, see FastAGI.get_variable"""
+        try:
+            result = await self.execute('GET VARIABLE', self._quote(name))
+        except FastAGIResultHangup:
+            result = {'result': ('1', 'hangup')}
+
+        return result['result'][1]
+
+    async def get_full_variable(self, name: str, channel: str | None = None) -> str:
+        """Get a channel variable, see FastAGI.get_full_variable"""
+        args = [self._quote(name)]
+        if channel:
+            args.append(self._quote(channel))
+        try:
+            result = await self.execute('GET FULL VARIABLE', *args)
+        except FastAGIResultHangup:
+            result = {'result': ('1', 'hangup')}
+
+        return result['result'][1]
+
+    async def get_variables(self, names: Iterable[str]) -> dict[str, str]:
+        """Get several channel variables, see FastAGI.get_variables"""
+        names = list(names)
+        values = {}
+        for batch in _variables_batches(names):
+            expression = _variables_expression(batch)
+            try:
+                result = await self.execute(
+                    'GET FULL VARIABLE', self._quote(expression)
+                )
+            except FastAGIResultHangup:
+                return {name: 'hangup' for name in names}
+            batch_values = _split_variables(result['result'][1], len(batch))
+            if batch_values is None:
+                batch_values = [await self.get_variable(name) for name in batch]
+            values.update(zip(batch, batch_values))
+        return values
+
+    async def verbose(self, message: str | Exception, level: int = 1) -> None:
+        if isinstance(message, Exception):
+            message = str(message)
+        await self.execute('VERBOSE', self._quote(message), level)
+
+    async def noop(self) -> None:
+        await self.execute('NOOP')
+
+
+def _variables_batches(names: Iterable[str]) -> list[list[str]]:
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    length = 0
+    for name in dict.fromkeys(names):
+        name_length = len(_variable_expression(name)) + 1
+        if batch and length + name_length > MAX_VARIABLES_EXPRESSION:
+            batches.append(batch)
+            batch, length = [], 0
+        batch.append(name)
+        length += name_length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _variable_expression(name: str) -> str:
+    return f'${{URIENCODE(${{{name}}})}}'
+
+
+def _variables_expression(names: list[str]) -> str:
+    expressions = _VARIABLES_SEPARATOR.join(_variable_expression(n) for n in names)
+    return f'{expressions}{_VARIABLES_END}'
+
+
+def _split_variables(data: str, count: int) -> list[str] | None:
+    if not data.endswith(_VARIABLES_END):
+        return None
+    values = data[: -len(_VARIABLES_END)].split(_VARIABLES_SEPARATOR)
+    if len(values) != count:
+        return None
+    return [unquote(value) for value in values]
+
+
+def _is_mset_variable(name: str) -> bool:
+    # Dialplan functions are written with SET VARIABLE
+    return bool(name) and '(' not in name and '=' not in name
+
+
+def _mset_argument(name: str, value: str | int | bytes | None) -> str | None:
+    """The escaped MSet argument setting name to value, None if the variable
+    must be set with SET VARIABLE"""
+    if not _is_mset_variable(name):
+        return None
+    value = FastAGI._to_str(value)
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        # MSet strips the quotes around the value
+        return None
+    argument = '{}={}'.format(
+        _MSET_ESCAPED.sub(r'\\\1', name), _MSET_ESCAPED.sub(r'\\\1', value)
+    )
+    if len(argument) > MAX_MSET_ARGUMENTS:
+        return None
+    return argument
+
+
+def _set_variables_commands(
+    variables: Mapping[str, str | int],
+) -> list[tuple[str | None, str | int]]:
+    """The commands setting the variables in order, (None, MSet arguments) or
+    (name, value) for SET VARIABLE"""
+    commands: list[tuple[str | None, str | int]] = []
+    batch: list[tuple[str, str | int, str]] = []
+    for name, value in variables.items():
+        argument = _mset_argument(name, value)
+        batch_length = sum(len(a) + 1 for _, _, a in batch)
+        if batch and (
+            argument is None
+            or batch_length + len(argument) > MAX_MSET_ARGUMENTS
+            or len(batch) >= MAX_MSET_PAIRS
+        ):
+            commands.append(_batch_command(batch))
+            batch = []
+        if argument is None:
+            commands.append((name, value))
+        else:
+            batch.append((name, value, argument))
+    if batch:
+        commands.append(_batch_command(batch))
+    return commands
+
+
+def _batch_command(
+    batch: list[tuple[str, str | int, str]],
+) -> tuple[str | None, str | int]:
+    if len(batch) == 1:
+        name, value, _ = batch[0]
+        return name, value
+    return None, ','.join(argument for _, _, argument in batch)
+
+
+def _read_env_block(inf: BufferedIOBase) -> bytes | None:
+    """Reads the AGI environment up to the blank line, from the buffer of the
+    stream instead of line by line. None if the stream cannot be peeked."""
+    peek = getattr(inf, 'peek', None)
+    if peek is None:
+        return None
+    block = b''
+    while True:
+        chunk = peek()
+        if not chunk:
+            # end of stream
+            return block
+        data = block + chunk
+        newline = block.rfind(b'\n')
+        if newline < 0:
+            # the blank line may be the first one
+            match = re_env_empty.match(data) or re_env_end.search(data)
+        else:
+            match = re_env_end.search(data, newline)
+        if match:
+            # The data after the blank line stays in the buffer
+            inf.read(match.end() - len(block))
+            return data[: match.end()]
+        inf.read(len(chunk))
+        block = data
+
+
+def _parse_result_line(line: bytes) -> ResultDict | None:
+    """Parses the '200 result=N' and '200 result=N (data)' responses, None for
+    the others, which are parsed with the regular expressions"""
+    if not line.startswith(_RESULT_PREFIX):
+        return None
+    line = line.rstrip()
+    value, _, rest = line[len(_RESULT_PREFIX) :].partition(b' ')
+    if not value.lstrip(b'-').isdigit():
+        return None
+    if not rest:
+        data = ''
+    elif rest[:1] == b'(' and rest[-1:] == b')':
+        data = rest[1:-1].decode('utf8')
+        # If user hangs up... we get 'hangup' in the data
+        if data == 'hangup':
+            raise FastAGIResultHangup("User hungup during execution")
+    else:
+        return None
+    if value == b'-1':
+        raise FastAGIAppError("Error executing application, or hangup")
+    return {'result': (value.decode(), data)}
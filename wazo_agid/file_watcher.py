@@ -0,0 +1,209 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from collections.abc import Callable
+
+from wazo_agid import metrics
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], None]
+
+# See inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+)
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Editors and config generators often write a file in several steps
+DEBOUNCE_DELAY = 0.2
+
+
+class _Inotify:
+    def __init__(self) -> None:
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read_events(self) -> list[tuple[int, str]]:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher(threading.Thread):
+    """Calls the callbacks of a file when it changes. Changes are detected with
+    inotify when available, by polling the file status otherwise."""
+
+    def __init__(
+        self,
+        files: dict[str, list[Callback]],
+        poll_interval: float = 5,
+        use_inotify: bool = True,
+    ) -> None:
+        super().__init__(name='file-watcher', daemon=True)
+        self._files = {os.path.abspath(path): list(cbs) for path, cbs in files.items()}
+        self._poll_interval = poll_interval
+        self._use_inotify = use_inotify
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._added = list(self._files)
+        self._pending: dict[str, float] = {}
+        self._reloads = metrics.counter('file_watcher.reloads')
+        self._errors = metrics.counter('file_watcher.errors')
+
+    def watch(self, path: str, callback: Callback) -> None:
+        """Watches a file once the watcher is running, e.g. for a module imported
+        on first use. The file is watched within poll_interval."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self._files:
+                self._added.append(path)
+            self._files.setdefault(path, []).append(callback)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def run(self) -> None:
+        inotify = None
+        if self._use_inotify:
+            try:
+                inotify = _Inotify()
+            except (OSError, AttributeError):
+                logger.info('inotify is not available, polling watched files')
+
+        # Directories are watched, files are often replaced by a rename
+        watches: dict[int, str] = {}
+        # Files that are not watched by inotify are polled
+        statuses: dict[str, tuple | None] = {}
+        try:
+            while not self._stopped.is_set():
+                self._add_watches(inotify, watches, statuses)
+                if inotify:
+                    self._read_events(inotify, watches, statuses)
+                elif self._stopped.wait(self._timeout()):
+                    break
+                self._poll(statuses)
+                self._fire_pending()
+        finally:
+            if inotify:
+                inotify.close()
+
+    def _add_watches(
+        self,
+        inotify: _Inotify | None,
+        watches: dict[int, str],
+        statuses: dict[str, tuple | None],
+    ) -> None:
+        with self._lock:
+            added, self._added = self._added, []
+
+        for path in added:
+            if inotify:
+                directory = os.path.dirname(path)
+                try:
+                    watches[inotify.add_watch(directory, IN_WATCH_MASK)] = directory
+                    continue
+                except OSError as e:
+                    logger.warning('cannot watch %s (%s), polling it instead', path, e)
+            statuses[path] = self._status(path)
+
+    def _read_events(
+        self,
+        inotify: _Inotify,
+        watches: dict[int, str],
+        statuses: dict[str, tuple | None],
+    ) -> None:
+        readable, _, _ = select.select([inotify.fd], [], [], self._timeout())
+        if not readable:
+            return
+        for wd, name in inotify.read_events():
+            directory = watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name)
+            if path in self._files and path not in statuses:
+                self._pending[path] = time.monotonic() + DEBOUNCE_DELAY
+
+    def _timeout(self) -> float:
+        if self._pending:
+            return max(0, min(self._pending.values()) - time.monotonic())
+        return self._poll_interval
+
+    def _poll(self, statuses: dict[str, tuple | None]) -> None:
+        for path, previous in statuses.items():
+            status = self._status(path)
+            if status != previous:
+                statuses[path] = status
+                self._pending[path] = time.monotonic() + DEBOUNCE_DELAY
+
+    @staticmethod
+    def _status(path: str) -> tuple | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _fire_pending(self) -> None:
+        now = time.monotonic()
+        for path, deadline in list(self._pending.items()):
+            if deadline > now:
+                continue
+            del self._pending[path]
+            if not os.path.exists(path):
+                logger.warning('%s was removed, keeping its last configuration', path)
+                continue
+
+            logger.info('%s changed, reloading', path)
+            with self._lock:
+                callbacks = list(self._files[path])
+            for callback in callbacks:
+                try:
+                    callback()
+                    self._reloads.inc()
+                except Exception:
+                    self._errors.inc()
+                    logger.exception(
+                        'failed to reload %s, keeping the last valid configuration',
+                        path,
+                    )
@@ -46,7 +46,7 @@ class OutgoingFeatures(Handler):
 
     def _retrieve_tenant(self) -> None:
         if self._tenant_uuid:
-            self.tenant = objects.Tenant(self._agi, self._cursor, self._tenant_uuid)
+            self.tenant = objects.get_tenant(self._agi, self._cursor, self._tenant_uuid)
 
     def _set_call_record_side(self) -> None:
         self._agi.set_variable('WAZO_CALL_RECORD_SIDE', 'caller')
@@ -64,7 +64,7 @@ class OutgoingFeatures(Handler):
                 userid = self.useruuid
             else:
                 userid = int(self.userid)
-            self.user = objects.User(self._agi, self._cursor, userid)
+            self.user = objects.get_user(self._agi, self._cursor, userid)
             if self.user.enablexfer:
                 self.options += 'T'
 
@@ -152,34 +152,35 @@ class OutgoingFeatures(Handler):
             )
 
     def _set_trunk_info(self) -> None:
+        variables: dict[str, str] = {}
         for i, trunk in enumerate(self.outcall.trunks):
-            self._agi.set_variable(
-                f'{dv.OUTGOING_CALLER_ID_FORMAT}{i:d}',
-                trunk.outgoing_caller_id_format,
+            variables[f'{dv.OUTGOING_CALLER_ID_FORMAT}{i:d}'] = (
+                trunk.outgoing_caller_id_format
             )
             if trunk.interface.startswith('PJSIP'):
                 name = trunk.interface.replace('PJSIP/', '')
                 exten = f'{self.dstnum}@{name}'
-                self._agi.set_variable(f'{dv.INTERFACE}{i:d}', 'PJSIP')
-                self._agi.set_variable(f'{dv.TRUNK_EXTEN}{i:d}', exten)
-                self._agi.set_variable(f'{dv.TRUNK_INTERFACE}{i:d}', name)
+                variables[f'{dv.INTERFACE}{i:d}'] = 'PJSIP'
+                variables[f'{dv.TRUNK_EXTEN}{i:d}'] = exten
+                variables[f'{dv.TRUNK_INTERFACE}{i:d}'] = name
                 trunk_uri = self._agi.get_variable('PJSIP_HEADER(read,To)')
                 if trunk_uri:
                     trunk_uri = trunk_uri[trunk_uri.index("<") :]
                     trunk_host = self._agi.get_variable(
                         f'PJSIP_PARSE_URI({trunk_uri},host)'
                     )
-                    self._agi.set_variable(f'__{dv.TRUNK_HOST}', trunk_host)
+                    variables[f'__{dv.TRUNK_HOST}'] = trunk_host
                 else:
                     self._agi.verbose("Could not read To header")
             else:
-                self._agi.set_variable(f'{dv.INTERFACE}{i:d}', trunk.interface)
-                self._agi.set_variable(f'{dv.TRUNK_EXTEN}{i:d}', self.dstnum)
+                variables[f'{dv.INTERFACE}{i:d}'] = trunk.interface
+                variables[f'{dv.TRUNK_EXTEN}{i:d}'] = self.dstnum
             if trunk.intfsuffix:
                 intfsuffix = trunk.intfsuffix
             else:
                 intfsuffix = ""
-            self._agi.set_variable(f'{dv.TRUNK_SUFFIX}{i:d}', intfsuffix)
+            variables[f'{dv.TRUNK_SUFFIX}{i:d}'] = intfsuffix
+        self._agi.set_variables(variables)
 
     def _set_preprocess_subroutine(self) -> None:
         if self.outcall.preprocess_subroutine:
@@ -196,13 +197,24 @@ class OutgoingFeatures(Handler):
         self._agi.set_variable(dv.HANGUP_RING_TIME, hangupringtime)
 
     def _extract_dialplan_variables(self) -> None:
-        self.userid = self._agi.get_variable(dv.USERID)
-        self.useruuid = self._agi.get_variable(dv.USERUUID)
-        self.dialpattern_id = self._agi.get_variable(dv.DESTINATION_ID)
-        self.dstnum = self._agi.get_variable(dv.DESTINATION_NUMBER)
-        self.srcnum = self._agi.get_variable(dv.SOURCE_NUMBER)
-        self._context = self._agi.get_variable(dv.BASE_CONTEXT)
-        self._tenant_uuid = self._agi.get_variable(dv.TENANT_UUID)
+        variables = self._agi.get_variables(
+            [
+                dv.USERID,
+                dv.USERUUID,
+                dv.DESTINATION_ID,
+                dv.DESTINATION_NUMBER,
+                dv.SOURCE_NUMBER,
+                dv.BASE_CONTEXT,
+                dv.TENANT_UUID,
+            ]
+        )
+        self.userid = variables[dv.USERID]
+        self.useruuid = variables[dv.USERUUID]
+        self.dialpattern_id = variables[dv.DESTINATION_ID]
+        self.dstnum = variables[dv.DESTINATION_NUMBER]
+        self.srcnum = variables[dv.SOURCE_NUMBER]
+        self._context = variables[dv.BASE_CONTEXT]
+        self._tenant_uuid = variables[dv.TENANT_UUID]
 
     def execute(self) -> None:
         self._extract_dialplan_variables()
@@ -150,6 +150,9 @@ class BaseOutgoingFeaturesTestCase(unittest.TestCase):
         self._channel_variables: defaultdict[str, Any] = defaultdict(str)
         self._agi = Mock(config=config, env=agi_environment)
         self._agi.get_variable.side_effect = self._channel_variables.get
+        self._agi.get_variables.side_effect = lambda names: {
+            name: self._channel_variables[name] for name in names
+        }
         self._cursor = Mock()
         self._args = Mock()
         self.outgoing_features = OutgoingFeatures(self._agi, self._cursor, self._args)
@@ -176,23 +179,26 @@ class TestSetTrunkInfo(BaseOutgoingFeaturesTestCase):
 
         self.outgoing_features._set_trunk_info()
 
+        self._agi.set_variables.assert_called_once()
+        variables = self._agi.set_variables.call_args[0][0]
         assert_that(
-            self._agi.set_variable.call_args_list,
+            list(variables.items()),
             contains_exactly(
                 # Trunk 0
-                call('WAZO_OUTGOING_CALLER_ID_FORMAT0', '+E164'),
-                call('WAZO_INTERFACE0', 'PJSIP'),
-                call(f'{dv.TRUNK_EXTEN}0', '911@abc'),
-                call(f'{dv.TRUNK_INTERFACE}0', 'abc'),
-                call(f'{dv.TRUNK_SUFFIX}0', ''),
+                ('WAZO_OUTGOING_CALLER_ID_FORMAT0', '+E164'),
+                ('WAZO_INTERFACE0', 'PJSIP'),
+                (f'{dv.TRUNK_EXTEN}0', '911@abc'),
+                (f'{dv.TRUNK_INTERFACE}0', 'abc'),
+                (f'{dv.TRUNK_SUFFIX}0', ''),
                 # Trunk 1
-                call('WAZO_OUTGOING_CALLER_ID_FORMAT1', 'national'),
-                call('WAZO_INTERFACE1', 'PJSIP'),
-                call(f'{dv.TRUNK_EXTEN}1', '911@def'),
-                call(f'{dv.TRUNK_INTERFACE}1', 'def'),
-                call(f'{dv.TRUNK_SUFFIX}1', ''),
+                ('WAZO_OUTGOING_CALLER_ID_FORMAT1', 'national'),
+                ('WAZO_INTERFACE1', 'PJSIP'),
+                (f'{dv.TRUNK_EXTEN}1', '911@def'),
+                (f'{dv.TRUNK_INTERFACE}1', 'def'),
+                (f'{dv.TRUNK_SUFFIX}1', ''),
             ),
         )
+        self._agi.set_variable.assert_not_called()
 
 
 class TestSetUserField(BaseOutgoingFeaturesTestCase):
@@ -61,6 +61,9 @@ class TestUserFeatures(_BaseTestCase):
         }
 
         self._agi.get_variable = lambda name: self._variables.get(name, '')
+        self._agi.get_variables = lambda names: {
+            name: self._variables.get(name, '') for name in names
+        }
 
     def test_userfeatures(self):
         userfeatures = UserFeatures(self._agi, self._cursor, self._args)
@@ -69,7 +72,7 @@ class TestUserFeatures(_BaseTestCase):
         self.assertEqual(userfeatures._cursor, self._cursor)
         self.assertEqual(userfeatures._args, self._args)
 
-    @patch('wazo_agid.objects.User', Mock())
+    @patch('wazo_agid.objects.get_user', Mock())
     def test_set_members(self):
         userfeatures = UserFeatures(self._agi, self._cursor, self._args)
         with patch.multiple(
@@ -115,12 +118,12 @@ class TestUserFeatures(_BaseTestCase):
 
         userfeatures._userid = self._variables['WAZO_USERID']
 
-        with patch('wazo_agid.objects.User') as user_init:
-            user_init.return_value.simultcalls = 5
+        with patch('wazo_agid.objects.get_user') as get_user:
+            get_user.return_value.simultcalls = 5
 
             userfeatures._set_caller()
 
-            user_init.assert_called_with(
+            get_user.assert_called_with(
                 self._agi, self._cursor, int(self._variables['WAZO_USERID'])
             )
             self._agi.set_variable.assert_called_once_with(
@@ -255,11 +258,15 @@ class TestUserFeatures(_BaseTestCase):
 
             userfeatures._dstid = self._variables['WAZO_DSTID']
 
-            with patch.object(objects.User, '__init__') as user_init:
-                user_init.return_value = None
+            with patch.object(objects, 'get_user') as get_user:
+                get_user.return_value = Mock(objects.User)
 
                 userfeatures._set_user()
 
+                get_user.assert_called_once_with(
+                    self._agi, self._cursor, int(self._variables['WAZO_DSTID'])
+                )
+
                 userfeatures._set_user_name.assert_called_once()  # type: ignore
                 userfeatures._set_redirecting_info.assert_called_once()  # type: ignore
                 userfeatures._set_wazo_uuid.assert_called_once()  # type: ignore
@@ -84,16 +84,26 @@ class UserFeatures(Handler):
                 self._agi.verbose(msg)
 
     def _set_members(self) -> None:
-        self._userid = self._agi.get_variable(dv.USERID)
-        self._dstid = self._agi.get_variable(dv.DESTINATION_ID)
-        self._destination_extension_id = self._agi.get_variable(
-            dv.DESTINATION_EXTENSION_ID
+        variables = self._agi.get_variables(
+            [
+                dv.USERID,
+                dv.DESTINATION_ID,
+                dv.DESTINATION_EXTENSION_ID,
+                dv.CALL_ORIGIN,
+                dv.SOURCE_NUMBER,
+                dv.DESTINATION_NUMBER,
+                dv.BASE_CONTEXT,
+                dv.USER_MOH,
+            ]
         )
-        self._zone = self._agi.get_variable(dv.CALL_ORIGIN)
-        self._srcnum = self._agi.get_variable(dv.SOURCE_NUMBER)
-        self._dstnum = self._agi.get_variable(dv.DESTINATION_NUMBER)
-        self._context = self._agi.get_variable(dv.BASE_CONTEXT)
-        self._moh_uuid = self._agi.get_variable(dv.USER_MOH)
+        self._userid = variables[dv.USERID]
+        self._dstid = variables[dv.DESTINATION_ID]
+        self._destination_extension_id = variables[dv.DESTINATION_EXTENSION_ID]
+        self._zone = variables[dv.CALL_ORIGIN]
+        self._srcnum = variables[dv.SOURCE_NUMBER]
+        self._dstnum = variables[dv.DESTINATION_NUMBER]
+        self._context = variables[dv.BASE_CONTEXT]
+        self._moh_uuid = variables[dv.USER_MOH]
         self._set_caller()
         self._set_line()
         self._set_user()
@@ -101,7 +111,9 @@ class UserFeatures(Handler):
     def _set_caller(self) -> None:
         if self._userid:
             try:
-                self._caller = objects.User(self._agi, self._cursor, int(self._userid))
+                self._caller = objects.get_user(
+                    self._agi, self._cursor, int(self._userid)
+                )
             except (ValueError, LookupError):
                 self._caller = None
 
@@ -150,7 +162,7 @@ class UserFeatures(Handler):
     def _set_user(self) -> None:
         if self._dstid:
             try:
-                self._user = objects.User(self._agi, self._cursor, int(self._dstid))
+                self._user = objects.get_user(self._agi, self._cursor, int(self._dstid))
             except (ValueError, LookupError) as e:
                 self._agi.dp_break(str(e))
             self._set_user_name()
@@ -0,0 +1,131 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import select
+import selectors
+import socket
+import threading
+
+from wazo_agid import metrics
+from wazo_agid.fastagi import FastAGI
+
+logger = logging.getLogger(__name__)
+
+# Sent by Asterisk on the FastAGI socket when the channel hangs up
+HANGUP = b'HANGUP'
+# Sockets receiving a command response are watched again at this interval
+RESUME_INTERVAL = 0.1
+
+
+def has_hung_up(sock: socket.socket) -> bool:
+    """True if Asterisk sent the hangup notification or closed the connection.
+    Must only be called when no command response is expected."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        data = sock.recv(len(HANGUP), socket.MSG_PEEK | socket.MSG_DONTWAIT)
+    except (BlockingIOError, InterruptedError):
+        return False
+    except OSError:
+        return True
+    return not data or data.startswith(HANGUP)
+
+
+class HangupMonitor(threading.Thread):
+    """Watches the sockets of the requests being handled, and notifies their
+    FastAGI when Asterisk reports a hangup or closes the connection, so that
+    the handler stops working for a call that no longer exists."""
+
+    def __init__(self) -> None:
+        super().__init__(name='hangup-monitor', daemon=True)
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        # Sockets receiving a command response, with the command count of
+        # their FastAGI when they were paused
+        self._paused: dict[socket.socket, tuple[FastAGI, int]] = {}
+        self._stopped = False
+        metrics.gauge('hangup_monitor.watched', self._count)
+        self._hangups = metrics.counter('hangup_monitor.hangups')
+
+    def watch(self, sock: socket.socket, fagi: FastAGI) -> None:
+        with self._lock:
+            self._selector.register(sock, selectors.EVENT_READ, fagi)
+        self._wakeup()
+
+    def unwatch(self, sock: socket.socket) -> None:
+        """Must be called before the socket is closed"""
+        with self._lock:
+            if self._paused.pop(sock, None) is None:
+                try:
+                    self._selector.unregister(sock)
+                except (KeyError, ValueError):
+                    pass
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wakeup()
+
+    def run(self) -> None:
+        while not self._stopped:
+            timeout = RESUME_INTERVAL if self._paused else None
+            events = self._selector.select(timeout)
+            with self._lock:
+                for key, _ in events:
+                    if key.fileobj is self._wakeup_r:
+                        self._drain_wakeup()
+                    else:
+                        self._check(key)
+                self._resume()
+
+    def _check(self, key: selectors.SelectorKey) -> None:
+        sock: socket.socket = key.fileobj  # type: ignore[assignment]
+        fagi: FastAGI = key.data
+        try:
+            self._selector.get_key(sock)
+        except (KeyError, ValueError):
+            # unwatched since select() returned
+            return
+
+        self._selector.unregister(sock)
+        # The data is a command response, the handler reads it
+        if fagi.in_command or not has_hung_up(sock):
+            self._paused[sock] = (fagi, fagi.commands)
+            return
+
+        logger.info('caller hung up, aborting the request')
+        self._hangups.inc()
+        try:
+            fagi.notify_hangup()
+        except Exception:
+            logger.exception('failed to abort the request')
+
+    def _resume(self) -> None:
+        for sock, (fagi, commands) in list(self._paused.items()):
+            if fagi.in_command or fagi.commands == commands:
+                continue
+            del self._paused[sock]
+            self._selector.register(sock, selectors.EVENT_READ, fagi)
+
+    def _count(self) -> int:
+        return len(self._selector.get_map()) - 1 + len(self._paused)
+
+    def _wakeup(self) -> None:
+        try:
+            self._wakeup_w.send(b'\0')
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while self._wakeup_r.recv(512):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
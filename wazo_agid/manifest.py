@@ -0,0 +1,124 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# The handler manifest maps each handler name to the module registering it, so
+# that the handlers can be known without importing the modules. It is read
+# from the agid.register() calls of the modules and must be regenerated when
+# a handler is added or renamed:
+#
+#   python3 -m wazo_agid.manifest
+#
+# The unit tests fail when the manifest is not up to date.
+
+from __future__ import annotations
+
+import argparse
+import ast
+import os
+import sys
+from typing import Any
+
+MODULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules')
+MANIFEST_PATH = os.path.join(MODULES_PATH, 'manifest.py')
+
+_HEADER = '''\
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Generated by `python3 -m wazo_agid.manifest`, do not edit
+
+from __future__ import annotations
+
+from typing import Any
+
+HANDLERS: dict[str, dict[str, Any]] = {
+'''
+_MAX_LINE_LENGTH = 88
+
+
+def scan_modules(path: str = MODULES_PATH) -> dict[str, dict[str, Any]]:
+    handlers = {}
+    for filename in sorted(os.listdir(path)):
+        if not filename.endswith('.py') or filename.startswith('__'):
+            continue
+        module_name = filename[: -len('.py')]
+        with open(os.path.join(path, filename)) as f:
+            tree = ast.parse(f.read(), filename)
+        for name, options in _registered_handlers(tree):
+            if name in handlers:
+                raise ValueError(f'handler {name!r} registered twice')
+            handlers[name] = {'module': module_name, **options}
+    return handlers
+
+
+def _registered_handlers(tree: ast.Module) -> list[tuple[str, dict[str, Any]]]:
+    coroutines = {
+        node.name for node in tree.body if isinstance(node, ast.AsyncFunctionDef)
+    }
+    handlers = []
+    for node in tree.body:
+        if not isinstance(node, ast.Expr) or not _is_register_call(node.value):
+            continue
+        call: ast.Call = node.value  # type: ignore[assignment]
+        handle_fn = call.args[0]
+        if not isinstance(handle_fn, ast.Name):
+            raise ValueError(
+                f'line {call.lineno}: handlers must be registered by function name'
+            )
+        options: dict[str, Any] = {}
+        for keyword in call.keywords:
+            if keyword.arg in ('bulkhead', 'priority', 'timeout', 'read_only'):
+                options[keyword.arg] = ast.literal_eval(keyword.value)
+        if handle_fn.id in coroutines:
+            options['coroutine'] = True
+        handlers.append((handle_fn.id, options))
+    return handlers
+
+
+def _is_register_call(node: ast.expr) -> bool:
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == 'register'
+        and isinstance(node.func.value, ast.Name)
+        and node.func.value.id == 'agid'
+    )
+
+
+def render(handlers: dict[str, dict[str, Any]]) -> str:
+    lines = [_HEADER]
+    for name, options in sorted(handlers.items()):
+        items = [f'{key!r}: {value!r}' for key, value in options.items()]
+        line = f'    {name!r}: {{{", ".join(items)}}},\n'
+        if len(line) <= _MAX_LINE_LENGTH + 1:
+            lines.append(line)
+        else:
+            lines.append(f'    {name!r}: {{\n')
+            lines.extend(f'        {item},\n' for item in items)
+            lines.append('    },\n')
+    lines.append('}\n')
+    return ''.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate the handler manifest')
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='exit with an error if the manifest is not up to date',
+    )
+    parsed_args = parser.parse_args()
+
+    content = render(scan_modules())
+    if parsed_args.check:
+        with open(MANIFEST_PATH) as f:
+            if f.read() != content:
+                sys.exit(f'{MANIFEST_PATH} is not up to date')
+        return
+
+    with open(MANIFEST_PATH, 'w') as f:
+        f.write(content)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Metrics are reported to operators in the log file, either periodically or
+# on SIGUSR1.
+
+
+class Counter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+class Gauge:
+    def __init__(self, fn: Callable[[], float] | None = None) -> None:
+        self._lock = threading.Lock()
+        self._value: float = 0
+        self._fn = fn
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        if self._fn:
+            return self._fn()
+        return self._value
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class Summary:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            average = self.total / self.count if self.count else 0.0
+            return {'count': self.count, 'avg': average, 'max': self.max}
+
+
+Metric = Counter | Gauge | Summary
+
+_lock = threading.Lock()
+_metrics: dict[str, Metric] = {}
+
+
+def _get_or_create(name: str, factory: Callable[[], Metric]) -> Metric:
+    with _lock:
+        if name not in _metrics:
+            _metrics[name] = factory()
+        return _metrics[name]
+
+
+def counter(name: str) -> Counter:
+    return _get_or_create(name, Counter)  # type: ignore[return-value]
+
+
+def gauge(name: str, fn: Callable[[], float] | None = None) -> Gauge:
+    return _get_or_create(name, lambda: Gauge(fn))  # type: ignore[return-value]
+
+
+def summary(name: str) -> Summary:
+    return _get_or_create(name, Summary)  # type: ignore[return-value]
+
+
+def snapshot() -> dict[str, int | float | dict[str, float]]:
+    with _lock:
+        metrics = dict(_metrics)
+    return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
+
+
+def log_metrics() -> None:
+    for name, value in snapshot().items():
+        logger.info('metric %s: %s', name, value)
+
+
+class MetricsReporter(threading.Thread):
+    def __init__(self, interval: float) -> None:
+        super().__init__(name='metrics-reporter', daemon=True)
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            log_metrics()
+
+    def stop(self) -> None:
+        self._stopped.set()
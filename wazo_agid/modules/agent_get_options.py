@@ -41,4 +41,4 @@ def agent_get_options(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None
         agi.set_variable('CHANNEL(language)', agent.language)
 
 
-agid.register(agent_get_options)
+agid.register(agent_get_options, read_only=True)
@@ -28,4 +28,4 @@ def agent_get_status(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
         agi.dp_break(e)
 
 
-agid.register(agent_get_status)
+agid.register(agent_get_status, read_only=True)
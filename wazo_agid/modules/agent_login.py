@@ -30,4 +30,4 @@ def agent_login(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
         agi.dp_break(e)
 
 
-agid.register(agent_login)
+agid.register(agent_login, read_only=True)
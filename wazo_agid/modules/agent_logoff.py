@@ -28,4 +28,4 @@ def agent_logoff(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
         agi.dp_break(e)
 
 
-agid.register(agent_logoff)
+agid.register(agent_logoff, read_only=True)
@@ -108,7 +108,7 @@ def record_answered(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
         agi.set_variable(f'__{dv.RECORD_PENDING}', '')
 
 
-agid.register(call_recording)
-agid.register(record_caller)
-agid.register(start_mix_monitor)
-agid.register(record_answered)
+agid.register(call_recording, read_only=True)
+agid.register(record_caller, read_only=True)
+agid.register(start_mix_monitor, read_only=True)
+agid.register(record_answered, read_only=True)
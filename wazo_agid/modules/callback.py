@@ -60,4 +60,4 @@ def _get_uid_gid(name: str) -> tuple[int, int]:
     return pwd.getpwnam(name)[2:4]
 
 
-agid.register(callback, setup_callback)
+agid.register(callback, setup_callback, priority='background', read_only=True)
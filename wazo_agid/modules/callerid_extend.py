@@ -18,4 +18,4 @@ def callerid_extend(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
         agi.set_variable('WAZO_SRCTON', agi.env['agi_callington'])
 
 
-agid.register(callerid_extend)
+agid.register(callerid_extend, read_only=True)
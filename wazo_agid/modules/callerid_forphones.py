@@ -43,7 +43,7 @@ def callerid_forphones(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -
         numbers = [cid_number]
         country = None
         try:
-            tenant = objects.Tenant(agi, cursor, tenant_uuid)
+            tenant = objects.get_tenant(agi, cursor, tenant_uuid)
             country = tenant.country
         except Exception as e:
             msg = f'Could not fetch tenant: {e}'
@@ -154,4 +154,4 @@ def _set_new_caller_id(agi: agid.FastAGI, display_name: str, cid_number: str) ->
     agi.set_callerid(new_caller_id)
 
 
-agid.register(callerid_forphones)
+agid.register(callerid_forphones, bulkhead='dird', read_only=True)
@@ -18,7 +18,7 @@ if TYPE_CHECKING:
 def check_diversion(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
     queue_id = agi.get_variable('WAZO_DSTID')
     try:
-        queue = objects.Queue(agi, cursor, int(queue_id))
+        queue = objects.get_queue(agi, cursor, int(queue_id))
     except (ValueError, LookupError) as e:
         agi.dp_break(str(e))
 
@@ -55,4 +55,4 @@ def _set_diversion(agi, event, dialaction):
     agi.set_variable('WAZO_FWD_TYPE', 'QUEUE_' + dialaction)
 
 
-agid.register(check_diversion)
+agid.register(check_diversion, read_only=True)
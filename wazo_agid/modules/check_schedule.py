@@ -36,4 +36,4 @@ def check_schedule(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
     agi.set_variable(dv.PATH, '')
 
 
-agid.register(check_schedule)
+agid.register(check_schedule, priority='critical', read_only=True)
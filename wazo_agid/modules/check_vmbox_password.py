@@ -35,4 +35,4 @@ def check_vmbox_password(agi: FastAGI, cursor: DictCursor, args: list[str]) -> N
     )
 
 
-agid.register(check_vmbox_password)
+agid.register(check_vmbox_password, read_only=True)
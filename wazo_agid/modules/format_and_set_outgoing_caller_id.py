@@ -15,4 +15,4 @@ def format_and_set_outgoing_caller_id(
     handler.execute()
 
 
-agid.register(format_and_set_outgoing_caller_id)
+agid.register(format_and_set_outgoing_caller_id, read_only=True)
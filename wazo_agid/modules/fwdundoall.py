@@ -36,4 +36,4 @@ def _user_disable_all_forwards(agi: FastAGI, user_id: int) -> None:
         logger.error('Error during disabling all forwards: %s', e)
 
 
-agid.register(fwdundoall)
+agid.register(fwdundoall, read_only=True)
@@ -55,4 +55,4 @@ def get_user_interfaces(agi: FastAGI, cursor: DictCursor, args: list[str]) -> No
     agi.set_variable('WAZO_USER_INTERFACES', '&'.join(user_line.interfaces))
 
 
-agid.register(get_user_interfaces)
+agid.register(get_user_interfaces, read_only=True)
@@ -18,11 +18,20 @@ logger = logging.getLogger(__name__)
 
 
 def getring(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -> None:
-    dstnum = agi.get_variable(dv.REAL_NUMBER)
-    context = agi.get_variable(dv.REAL_CONTEXT)
-    origin = agi.get_variable('WAZO_CALLORIGIN')
-    referer = agi.get_variable('WAZO_FWD_REFERER').split(':', 1)[0]
-    forwarded = agi.get_variable(dv.CALLFORWARDED)
+    variables = agi.get_variables(
+        [
+            dv.REAL_NUMBER,
+            dv.REAL_CONTEXT,
+            'WAZO_CALLORIGIN',
+            'WAZO_FWD_REFERER',
+            dv.CALLFORWARDED,
+        ]
+    )
+    dstnum = variables[dv.REAL_NUMBER]
+    context = variables[dv.REAL_CONTEXT]
+    origin = variables['WAZO_CALLORIGIN']
+    referer = variables['WAZO_FWD_REFERER'].split(':', 1)[0]
+    forwarded = variables[dv.CALLFORWARDED]
     # TODO: maybe replace number@context with user id in conf file ?
     dstnum_context = f"{dstnum}@{context}"
     referer_origin = f"{referer}@{origin}"
@@ -73,12 +82,19 @@ def getring(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -> None:
         agi.verbose(f"Using ring tone {ringtype}")
 
 
-def setup(cursor: DictCursor) -> None:
+def load_config() -> None:
     global CONFIG_PARSER
 
     # This module is often called, keep this object alive.
-    CONFIG_PARSER = RawConfigParser()
-    CONFIG_PARSER.read_file(open(CONFIG_FILE))
+    config_parser = RawConfigParser()
+    with open(CONFIG_FILE) as f:
+        config_parser.read_file(f)
+    CONFIG_PARSER = config_parser
+
+
+def setup(cursor: DictCursor) -> None:
+    load_config()
 
 
-agid.register(getring, setup)
+agid.register(getring, setup, read_only=True)
+agid.watch_file(CONFIG_FILE, load_config)
@@ -14,4 +14,4 @@ def group_answered_call(agi: agid.FastAGI, cursor: DictCursor, args: list[str])
     handler.execute()
 
 
-agid.register(group_answered_call)
+agid.register(group_answered_call, priority='background', read_only=True)
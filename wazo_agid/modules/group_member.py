@@ -104,6 +104,6 @@ def group_member_present(agi, cursors, args):
         agi.set_variable('WAZO_GROUP_MEMBER_PRESENT', '0')
 
 
-agid.register(group_member_remove)
-agid.register(group_member_add)
-agid.register(group_member_present)
+agid.register(group_member_remove, read_only=True)
+agid.register(group_member_add, read_only=True)
+agid.register(group_member_present, read_only=True)
@@ -196,13 +196,14 @@ def _do_handle_fax(fax_file: str, dstnum: str, args: list[str]) -> None:
     if not dstnum:
         raise ValueError(f"Invalid dstnum value: {dstnum}")
 
-    if dstnum in DESTINATIONS:
+    destinations = DESTINATIONS
+    if dstnum in destinations:
         logger.debug("Using backends for destination %s", dstnum)
-        backends = DESTINATIONS[dstnum]
+        backends = destinations[dstnum]
     else:
-        if "default" in DESTINATIONS:
+        if "default" in destinations:
             logger.debug("Using backends for destination default")
-            backends = DESTINATIONS["default"]
+            backends = destinations["default"]
         else:
             raise ValueError(f"No backends associated with dstnum {dstnum}")
 
@@ -236,24 +237,17 @@ _BACKENDS_FACTORY: list[tuple[str, Callable[..., Backend]]] = [
 
 
 def setup_handle_fax(cursor: DictCursor) -> None:
+    load_config()
+
+
+def load_config() -> None:
     # Raise an error if a backend creation failed, etc.
     # 1. read config
     config = RawConfigParser()
     with open(CONFIG_FILE) as f:
         config.read_file(f)
 
-    # 2. read general section...
-    global TIFF2PDF_PATH
-    global MUTT_PATH
-    global LP_PATH
-    if config.has_option("general", "tiff2pdf"):
-        TIFF2PDF_PATH = config.get("general", "tiff2pdf")
-    if config.has_option("general", "mutt"):
-        MUTT_PATH = config.get("general", "mutt")
-    if config.has_option("general", "lp"):
-        LP_PATH = config.get("general", "lp")
-
-    # 3. create backends
+    # 2. create backends
     backends: dict[str, Backend] = {}
     for backend_prefix, backend_factory in _BACKENDS_FACTORY:
         for section in [s for s in config.sections() if s.startswith(backend_prefix)]:
@@ -264,9 +258,8 @@ def setup_handle_fax(cursor: DictCursor) -> None:
             backends[section] = backend_factory(**backend_factory_args)
     logger.debug("Created %s backends", len(backends))
 
-    # 4. creation destinations
-    global DESTINATIONS
-    DESTINATIONS = {}
+    # 3. creation destinations
+    destinations: dict[str, list[Backend]] = {}
     for section in [s for s in config.sections() if s.startswith("dstnum_")]:
         cur_destination = section[7:]  # 6 == len("dstnum_")
         cur_backend_ids = [s.strip() for s in config.get(section, "dest").split(",")]
@@ -276,8 +269,21 @@ def setup_handle_fax(cursor: DictCursor) -> None:
             cur_destination,
             cur_backend_ids,
         )
-        DESTINATIONS[cur_destination] = cur_backends
-    logger.debug("Created %s destinations", len(DESTINATIONS))
+        destinations[cur_destination] = cur_backends
+    logger.debug("Created %s destinations", len(destinations))
+
+    # 4. publish the new configuration, requests in progress keep the old one
+    global TIFF2PDF_PATH
+    global MUTT_PATH
+    global LP_PATH
+    global DESTINATIONS
+    if config.has_option("general", "tiff2pdf"):
+        TIFF2PDF_PATH = config.get("general", "tiff2pdf")
+    if config.has_option("general", "mutt"):
+        MUTT_PATH = config.get("general", "mutt")
+    if config.has_option("general", "lp"):
+        LP_PATH = config.get("general", "lp")
+    DESTINATIONS = destinations
 
 
 def _build_backends_list(
@@ -296,4 +302,13 @@ def _build_backends_list(
     return backends
 
 
-agid.register(handle_fax, setup_handle_fax)
+# Faxes wait for the fax bulkhead, then are converted and sent
+agid.register(
+    handle_fax,
+    setup_handle_fax,
+    bulkhead='fax',
+    priority='background',
+    timeout=120,
+    read_only=True,
+)
+agid.watch_file(CONFIG_FILE, load_config)
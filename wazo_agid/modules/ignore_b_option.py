@@ -37,4 +37,4 @@ def ignore_b_option(agi, cursor, args):
     agi.set_variable(CALL_OPTIONS, pruned_call_options)
 
 
-agid.register(ignore_b_option)
+agid.register(ignore_b_option, read_only=True)
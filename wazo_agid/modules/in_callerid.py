@@ -5,7 +5,6 @@ from __future__ import annotations
 
 import logging
 import re
-import sys
 from configparser import NoOptionError, RawConfigParser
 
 from psycopg2.extras import DictCursor
@@ -15,11 +14,12 @@ from wazo_agid import agid
 RULES_FILE = '/etc/xivo/asterisk/xivo_in_callerid.conf'
 
 log = logging.getLogger('wazo_agid.modules.in_callerid')
-config: RawConfigParser = None  # type: ignore[assignment]
-re_objs: dict[str, re.Pattern] = {}
+# The config and its compiled patterns are replaced together on reload
+rules: tuple[RawConfigParser, dict[str, re.Pattern]] = (RawConfigParser(), {})
 
 
 def in_callerid(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -> None:
+    config, re_objs = rules
     callerid_num = agi.env['agi_callerid']
     callerid_name = agi.env['agi_calleridname']
     same_cid = callerid_num == callerid_name
@@ -58,27 +58,36 @@ def in_callerid(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -> None:
         return
 
 
-def setup(cursor: DictCursor) -> None:
-    global config
+def load_rules() -> None:
+    global rules
 
-    re_objs.clear()
     config = RawConfigParser()
     config.read([RULES_FILE])
 
+    re_objs = {}
     for section_name in config.sections():
         try:
             regexp = config.get(section_name, 'callerid')
-        except NoOptionError:
-            log.error("option 'callerid' not found in section %r", section_name)
-            sys.exit(1)
+        except NoOptionError as e:
+            raise ValueError(
+                f"option 'callerid' not found in section {section_name!r}"
+            ) from e
 
         try:
             re_obj = re.compile(regexp)
-        except re.error:
-            log.error("invalid regexp %r in section %r", regexp, section_name)
-            sys.exit(1)
+        except re.error as e:
+            raise ValueError(
+                f"invalid regexp {regexp!r} in section {section_name!r}"
+            ) from e
 
         re_objs[section_name] = re_obj
 
+    rules = (config, re_objs)
+
+
+def setup(cursor: DictCursor) -> None:
+    load_rules()
+
 
-agid.register(in_callerid, setup)
+agid.register(in_callerid, setup, read_only=True)
+agid.watch_file(RULES_FILE, load_rules)
@@ -16,4 +16,4 @@ def incoming_agent_set_features(
     agentfeatures_handler.execute()
 
 
-agid.register(incoming_agent_set_features)
+agid.register(incoming_agent_set_features, priority='critical', read_only=True)
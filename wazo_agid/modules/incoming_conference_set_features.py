@@ -52,4 +52,4 @@ def incoming_conference_set_features(
     agi.appexec('CELGenUserEvent', f'WAZO_CONFERENCE, NAME: {conference.name or ""}')
 
 
-agid.register(incoming_conference_set_features)
+agid.register(incoming_conference_set_features, priority='critical', read_only=True)
@@ -34,4 +34,4 @@ def incoming_did_set_features(
     did.rewrite_cid()
 
 
-agid.register(incoming_did_set_features)
+agid.register(incoming_did_set_features, priority='critical', read_only=True)
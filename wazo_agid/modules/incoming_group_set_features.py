@@ -16,4 +16,4 @@ def incoming_group_set_features(
     groupfeatures_handler.execute()
 
 
-agid.register(incoming_group_set_features)
+agid.register(incoming_group_set_features, priority='critical', read_only=True)
@@ -15,7 +15,7 @@ def incoming_queue_set_features(agi, cursor, args):
     referer = agi.get_variable('WAZO_FWD_REFERER')
 
     try:
-        queue = objects.Queue(agi, cursor, int(queue_id))
+        queue = objects.get_queue(agi, cursor, int(queue_id))
     except (ValueError, LookupError) as e:
         agi.dp_break(str(e))
 
@@ -137,7 +137,7 @@ def _set_wrapup_time(agi, queue):
 def holdtime_announce(agi, cursor, args):
     queue_id = agi.get_variable('WAZO_DSTID')
     try:
-        queue = objects.Queue(agi, cursor, int(queue_id))
+        queue = objects.get_queue(agi, cursor, int(queue_id))
     except (ValueError, LookupError) as e:
         agi.dp_break(str(e))
 
@@ -161,5 +161,5 @@ def set_call_record_side(agi, queue):
     agi.set_variable('__WAZO_LOCAL_CHAN_MATCH_UUID', str(uuid4()))
 
 
-agid.register(incoming_queue_set_features)
-agid.register(holdtime_announce)
+agid.register(incoming_queue_set_features, priority='critical', read_only=True)
+agid.register(holdtime_announce, read_only=True)
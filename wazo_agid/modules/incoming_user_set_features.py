@@ -16,4 +16,4 @@ def incoming_user_set_features(
     userfeatures_handler.execute()
 
 
-agid.register(incoming_user_set_features)
+agid.register(incoming_user_set_features, priority='critical', read_only=True)
@@ -53,4 +53,4 @@ def linear_group_check_timeout(
     agi.set_variable('WAZO_DIAL_TIMEOUT', str(next_dial_timeout))
 
 
-agid.register(linear_group_check_timeout)
+agid.register(linear_group_check_timeout, read_only=True)
@@ -82,7 +82,7 @@ def linear_group_get_interfaces(
         group_id,
         len(group_info.members),
     )
-    member_interfaces = []
+    extensions = []
     for member in group_info.members:
         if member.type == 'user':
             if member.dnd:
@@ -90,12 +90,20 @@ def linear_group_get_interfaces(
                     'group member (user_uuid=%s) is in DND, skipping', member.uuid
                 )
                 continue
-            extension = f'{member.uuid}@usersharedlines'
-            extension_state = agi.get_variable(f'EXTENSION_STATE({extension})')
+            extensions.append(f'{member.uuid}@usersharedlines')
         elif member.type == 'extension':
-            extension = f'{member.extension}@{member.context}'
-            extension_state = agi.get_variable(f'EXTENSION_STATE({extension})')
+            extensions.append(f'{member.extension}@{member.context}')
+
+    if group_info.ring_in_use:
+        extension_states = {}
+    else:
+        extension_states = agi.get_variables(
+            f'EXTENSION_STATE({extension})' for extension in extensions
+        )
 
+    member_interfaces = []
+    for extension in extensions:
+        extension_state = extension_states.get(f'EXTENSION_STATE({extension})')
         if group_info.ring_in_use or extension_state in (
             'NOT_INUSE',
             'UNKNOWN',
@@ -124,4 +132,4 @@ def linear_group_get_interfaces(
         )
 
 
-agid.register(linear_group_get_interfaces)
+agid.register(linear_group_get_interfaces, read_only=True)
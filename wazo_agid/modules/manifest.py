@@ -0,0 +1,138 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Generated by `python3 -m wazo_agid.manifest`, do not edit
+
+from __future__ import annotations
+
+from typing import Any
+
+HANDLERS: dict[str, dict[str, Any]] = {
+    'agent_get_options': {'module': 'agent_get_options', 'read_only': True},
+    'agent_get_status': {'module': 'agent_get_status', 'read_only': True},
+    'agent_login': {'module': 'agent_login', 'read_only': True},
+    'agent_logoff': {'module': 'agent_logoff', 'read_only': True},
+    'call_recording': {'module': 'call_recording', 'read_only': True},
+    'callback': {'module': 'callback', 'priority': 'background', 'read_only': True},
+    'callerid_extend': {'module': 'callerid_extend', 'read_only': True},
+    'callerid_forphones': {
+        'module': 'callerid_forphones',
+        'bulkhead': 'dird',
+        'read_only': True,
+    },
+    'callfilter': {'module': 'callfilter'},
+    'check_diversion': {'module': 'check_diversion', 'read_only': True},
+    'check_schedule': {
+        'module': 'check_schedule',
+        'priority': 'critical',
+        'read_only': True,
+    },
+    'check_vmbox_password': {'module': 'check_vmbox_password', 'read_only': True},
+    'format_and_set_outgoing_caller_id': {
+        'module': 'format_and_set_outgoing_caller_id',
+        'read_only': True,
+    },
+    'fwdundoall': {'module': 'fwdundoall', 'read_only': True},
+    'get_user_interfaces': {'module': 'get_user_interfaces', 'read_only': True},
+    'getring': {'module': 'getring', 'read_only': True},
+    'group_answered_call': {
+        'module': 'group_answered_call',
+        'priority': 'background',
+        'read_only': True,
+    },
+    'group_member_add': {'module': 'group_member', 'read_only': True},
+    'group_member_present': {'module': 'group_member', 'read_only': True},
+    'group_member_remove': {'module': 'group_member', 'read_only': True},
+    'handle_fax': {
+        'module': 'handle_fax',
+        'bulkhead': 'fax',
+        'priority': 'background',
+        'timeout': 120,
+        'read_only': True,
+    },
+    'holdtime_announce': {'module': 'incoming_queue_set_features', 'read_only': True},
+    'ignore_b_option': {'module': 'ignore_b_option', 'read_only': True},
+    'in_callerid': {'module': 'in_callerid', 'read_only': True},
+    'incoming_agent_set_features': {
+        'module': 'incoming_agent_set_features',
+        'priority': 'critical',
+        'read_only': True,
+    },
+    'incoming_conference_set_features': {
+        'module': 'incoming_conference_set_features',
+        'priority': 'critical',
+        'read_only': True,
+    },
+    'incoming_did_set_features': {
+        'module': 'incoming_did_set_features',
+        'priority': 'critical',
+        'read_only': True,
+    },
+    'incoming_group_set_features': {
+        'module': 'incoming_group_set_features',
+        'priority': 'critical',
+        'read_only': True,
+    },
+    'incoming_queue_set_features': {
+        'module': 'incoming_queue_set_features',
+        'priority': 'critical',
+        'read_only': True,
+    },
+    'incoming_user_set_features': {
+        'module': 'incoming_user_set_features',
+        'priority': 'critical',
+        'read_only': True,
+    },
+    'linear_group_check_timeout': {
+        'module': 'linear_group_check_timeout',
+        'read_only': True,
+    },
+    'linear_group_get_interfaces': {
+        'module': 'linear_group_get_interfaces',
+        'read_only': True,
+    },
+    'meeting_user': {'module': 'meeting_user', 'read_only': True},
+    'monitoring': {'module': 'monitoring', 'priority': 'background', 'read_only': True},
+    'outgoing_user_set_features': {
+        'module': 'outgoing_user_set_features',
+        'read_only': True,
+    },
+    'paging': {'module': 'paging', 'read_only': True},
+    'phone_get_features': {'module': 'phone_get_features', 'read_only': True},
+    'phone_progfunckey': {'module': 'phone_progfunckey', 'read_only': True},
+    'phone_progfunckey_devstate': {
+        'module': 'phone_progfunckey_devstate',
+        'read_only': True,
+    },
+    'phone_set_feature': {'module': 'phone_set_feature'},
+    'post_subroutine_compat': {'module': 'subroutine', 'read_only': True},
+    'pre_subroutine_compat': {'module': 'subroutine', 'read_only': True},
+    'provision': {
+        'module': 'provision',
+        'bulkhead': 'provisioning',
+        'priority': 'background',
+        'read_only': True,
+    },
+    'queue_answered_call': {
+        'module': 'queue_answered_call',
+        'priority': 'background',
+        'read_only': True,
+    },
+    'queue_skill_rule_set': {'module': 'queue_skill_rule_set', 'read_only': True},
+    'record_answered': {'module': 'call_recording', 'read_only': True},
+    'record_caller': {'module': 'call_recording', 'read_only': True},
+    'screen_blocklist': {'module': 'screen_blocklist', 'read_only': True},
+    'start_mix_monitor': {'module': 'call_recording', 'read_only': True},
+    'switchboard_set_features': {
+        'module': 'switchboard_set_features',
+        'read_only': True,
+    },
+    'user_get_vmbox': {'module': 'user_get_vmbox', 'read_only': True},
+    'user_set_call_rights': {
+        'module': 'user_set_call_rights',
+        'priority': 'critical',
+        'read_only': True,
+    },
+    'vmbox_get_info': {'module': 'vmbox_get_info', 'read_only': True},
+    'wake_mobile': {'module': 'wake_mobile', 'read_only': True},
+}
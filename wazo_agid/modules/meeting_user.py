@@ -47,4 +47,4 @@ def _find_meeting(
     raise ValueError(f'Invalid identifier: {identifier}')
 
 
-agid.register(meeting_user)
+agid.register(meeting_user, read_only=True)
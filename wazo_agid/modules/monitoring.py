@@ -12,4 +12,4 @@ def monitoring(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -> None:
     agi.send_command("Status: OK")
 
 
-agid.register(monitoring)
+agid.register(monitoring, priority='background', read_only=True)
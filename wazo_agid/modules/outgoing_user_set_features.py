@@ -16,4 +16,4 @@ def outgoing_user_set_features(
     outgoing_features_handler.execute()
 
 
-agid.register(outgoing_user_set_features)
+agid.register(outgoing_user_set_features, read_only=True)
@@ -65,4 +65,4 @@ def build_options(paging):
     return paging_opts
 
 
-agid.register(paging)
+agid.register(paging, read_only=True)
@@ -75,4 +75,4 @@ def _get_forwards(agi, user_id):
         }
 
 
-agid.register(phone_get_features)
+agid.register(phone_get_features, read_only=True)
@@ -39,4 +39,4 @@ def phone_progfunckey(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) ->
     agi.set_variable(dv.PHONE_PROGFUNCKEY_FEATURE, feature)
 
 
-agid.register(phone_progfunckey)
+agid.register(phone_progfunckey, read_only=True)
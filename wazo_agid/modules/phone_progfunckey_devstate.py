@@ -71,4 +71,4 @@ def phone_progfunckey_devstate(
     agi.set_variable(f"DEVICE_STATE(Custom:{exten})", devstate)
 
 
-agid.register(phone_progfunckey_devstate)
+agid.register(phone_progfunckey_devstate, read_only=True)
@@ -73,4 +73,4 @@ def provision(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -> None:
         agi.set_variable(dv.PROV_OK, '1')
 
 
-agid.register(provision)
+agid.register(provision, bulkhead='provisioning', priority='background', read_only=True)
@@ -14,4 +14,4 @@ def queue_answered_call(agi: agid.FastAGI, cursor: DictCursor, args: list[str])
     handler.execute()
 
 
-agid.register(queue_answered_call)
+agid.register(queue_answered_call, priority='background', read_only=True)
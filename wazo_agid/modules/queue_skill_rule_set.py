@@ -62,4 +62,4 @@ def _set_variables(agi: agid.FastAGI, call: str, timeout: str) -> None:
     agi.set_variable('ARG2_TIMEOUT', timeout)
 
 
-agid.register(queue_skill_rule_set)
+agid.register(queue_skill_rule_set, read_only=True)
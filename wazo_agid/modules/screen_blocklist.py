@@ -117,4 +117,4 @@ def screen_blocklist(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) ->
         agi.set_variable('WAZO_BLOCKED_NUMBER_UUID', result)
 
 
-agid.register(screen_blocklist)
+agid.register(screen_blocklist, read_only=True)
@@ -88,5 +88,5 @@ def post_subroutine_compat(
             agi.set_variable(new_name, compat_value)
 
 
-agid.register(pre_subroutine_compat)
-agid.register(post_subroutine_compat)
+agid.register(pre_subroutine_compat, read_only=True)
+agid.register(post_subroutine_compat, read_only=True)
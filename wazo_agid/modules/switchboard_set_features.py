@@ -16,4 +16,4 @@ def switchboard_set_features(
     switchboardfeatures_handler.execute()
 
 
-agid.register(switchboard_set_features)
+agid.register(switchboard_set_features, read_only=True)
@@ -150,9 +150,9 @@ class TestCallerIdForPhone(unittest.TestCase):
 
         assert_that(self.dird_client.graphql.query.call_count, equal_to(1))
 
-    @patch('wazo_agid.modules.callerid_forphones.objects.Tenant')
+    @patch('wazo_agid.modules.callerid_forphones.objects.get_tenant')
     @patch('wazo_agid.modules.callerid_forphones.directory_profile_dao')
-    def test_callerid_forphones_no_result(self, mock_dao, mock_tenant):
+    def test_callerid_forphones_no_result(self, mock_dao, mock_get_tenant):
         self.agi.env = {
             'agi_calleridname': '5555551234',
             'agi_callerid': '5555551234',
@@ -174,7 +174,7 @@ class TestCallerIdForPhone(unittest.TestCase):
             }
         }
         mock_dao.find_by_incall_id.return_value.user_uuid = 'user_uuid'
-        mock_tenant.return_value.country = 'CA'
+        mock_get_tenant.return_value.country = 'CA'
 
         self.agi.get_variable.side_effect = [0, sentinel.agi_variable]
 
@@ -212,9 +212,9 @@ class TestCallerIdForPhone(unittest.TestCase):
 
         assert_that(self.agi.set_callerid.call_count, equal_to(0))
 
-    @patch('wazo_agid.modules.callerid_forphones.objects.Tenant')
+    @patch('wazo_agid.modules.callerid_forphones.objects.get_tenant')
     @patch('wazo_agid.modules.callerid_forphones.directory_profile_dao')
-    def test_callerid_forphones_with_result(self, mock_dao, mock_tenant):
+    def test_callerid_forphones_with_result(self, mock_dao, mock_get_tenant):
         self.agi.env = {
             'agi_calleridname': '5555551234',
             'agi_callerid': '5555551234',
@@ -238,7 +238,7 @@ class TestCallerIdForPhone(unittest.TestCase):
         }
 
         mock_dao.find_by_incall_id.return_value.user_uuid = 'user_uuid'
-        mock_tenant.return_value.country = 'CA'
+        mock_get_tenant.return_value.country = 'CA'
 
         self.agi.get_variable.side_effect = [0, sentinel.agi_variable]
 
@@ -277,9 +277,9 @@ class TestCallerIdForPhone(unittest.TestCase):
         expected_callerid = '"Bob" <5555551234>'
         self.agi.set_callerid.assert_called_once_with(expected_callerid)
 
-    @patch('wazo_agid.modules.callerid_forphones.objects.Tenant')
+    @patch('wazo_agid.modules.callerid_forphones.objects.get_tenant')
     @patch('wazo_agid.modules.callerid_forphones.directory_profile_dao')
-    def test_callerid_forphones_when_dao_return_none(self, mock_dao, mock_tenant):
+    def test_callerid_forphones_when_dao_return_none(self, mock_dao, mock_get_tenant):
         self.agi.env = {
             'agi_calleridname': '5555551234',
             'agi_callerid': '5555551234',
@@ -301,7 +301,7 @@ class TestCallerIdForPhone(unittest.TestCase):
             }
         }
         mock_dao.find_by_incall_id.return_value = None
-        mock_tenant.return_value = None
+        mock_get_tenant.return_value = None
 
         self.agi.get_variable.side_effect = [0, sentinel.agi_variable]
 
@@ -341,10 +341,10 @@ class TestCallerIdForPhone(unittest.TestCase):
 
         callerid_forphones(self.agi, Mock(), Mock())
 
-    @patch('wazo_agid.modules.callerid_forphones.objects.Tenant')
+    @patch('wazo_agid.modules.callerid_forphones.objects.get_tenant')
     @patch('wazo_agid.modules.callerid_forphones.directory_profile_dao')
     def test_that_callerid_forphones_never_raises_and_queries_when_invalid_number(
-        self, mock_dao, mock_tenant
+        self, mock_dao, mock_get_tenant
     ):
         self.agi.env = {
             'agi_calleridname': '5555551234',
@@ -367,7 +367,7 @@ class TestCallerIdForPhone(unittest.TestCase):
             }
         }
         mock_dao.find_by_incall_id.return_value.user_uuid = 'user_uuid'
-        mock_tenant.return_value.country = 'CA'
+        mock_get_tenant.return_value.country = 'CA'
 
         self.agi.get_variable.side_effect = [0, sentinel.agi_variable]
 
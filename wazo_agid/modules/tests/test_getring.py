@@ -34,7 +34,9 @@ class TestGetRing(unittest.TestCase):
             dv.REAL_CONTEXT: 'default',
             'WAZO_FWD_REFERER': 'foo:bar',
         }
-        self.agi.get_variable.side_effect = lambda var: variables.get(var)
+        self.agi.get_variables.side_effect = lambda names: {
+            name: variables.get(name, '') for name in names
+        }
 
         assert_that(
             calling(getring.getring).with_args(self.agi, self.cursor, []),
@@ -0,0 +1,82 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import re
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from hamcrest import (
+    assert_that,
+    calling,
+    has_key,
+    instance_of,
+    raises,
+    same_instance,
+)
+
+from .. import in_callerid
+
+RULES = '''\
+[national]
+callerid = ^0[1-9]
+strip = 1
+add = +33
+'''
+
+
+class TestLoadRules(unittest.TestCase):
+    def setUp(self):
+        self.rules_file = tempfile.NamedTemporaryFile('w', suffix='.conf')
+        self.addCleanup(self.rules_file.close)
+        patcher = patch.object(in_callerid, 'RULES_FILE', self.rules_file.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, in_callerid, 'rules', in_callerid.rules)
+
+    def _write(self, content):
+        self.rules_file.seek(0)
+        self.rules_file.truncate()
+        self.rules_file.write(content)
+        self.rules_file.flush()
+
+    def test_load_rules_replaces_rules(self):
+        self._write(RULES)
+
+        in_callerid.load_rules()
+
+        _, re_objs = in_callerid.rules
+        assert_that(re_objs, has_key('national'))
+
+    def test_invalid_rules_keep_previous_rules(self):
+        self._write(RULES)
+        in_callerid.load_rules()
+        previous = in_callerid.rules
+
+        self._write('[broken]\ncallerid = ^(\n')
+
+        assert_that(calling(in_callerid.load_rules), raises(ValueError))
+        assert_that(in_callerid.rules, same_instance(previous))
+
+    def test_parse_error_is_chained(self):
+        self._write('[broken]\ncallerid = ^(\n')
+
+        with self.assertRaises(ValueError) as context:
+            in_callerid.load_rules()
+
+        assert_that(context.exception.__cause__, instance_of(re.error))
+
+
+class TestInCallerid(unittest.TestCase):
+    def test_rule_is_applied(self):
+        agi = Mock(env={'agi_callerid': '0123', 'agi_calleridname': 'Alice'})
+        config = in_callerid.RawConfigParser()
+        config.read_string(RULES)
+        rules = (config, {'national': in_callerid.re.compile('^0[1-9]')})
+
+        with patch.object(in_callerid, 'rules', rules):
+            in_callerid.in_callerid(agi, Mock(), [])
+
+        agi.set_variable.assert_called_once_with('CALLERID(num)', '+33123')
@@ -17,23 +17,23 @@ class TestHoldtimeAnnounce(unittest.TestCase):
         self.queue = Mock()
         self.queue.announce_holdtime = 1
 
-    @patch('wazo_agid.objects.Queue')
-    def test_holdtime_use_say_number(self, mock_Queue):
+    @patch('wazo_agid.objects.get_queue')
+    def test_holdtime_use_say_number(self, mock_get_queue):
         holdtime_minute = 24
         holdtime_second = holdtime_minute * 60
         self.agi.get_variable.return_value = holdtime_second
-        mock_Queue.return_value = self.queue
+        mock_get_queue.return_value = self.queue
 
         incoming_queue_set_features.holdtime_announce(self.agi, self.cursor, self.args)
 
         self.agi.say_number.assert_called_once_with(str(holdtime_minute), gender='')
 
-    @patch('wazo_agid.objects.Queue')
-    def test_holdtime_use_gender_number(self, mock_Queue):
+    @patch('wazo_agid.objects.get_queue')
+    def test_holdtime_use_gender_number(self, mock_get_queue):
         holdtime_minute = 1
         holdtime_second = holdtime_minute * 60
         self.agi.get_variable.return_value = holdtime_second
-        mock_Queue.return_value = self.queue
+        mock_get_queue.return_value = self.queue
 
         incoming_queue_set_features.holdtime_announce(self.agi, self.cursor, self.args)
 
@@ -4,10 +4,15 @@
 from __future__ import annotations
 
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 from uuid import uuid4
 
-from hamcrest import assert_that, contains_inanyorder, has_properties
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    contains_inanyorder,
+    has_properties,
+)
 from xivo_dao.alchemy.queuemember import QueueMember
 
 from wazo_agid.handlers.userfeatures import UserFeatures
@@ -115,3 +120,64 @@ class TestGetGroupMembers(unittest.TestCase):
                     )
                 ),
             )
+
+
+class TestLinearGroupGetInterfaces(unittest.TestCase):
+    def setUp(self):
+        self.agi = Mock()
+        self.cursor = Mock()
+
+    def _group_info(self, ring_in_use):
+        return linear_group_get_interfaces.GroupInfo(
+            members=[
+                linear_group_get_interfaces.UserMemberInfo(uuid='abc', dnd=False),
+                linear_group_get_interfaces.UserMemberInfo(uuid='def', dnd=True),
+                linear_group_get_interfaces.ExtensionMemberInfo(
+                    extension='1001', context='default'
+                ),
+            ],
+            name='test',
+            ring_in_use=ring_in_use,
+        )
+
+    def test_extension_states_are_read_at_once(self):
+        self.agi.get_variables.return_value = {
+            'EXTENSION_STATE(abc@usersharedlines)': 'INUSE',
+            'EXTENSION_STATE(1001@default)': 'NOT_INUSE',
+        }
+        with patch.object(
+            linear_group_get_interfaces,
+            'get_group_info',
+            return_value=self._group_info(ring_in_use=False),
+        ):
+            linear_group_get_interfaces.linear_group_get_interfaces(
+                self.agi, self.cursor, ['1']
+            )
+
+        self.agi.get_variables.assert_called_once()
+        assert_that(
+            list(self.agi.get_variables.call_args[0][0]),
+            contains_exactly(
+                'EXTENSION_STATE(abc@usersharedlines)', 'EXTENSION_STATE(1001@default)'
+            ),
+        )
+        self.agi.get_variable.assert_not_called()
+        self.agi.set_variable.assert_has_calls(
+            [
+                call('WAZO_GROUP_LINEAR_INTERFACE_COUNT', 1),
+                call('WAZO_GROUP_LINEAR_0_INTERFACE', 'Local/1001@default'),
+            ]
+        )
+
+    def test_extension_states_are_not_read_when_ringing_in_use(self):
+        with patch.object(
+            linear_group_get_interfaces,
+            'get_group_info',
+            return_value=self._group_info(ring_in_use=True),
+        ):
+            linear_group_get_interfaces.linear_group_get_interfaces(
+                self.agi, self.cursor, ['1']
+            )
+
+        self.agi.get_variables.assert_not_called()
+        self.agi.set_variable.assert_any_call('WAZO_GROUP_LINEAR_INTERFACE_COUNT', 2)
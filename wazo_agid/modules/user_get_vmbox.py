@@ -31,7 +31,7 @@ def user_get_vmbox(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
             agi.dp_break(str(e))
     else:
         try:
-            user = objects.User(agi, cursor, int(userid))
+            user = objects.get_user(agi, cursor, int(userid))
         except (ValueError, LookupError) as e:
             agi.dp_break(str(e))
 
@@ -50,4 +50,4 @@ def user_get_vmbox(agi: FastAGI, cursor: DictCursor, args: list[str]) -> None:
         agi.set_variable('WAZO_VM_PASSWORD', user.vmbox.password)
 
 
-agid.register(user_get_vmbox)
+agid.register(user_get_vmbox, read_only=True)
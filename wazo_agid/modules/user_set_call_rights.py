@@ -162,4 +162,4 @@ def user_set_call_rights(
         return
 
 
-agid.register(user_set_call_rights)
+agid.register(user_set_call_rights, priority='critical', read_only=True)
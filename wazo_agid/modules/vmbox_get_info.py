@@ -59,4 +59,4 @@ def vmbox_get_info(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -> No
     agi.set_variable(dv.MAILBOX_LANGUAGE, mbox_lang)
 
 
-agid.register(vmbox_get_info)
+agid.register(vmbox_get_info, read_only=True)
@@ -30,4 +30,4 @@ def wake_mobile(agi: agid.FastAGI, cursor: DictCursor, args: list[str]) -> None:
     )
 
 
-agid.register(wake_mobile)
+agid.register(wake_mobile, read_only=True)
@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import copy
 import logging
 import re
 from collections.abc import Sequence
@@ -12,6 +13,7 @@ from psycopg2.extras import DictCursor, DictRow
 from psycopg2.sql import SQL, Composable, Identifier
 from xivo_dao import user_dao
 
+from wazo_agid import call_context
 from wazo_agid import dialplan_variables as dv
 from wazo_agid.schedule import (
     AlwaysOpenedSchedule,
@@ -32,6 +34,44 @@ class DBUpdateException(Exception):
     pass
 
 
+def get_user(agi: FastAGI, cursor: DictCursor, xid: int | str) -> User:
+    """The user with this id or uuid, loaded once per call"""
+    return _reuse(agi, cursor, ('user', xid), lambda: User(agi, cursor, xid))
+
+
+def get_queue(agi: FastAGI, cursor: DictCursor, queue_id: int) -> Queue:
+    return _reuse(
+        agi, cursor, ('queue', queue_id), lambda: Queue(agi, cursor, queue_id)
+    )
+
+
+def get_tenant(agi: FastAGI, cursor: DictCursor, tenant_uuid: str) -> Tenant:
+    return _reuse(
+        agi, cursor, ('tenant', tenant_uuid), lambda: Tenant(agi, cursor, tenant_uuid)
+    )
+
+
+def _reuse(agi, cursor, key, load):
+    if not call_context.enabled():
+        return load()
+    cached = call_context.lookup(agi, key)
+    if cached is not None:
+        return _bind(cached, agi, cursor)
+    obj = load()
+    # Kept without the AGI session and the cursor of this request
+    call_context.store(agi, key, _bind(obj, None, None))
+    return obj
+
+
+def _bind(obj, agi, cursor):
+    obj = copy.copy(obj)
+    obj.agi = agi
+    obj.cursor = cursor
+    if getattr(obj, 'vmbox', None):
+        obj.vmbox = _bind(obj.vmbox, agi, cursor)
+    return obj
+
+
 def sanitize_column(name: str) -> Identifier:
     """
     Take a list of fields and join them together for insertion, safely, into SQL query.
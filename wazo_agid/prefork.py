@@ -0,0 +1,176 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import resource
+import select
+import signal
+import time
+from collections.abc import Callable
+from types import FrameType
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Workers dying faster than this are considered crashing at startup
+MIN_WORKER_UPTIME = 1
+RESPAWN_DELAY = 1
+
+FORWARDED_SIGNALS = (signal.SIGHUP, signal.SIGUSR1)
+
+
+def current_rss() -> int:
+    """Resident memory of the current process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * resource.getpagesize()
+    except OSError:
+        # ru_maxrss is the peak usage, in kilobytes
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Supervisor:
+    def __init__(self, process_count: int, serve_fn: Callable[[], None]) -> None:
+        self.process_count = process_count
+        self._serve_fn = serve_fn
+        self._workers: dict[int, tuple[int, float]] = {}
+        self._running = False
+        self._previous_handlers: dict[int, Any] = {}
+
+    def run(self) -> None:
+        logger.info('starting %d worker processes', self.process_count)
+        self._running = True
+
+        # State prepared before the fork (handlers setup, imports) is shared
+        # with the workers, keep the garbage collector from touching it and
+        # defeating copy-on-write
+        gc.collect()
+        gc.freeze()
+
+        # A signal received just before a blocking os.wait() would only be
+        # handled once a worker exits, signals wake up the loop instead
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._previous_wakeup_fd = signal.set_wakeup_fd(self._wakeup_w)
+
+        for signum in FORWARDED_SIGNALS:
+            self._previous_handlers[signum] = signal.signal(signum, self._forward)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self._previous_handlers[signum] = signal.signal(signum, self._terminate)
+        self._previous_handlers[signal.SIGCHLD] = signal.signal(
+            signal.SIGCHLD, self._child_exited
+        )
+
+        try:
+            for worker_id in range(self.process_count):
+                self._spawn(worker_id)
+            self._wait_workers()
+        finally:
+            self._restore_signals()
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
+        logger.info('all worker processes exited')
+
+    def _wait_workers(self) -> None:
+        respawn_at: dict[int, float] = {}
+        while self._workers or (self._running and respawn_at):
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._workers.clear()
+                pid = 0
+
+            if pid in self._workers:
+                worker_id, started_at = self._workers.pop(pid)
+                self._log_exit(pid, status)
+                if self._running:
+                    now = time.monotonic()
+                    if now - started_at < MIN_WORKER_UPTIME:
+                        now += RESPAWN_DELAY
+                    respawn_at[worker_id] = now
+                continue
+            elif pid:
+                continue
+
+            now = time.monotonic()
+            for worker_id, at in list(respawn_at.items()):
+                if not self._running:
+                    break
+                if now >= at:
+                    del respawn_at[worker_id]
+                    self._spawn(worker_id)
+
+            if self._running and respawn_at:
+                timeout = max(0, min(respawn_at.values()) - now)
+                select.select([self._wakeup_r], [], [], timeout)
+            elif self._workers:
+                select.select([self._wakeup_r], [], [])
+            self._drain_wakeup_fd()
+
+    def _drain_wakeup_fd(self) -> None:
+        try:
+            while os.read(self._wakeup_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _restore_signals(self) -> None:
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+        signal.set_wakeup_fd(self._previous_wakeup_fd)
+
+    def _spawn(self, worker_id: int) -> None:
+        pid = os.fork()
+        if pid:
+            logger.debug('started worker %d (pid %d)', worker_id, pid)
+            self._workers[pid] = (worker_id, time.monotonic())
+            return
+
+        self._restore_signals()
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+
+        exit_code = 0
+        try:
+            self._serve_fn()
+        except BaseException:
+            logger.exception('worker %d exited with an exception', worker_id)
+            exit_code = 1
+        finally:
+            logging.shutdown()
+            os._exit(exit_code)
+
+    def _log_exit(self, pid: int, status: int) -> None:
+        if os.WIFSIGNALED(status):
+            logger.error('worker %d killed by signal %d', pid, os.WTERMSIG(status))
+        elif os.waitstatus_to_exitcode(status):
+            logger.error(
+                'worker %d exited with code %d', pid, os.waitstatus_to_exitcode(status)
+            )
+        else:
+            logger.info('worker %d exited', pid)
+
+    def _child_exited(self, signum: int, frame: FrameType | None) -> None:
+        # Only there for the wakeup fd to be written
+        pass
+
+    def _forward(self, signum: int, frame: FrameType | None) -> None:
+        self._kill_workers(signum)
+
+    def _terminate(self, signum: int, frame: FrameType | None) -> None:
+        logger.info('stopping worker processes')
+        self._running = False
+        self._kill_workers(signal.SIGTERM)
+
+    def _kill_workers(self, signum: int) -> None:
+        for pid in list(self._workers):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
@@ -0,0 +1,38 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+# See sd_listen_fds(3)
+SD_LISTEN_FDS_START = 3
+
+
+def listen_sockets() -> list[tuple[str, socket.socket]]:
+    """Listening sockets passed by systemd socket activation, with their name
+    (FileDescriptorName= of the socket unit)"""
+    try:
+        if int(os.environ.get('LISTEN_PID', '')) != os.getpid():
+            return []
+        count = int(os.environ.get('LISTEN_FDS', ''))
+    except ValueError:
+        return []
+    names = os.environ.get('LISTEN_FDNAMES', '').split(':')
+
+    # The sockets must not be passed again to other processes
+    for name in ('LISTEN_PID', 'LISTEN_FDS', 'LISTEN_FDNAMES'):
+        os.environ.pop(name, None)
+
+    sockets = []
+    for i in range(count):
+        fd = SD_LISTEN_FDS_START + i
+        os.set_inheritable(fd, False)
+        name = names[i] if i < len(names) else ''
+        sockets.append((name, socket.socket(fileno=fd)))
+        logger.debug('received socket %r from systemd (fd %d)', name, fd)
+    return sockets
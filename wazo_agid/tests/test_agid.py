@@ -3,10 +3,19 @@
 
 from __future__ import annotations
 
+import io
+import socket
+import threading
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock, patch
 
-from wazo_agid.agid import Handler
+from wazo_agid import agid, deadline, metrics
+from wazo_agid.agid import PRIORITIES, Handler
+from wazo_agid.bulkhead import Bulkhead, BulkheadFull
+from wazo_agid.database import Database, PoolTimeout, RequestSession
+from wazo_agid.deadline import DeadlineExceeded
+from wazo_agid.fastagi import FastAGI, FastAGIDialPlanBreak, FastAGIHangup
+from wazo_agid.variable_cache import VariableCache
 
 
 class TestHandler(TestCase):
@@ -18,3 +27,487 @@ class TestHandler(TestCase):
         handler.setup(fake_cursor)
 
         setup_function.assert_called_once_with(fake_cursor)
+
+    def test_handler_detects_coroutine_handle_function(self):
+        async def handle_fn(agi, cursor, args):
+            pass
+
+        assert Handler("foo", None, handle_fn).is_coroutine
+        assert not Handler("foo", None, Mock()).is_coroutine
+
+    def test_sync_handle_refuses_coroutine_handle_function(self):
+        async def handle_fn(agi, cursor, args):
+            pass
+
+        handler = Handler("foo", None, handle_fn)
+
+        self.assertRaises(RuntimeError, handler.handle, Mock(), Mock(), [])
+
+    def test_handle_skips_handler_when_skippable_bulkhead_is_full(self):
+        handle_function = Mock()
+        handler = Handler("foo", None, handle_function)
+        handler.bulkhead = Bulkhead('test', max_concurrent=1, skip_when_full=True)
+
+        with handler.bulkhead.acquire():
+            handler.handle(Mock(), Mock(), [])
+
+        handle_function.assert_not_called()
+
+    def test_handle_raises_when_bulkhead_is_full(self):
+        handler = Handler("foo", None, Mock())
+        handler.bulkhead = Bulkhead('test', max_concurrent=1)
+
+        with handler.bulkhead.acquire():
+            self.assertRaises(BulkheadFull, handler.handle, Mock(), Mock(), [])
+
+    def test_configure_overrides_priority(self):
+        handler = Handler("foo", None, Mock(), priority='critical')
+        config = {
+            'handlers': {'foo': {'priority': 'background'}},
+            'bulkheads': {},
+            'request_timeout': 0,
+        }
+
+        handler.configure(config)
+
+        assert handler.priority == PRIORITIES.index('background')
+
+    def test_configure_keeps_priority_when_unknown(self):
+        handler = Handler("foo", None, Mock(), priority='critical')
+        config = {
+            'handlers': {'foo': {'priority': 'urgent'}},
+            'bulkheads': {},
+            'request_timeout': 0,
+        }
+
+        handler.configure(config)
+
+        assert handler.priority == PRIORITIES.index('critical')
+
+    def test_configure_sets_timeout(self):
+        handler = Handler("foo", None, Mock(), timeout=120)
+        config = {'handlers': {}, 'bulkheads': {}, 'request_timeout': 30}
+
+        handler.configure(config)
+        assert handler.timeout == 120
+
+        config['handlers'] = {'foo': {'timeout': 5}}
+        handler.configure(config)
+        assert handler.timeout == 5
+
+    def test_configure_uses_request_timeout_by_default(self):
+        handler = Handler("foo", None, Mock())
+
+        handler.configure({'handlers': {}, 'bulkheads': {}, 'request_timeout': 30})
+
+        assert handler.timeout == 30
+
+    def test_configure_overrides_read_only(self):
+        handler = Handler("foo", None, Mock(), read_only=True)
+        config = {'handlers': {}, 'bulkheads': {}, 'request_timeout': 0}
+
+        handler.configure(config)
+        assert handler.read_only
+
+        config['handlers'] = {'foo': {'read_only': False}}
+        handler.configure(config)
+        assert not handler.read_only
+
+    @patch('wazo_agid.agid.session_scope', MagicMock())
+    def test_handle_sets_statement_timeout(self):
+        cursor = Mock()
+        handler = Handler("foo", None, Mock())
+        handler.timeout = 10
+
+        handler.handle(Mock(), cursor, [])
+
+        query = cursor.execute.call_args[0][0]
+        assert query.startswith('SET LOCAL statement_timeout')
+
+    @patch('wazo_agid.agid.session_scope', MagicMock())
+    def test_handle_raises_deadline_exceeded_for_errors_after_deadline(self):
+        def handle_fn(agi, cursor, args):
+            # e.g. a query cancelled by statement_timeout
+            threading.Event().wait(0.02)
+            raise ValueError('canceling statement due to statement timeout')
+
+        handler = Handler("foo", None, handle_fn)
+        handler.timeout = 0.01
+
+        self.assertRaises(DeadlineExceeded, handler.handle, Mock(), Mock(), [])
+
+    @patch('wazo_agid.agid.session_scope', MagicMock())
+    def test_hangup_aborts_handler(self):
+        def handle_fn(agi, cursor, args):
+            # called by the hangup monitor
+            agi.hangup_callback()
+            deadline.check()
+
+        agi, cursor = Mock(), Mock()
+        handler = Handler("foo", None, handle_fn)
+
+        self.assertRaises(FastAGIHangup, handler.handle, agi, cursor, [])
+        cursor.connection.cancel.assert_called_once_with()
+        assert agi.hangup_callback is None
+
+    def test_reload_calls_setup_function(self):
+        setup_function = Mock()
+        fake_cursor = object()
+
+        handler = Handler("foo", setup_function, Mock())
+        handler.reload(fake_cursor)
+
+        setup_function.assert_called_once_with(fake_cursor)
+
+
+class TestLazyHandler(TestCase):
+    def setUp(self):
+        self.handle_fn = Mock(__name__='foo')
+        self.setup_fn = Mock()
+        self.handler = Handler.lazy(
+            'foo',
+            {'module': 'foo_module', 'priority': 'critical', 'read_only': True},
+        )
+        patcher = patch.dict(agid._handlers, {'foo': self.handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _import_module(self, name):
+        agid.register(self.handle_fn, self.setup_fn)
+
+    def test_priority_is_known_before_import(self):
+        assert self.handler.priority == PRIORITIES.index('critical')
+        assert self.handler.read_only
+        assert not self.handler.loaded
+
+    @patch('wazo_agid.agid.session_scope', MagicMock())
+    def test_module_is_imported_and_setup_on_first_use(self):
+        cursor = Mock()
+
+        with patch('importlib.import_module', side_effect=self._import_module) as im:
+            self.handler.handle(Mock(), cursor, [])
+            self.handler.handle(Mock(), cursor, [])
+
+        im.assert_called_once_with('wazo_agid.modules.foo_module')
+        self.setup_fn.assert_called_once_with(cursor)
+        assert self.handle_fn.call_count == 2
+
+    def test_load_fails_when_module_does_not_register_handler(self):
+        with patch('importlib.import_module'):
+            self.assertRaises(RuntimeError, self.handler.load, Mock())
+
+        assert not self.handler.loaded
+
+    def test_register_modules_skips_disabled_modules(self):
+        handlers = {
+            'foo': {'module': 'foo_module'},
+            'bar': {'module': 'bar_module', 'priority': 'background'},
+        }
+        with patch.dict(agid._handlers, clear=True):
+            with patch.object(agid, 'HANDLERS', handlers):
+                agid.register_modules({'disabled_modules': ['foo_module']})
+
+            assert list(agid._handlers) == ['bar']
+            assert agid._handlers['bar'].module_name == 'bar_module'
+
+
+def _database() -> Database:
+    database = Database('postgresql://asterisk@localhost/asterisk')
+    database.pool = MagicMock()
+    return database
+
+
+class TestProcessRequest(TestCase):
+    def setUp(self):
+        self.database = _database()
+        server = Mock(database=self.database, config={'agi_success_verbose': False})
+        patcher = patch.object(agid, '_server', server)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _fagi(self, handle_fn):
+        patcher = patch.dict(agid._handlers, {'foo': Handler('foo', None, handle_fn)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return Mock(env={'agi_network_script': 'foo'}, variable_cache=None)
+
+    def test_no_database_connection_available(self):
+        fagi = self._fagi(lambda agi, cursor, args: cursor.execute('SELECT 1'))
+        self.database.pool.connection.side_effect = PoolTimeout(5)
+
+        agid.process_request(fagi)
+
+        fagi.set_variable.assert_called_once_with('WAZO_AGID_OVERLOAD', '1')
+        fagi.appexec.assert_called_once_with('Goto', 'agi_fail,s,1')
+
+    def test_connection_is_acquired_on_first_query(self):
+        fagi = self._fagi(lambda agi, cursor, args: cursor.execute('SELECT 1'))
+        connection = self.database.pool.connection.return_value.__enter__.return_value
+        cursor = connection.cursor.return_value.__enter__.return_value
+
+        agid.process_request(fagi)
+
+        self.database.pool.connection.assert_called_once_with()
+        cursor.execute.assert_called_once_with('SELECT 1')
+        connection.commit.assert_called_once_with()
+        fagi.appexec.assert_not_called()
+
+    def test_request_without_query_does_not_use_the_database(self):
+        fagi = self._fagi(lambda agi, cursor, args: agi.set_variable('FOO', '1'))
+
+        agid.process_request(fagi)
+
+        self.database.pool.connection.assert_not_called()
+        fagi.appexec.assert_not_called()
+
+
+class TestFailureResponse(TestCase):
+    def test_overload(self):
+        for error in (BulkheadFull('dird'), PoolTimeout(5)):
+            response = agid.failure_response(Mock(), error, 'foo')
+            assert response == agid.OVERLOAD_RESPONSE
+
+    def test_dial_plan_break(self):
+        error = FastAGIDialPlanBreak('no user')
+
+        response = agid.failure_response(Mock(), error, 'foo')
+
+        assert response == [('verbose', (error,)), *agid.FAIL_RESPONSE]
+
+    def test_hangup_is_not_answered(self):
+        agi = Mock(params={}, env={})
+
+        assert agid.failure_response(agi, FastAGIHangup(), 'foo') == []
+
+    def test_send_response_always_fails_the_agi(self):
+        fagi = Mock()
+        fagi.appexec.side_effect = BrokenPipeError()
+
+        agid.send_response(fagi, agid.OVERLOAD_RESPONSE)
+
+        fagi.set_variable.assert_called_once_with('WAZO_AGID_OVERLOAD', '1')
+        fagi.fail.assert_called_once_with()
+
+    def test_failed_deferred_command_does_not_prevent_the_failure(self):
+        # SET VARIABLE fails, Goto succeeds, and fail() is not answered
+        inf = io.BytesIO(b'510 Invalid or unknown command\n200 result=0\n')
+        outf = io.BytesIO()
+        fagi = FastAGI(inf, outf, {'agi_pipelining': True}, env={})
+        fagi.set_variable('FOO', 'bar')
+
+        agid.send_response(fagi, agid.FAIL_RESPONSE)
+
+        assert outf.getvalue().splitlines() == [
+            b'SET VARIABLE "FOO" "bar"',
+            b'EXEC Goto "agi_fail,s,1"',
+            b'failure to have pure code',
+        ]
+
+
+class TestIntake(TestCase):
+    def setUp(self):
+        self.server = Mock(config={})
+        self.server._has_expired.return_value = False
+        self.request, self.peer = socket.socketpair()
+        self.addCleanup(self.request.close)
+        self.addCleanup(self.peer.close)
+
+    @patch('wazo_agid.agid.ENV_TIMEOUT', 0.05)
+    def test_silent_peer_does_not_hold_the_worker(self):
+        connection = agid.AGIConnection(self.request, {})
+
+        agid.AGID._intake(self.server, connection, agid.PRIORITY_NORMAL)
+
+        self.server._close_request.assert_called_once_with(connection)
+        self.server._dispatch.assert_not_called()
+
+    def test_timeout_is_only_applied_to_the_environment(self):
+        self.peer.sendall(b'agi_network_script: foo\n\n')
+        connection = agid.AGIConnection(self.request, {})
+        self.server._tenant_of.return_value = None
+
+        agid.AGID._intake(self.server, connection, agid.PRIORITY_NORMAL)
+
+        self.server._dispatch.assert_called_once_with(connection)
+        assert self.request.gettimeout() is None
+
+
+class TestRecordVariableCache(TestCase):
+    def test_hits_and_misses_are_counted_per_handler(self):
+        cache = VariableCache()
+        cache.hits, cache.misses = 3, 2
+
+        agid._record_variable_cache('cache_test', cache)
+        agid._record_variable_cache('cache_test', cache)
+
+        values = metrics.snapshot()
+        assert values['handler.cache_test.variable_cache.hits'] == 6
+        assert values['handler.cache_test.variable_cache.misses'] == 4
+
+
+class TestChain(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.handlers = {
+            name: Handler(name, None, self._step(name))
+            for name in ('first', 'second', 'third')
+        }
+        self.handlers['third'].priority = PRIORITIES.index('critical')
+        patcher = patch.dict(agid._handlers, self.handlers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.cursor = Mock()
+        server = MagicMock()
+        server.config = {'agi_success_verbose': False}
+        request_cursor = server.database.request_cursor.return_value
+        request_cursor.__enter__.return_value = self.cursor
+        patcher = patch.object(agid, '_server', server)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _step(self, name):
+        def handle(agi, cursor, args):
+            self.calls.append((name, agi, cursor, args))
+            if getattr(self, 'querying', False):
+                cursor.execute(f'SELECT {name!r}')
+            if name in getattr(self, 'failing', ()):
+                raise Exception(f'{name} failed')
+
+        return handle
+
+    def _fagi(self, steps):
+        return Mock(
+            env={'agi_network_script': 'chain'},
+            params={'steps': steps},
+            args=['42'],
+            variable_cache=None,
+        )
+
+    def test_request_handler_names(self):
+        fagi = Mock(env={'agi_network_script': 'first'}, params={})
+        assert agid.request_handler_names(fagi) == ['first']
+
+        for steps in ('first,second', 'first second', ' first, second '):
+            fagi = self._fagi(steps)
+            assert agid.request_handler_names(fagi) == ['first', 'second']
+
+    def test_steps_share_the_request(self):
+        fagi = self._fagi('first third second')
+
+        agid.process_request(fagi)
+
+        assert self.calls == [
+            ('first', fagi, self.cursor, ['42']),
+            ('third', fagi, self.cursor, ['42']),
+            ('second', fagi, self.cursor, ['42']),
+        ]
+        agid._server.database.request_cursor.assert_called_once()
+        assert self.cursor.execute.call_args_list[-1].args == (
+            'RELEASE SAVEPOINT chain_step',
+        )
+        fagi.appexec.assert_not_called()
+
+    def test_failed_step_stops_the_chain(self):
+        self.failing = ('second',)
+        fagi = self._fagi('first second third')
+
+        agid.process_request(fagi)
+
+        assert [call[0] for call in self.calls] == ['first', 'second']
+        queries = [call.args[0] for call in self.cursor.execute.call_args_list]
+        assert queries == [
+            'SAVEPOINT chain_step',
+            'RELEASE SAVEPOINT chain_step',
+            'SAVEPOINT chain_step',
+            'ROLLBACK TO SAVEPOINT chain_step',
+        ]
+        fagi.appexec.assert_called_once_with('Goto', 'agi_fail,s,1')
+
+    def test_step_opening_the_transaction_rolls_it_back(self):
+        self.failing = ('first',)
+        self.querying = True
+        agid._server.database = database = _database()
+        connection = database.pool.connection.return_value.__enter__.return_value
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.connection = connection
+
+        agid.process_request(self._fagi('first second'))
+
+        assert [call[0] for call in self.calls] == ['first']
+        queries = [call.args[0] for call in cursor.execute.call_args_list]
+        assert queries == ["SELECT 'first'"]
+        connection.rollback.assert_called_once_with()
+
+    def test_steps_with_a_shared_dao_connection(self):
+        self.failing = ('second',)
+        self.querying = True
+        agid._server.database = database = _database()
+        database.dao_engine = Mock()
+        dao_connection = database.dao_engine.connect.return_value
+        savepoint = dao_connection.begin_nested.return_value
+        fagi = self._fagi('first second third')
+
+        with patch.object(agid, 'db_manager') as db_manager:
+            agid.process_request(fagi)
+
+        assert [call[0] for call in self.calls] == ['first', 'second']
+        session = db_manager.Session.registry.set.call_args.args[0]
+        assert isinstance(session, RequestSession)
+        assert session.get_bind() is dao_connection
+        # the first step began the transaction, the second one a savepoint
+        dao_connection.begin_nested.assert_called_once_with()
+        savepoint.rollback.assert_called_once_with()
+        savepoint.commit.assert_not_called()
+        fagi.appexec.assert_called_once_with('Goto', 'agi_fail,s,1')
+
+    def test_read_only_chain(self):
+        fagi = self._fagi('first second')
+        request_cursor = agid._server.database.request_cursor
+
+        agid.process_request(fagi)
+        assert request_cursor.call_args.kwargs['read_only'] is False
+
+        self.handlers['first'].read_only = self.handlers['second'].read_only = True
+        agid.process_request(fagi)
+        assert request_cursor.call_args.kwargs['read_only'] is True
+
+    def test_read_only_steps_do_not_use_savepoints(self):
+        self.failing = ('second',)
+        self.querying = True
+        agid._server.database = database = _database()
+        database.read_only_autocommit = True
+        connection = database.pool.connection.return_value.__enter__.return_value
+        cursor = connection.cursor.return_value.__enter__.return_value
+        for handler in self.handlers.values():
+            handler.read_only = True
+
+        agid.process_request(self._fagi('first second third'))
+
+        queries = [call.args[0] for call in cursor.execute.call_args_list]
+        assert "SELECT 'first'" in queries
+        assert not [query for query in queries if 'SAVEPOINT' in query]
+        connection.rollback.assert_not_called()
+        connection.commit.assert_not_called()
+
+    def test_unknown_step(self):
+        fagi = self._fagi('first unknown')
+
+        agid.process_request(fagi)
+
+        assert self.calls == []
+        fagi.appexec.assert_called_once_with('Goto', 'agi_fail,s,1')
+
+    def test_no_steps(self):
+        fagi = self._fagi('')
+
+        agid.process_request(fagi)
+
+        agid._server.database.request_cursor.assert_not_called()
+        fagi.appexec.assert_called_once_with('Goto', 'agi_fail,s,1')
+
+    def test_chain_has_the_highest_priority_of_its_steps(self):
+        server = Mock()
+
+        assert agid.AGID._priority_of(server, self._fagi('first,third')) == 0
+        assert agid.AGID._priority_of(server, self._fagi('first')) == 1
@@ -0,0 +1,324 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import queue
+import socket
+import socketserver
+import threading
+import time
+import unittest
+from urllib.parse import quote
+
+from hamcrest import assert_that, contains_exactly, equal_to, has_entries, is_, none
+
+from ..ami_transport import AMIConnection, AMITransport, session_env
+from ..fastagi import FastAGIResultHangup
+
+TIMEOUT = 2
+ENV = '''\
+agi_request: async
+agi_channel: PJSIP/abc-00000001
+agi_uniqueid: 1700000000.1
+agi_arg_1: incoming_user_set_features?tenant_uuid=t1
+agi_arg_2: 42
+agi_arg_3: x
+
+'''
+
+
+def wait_until(predicate) -> None:
+    end = time.monotonic() + TIMEOUT
+    while not predicate():
+        assert time.monotonic() < end
+        time.sleep(0.01)
+
+
+class FakeAMI(socketserver.ThreadingTCPServer):
+    """Logs in every client and records the actions they send"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), FakeAMIHandler)
+        self.actions: queue.Queue[dict[str, str]] = queue.Queue()
+        self.clients: list[FakeAMIHandler] = []
+        self.logged_in = threading.Condition()
+        self.accept_login = True
+
+    def wait_clients(self, count: int) -> None:
+        with self.logged_in:
+            assert self.logged_in.wait_for(lambda: len(self.clients) >= count, TIMEOUT)
+
+    def send_event(self, **headers: str) -> None:
+        for client in list(self.clients):
+            client.send(headers)
+
+    def next_action(self) -> dict[str, str]:
+        return self.actions.get(timeout=TIMEOUT)
+
+
+class FakeAMIHandler(socketserver.StreamRequestHandler):
+    server: FakeAMI
+
+    def send(self, headers: dict[str, str]) -> None:
+        data = ''.join(f'{key}: {value}\r\n' for key, value in headers.items())
+        self.wfile.write(f'{data}\r\n'.encode())
+
+    def read_message(self) -> dict[str, str]:
+        message = {}
+        for line in self.rfile:
+            line = line.rstrip(b'\r\n')
+            if not line:
+                return message
+            key, _, value = line.decode().partition(': ')
+            message[key] = value
+        return message
+
+    def handle(self) -> None:
+        self.wfile.write(b'Asterisk Call Manager/9.0.0\r\n')
+        login = self.read_message()
+        if not self.server.accept_login or login.get('Action') != 'Login':
+            self.send({'Response': 'Error', 'Message': 'Authentication failed'})
+            return
+        self.send({'Response': 'Success', 'ActionID': login['ActionID']})
+        with self.server.logged_in:
+            self.server.clients.append(self)
+            self.server.logged_in.notify_all()
+        while message := self.read_message():
+            self.server.actions.put(message)
+            self.send({'Response': 'Success', 'ActionID': message['ActionID']})
+
+
+class TestSessionEnv(unittest.TestCase):
+    def test_handler_is_the_first_argument(self):
+        env = {'agi_request': 'async', 'agi_arg_1': 'handler', 'agi_arg_2': 'a'}
+
+        assert_that(
+            session_env(env),
+            has_entries(
+                agi_network_script='handler', agi_arg_1='a', agi_request='async'
+            ),
+        )
+        assert 'agi_arg_2' not in session_env(env)
+
+    def test_no_handler(self):
+        assert_that(session_env({'agi_request': 'async'}), is_(none()))
+
+
+class TestAMITransport(unittest.TestCase):
+    def setUp(self):
+        self.ami = FakeAMI()
+        threading.Thread(
+            target=self.ami.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        self.addCleanup(self.ami.server_close)
+        self.addCleanup(self.ami.shutdown)
+        self.sessions: queue.Queue = queue.Queue()
+        host, port = self.ami.server_address
+        self.ami_config = {
+            'host': host,
+            'port': port,
+            'username': 'wazo_agid',
+            'password': 'secret',
+            'connections': 1,
+            'reconnect_interval': 0.05,
+        }
+
+    def start(self, connections: int = 1) -> AMITransport:
+        self.ami_config['connections'] = connections
+        transport = AMITransport(self.ami_config, {}, self.sessions.put)
+        transport.start()
+        self.addCleanup(transport.stop)
+        self.ami.wait_clients(connections)
+        for connection in transport.connections:
+            assert connection.connected.wait(TIMEOUT)
+        return transport
+
+    def start_session(self, channel='PJSIP/abc-00000001', **headers):
+        self.ami.send_event(
+            Event='AsyncAGIStart',
+            Channel=channel,
+            Uniqueid='1700000000.1',
+            Env=quote(ENV),
+            **headers,
+        )
+        return self.sessions.get(timeout=TIMEOUT)
+
+    def test_session_environment(self):
+        self.start()
+
+        session = self.start_session()
+
+        assert_that(session.channel, equal_to('PJSIP/abc-00000001'))
+        assert_that(
+            session.fagi.env,
+            has_entries(
+                agi_network_script='incoming_user_set_features',
+                agi_channel='PJSIP/abc-00000001',
+            ),
+        )
+        assert_that(session.fagi.args, contains_exactly('42', 'x'))
+        assert_that(session.fagi.params, has_entries(tenant_uuid='t1'))
+
+    def test_commands_are_sent_as_agi_actions(self):
+        self.start()
+        session = self.start_session()
+        values = queue.Queue()
+        threading.Thread(
+            target=lambda: values.put(session.fagi.get_variable('XIVO_USERID'))
+        ).start()
+
+        action = self.ami.next_action()
+        assert_that(
+            action,
+            has_entries(
+                Action='AGI',
+                Channel='PJSIP/abc-00000001',
+                Command='GET VARIABLE "XIVO_USERID"',
+            ),
+        )
+        self.ami.send_event(
+            Event='AsyncAGIExec',
+            Channel='PJSIP/abc-00000001',
+            CommandID=action['CommandID'],
+            Result=quote('200 result=1 (42)\n'),
+        )
+
+        assert_that(values.get(timeout=TIMEOUT), equal_to('42'))
+
+    def test_old_asyncagi_events(self):
+        self.start()
+        self.ami.send_event(
+            Event='AsyncAGI',
+            SubEvent='Start',
+            Channel='PJSIP/abc-00000001',
+            Uniqueid='1700000000.1',
+            Env=quote(ENV),
+        )
+        session = self.sessions.get(timeout=TIMEOUT)
+
+        self.ami.send_event(
+            Event='AsyncAGI', SubEvent='End', Channel='PJSIP/abc-00000001'
+        )
+
+        wait_until(lambda: session.ended)
+        self.assertRaises(FastAGIResultHangup, session.fagi.get_result)
+
+    def test_end_notifies_the_hangup(self):
+        self.start()
+        session = self.start_session()
+
+        self.ami.send_event(Event='AsyncAGIEnd', Channel='PJSIP/abc-00000001')
+
+        wait_until(lambda: session.fagi.hungup)
+        self.assertRaises(BrokenPipeError, session.fagi.send_command, 'NOOP')
+
+    def test_end_while_waiting_for_a_result(self):
+        self.start()
+        session = self.start_session()
+        values = queue.Queue()
+        threading.Thread(
+            target=lambda: values.put(session.fagi.get_variable('XIVO_USERID'))
+        ).start()
+        self.ami.next_action()
+
+        self.ami.send_event(Event='AsyncAGIEnd', Channel='PJSIP/abc-00000001')
+
+        assert_that(values.get(timeout=TIMEOUT), equal_to('hangup'))
+
+    def test_close_breaks_the_asyncagi(self):
+        self.start()
+        session = self.start_session()
+
+        session.close()
+
+        assert_that(self.ami.next_action(), has_entries(Command='ASYNCAGI BREAK'))
+
+    def test_reject_sends_the_channel_to_agi_fail(self):
+        self.start()
+        session = self.start_session()
+
+        session.reject()
+
+        commands = [self.ami.next_action()['Command'] for _ in range(3)]
+        assert_that(
+            commands,
+            contains_exactly(
+                'SET VARIABLE WAZO_AGID_OVERLOAD 1',
+                'EXEC Goto agi_fail,s,1',
+                'ASYNCAGI BREAK',
+            ),
+        )
+
+    def test_session_without_handler_is_ended(self):
+        self.start()
+
+        self.ami.send_event(
+            Event='AsyncAGIStart',
+            Channel='PJSIP/abc-00000001',
+            Uniqueid='1700000000.1',
+            Env=quote('agi_request: async\n\n'),
+        )
+
+        assert_that(self.ami.next_action(), has_entries(Command='ASYNCAGI BREAK'))
+        assert self.sessions.empty()
+
+    def test_header_injection(self):
+        self.start()
+        session = self.start_session()
+
+        session.fagi.outf.write(b'VERBOSE "a\rAction: Logoff" 1\n')
+        session.fagi.outf.flush()
+
+        action = self.ami.next_action()
+        assert_that(action, has_entries(Command='VERBOSE "a Action: Logoff" 1'))
+
+    def test_sessions_are_shared_by_the_connections(self):
+        transport = self.start(connections=2)
+
+        for i in range(20):
+            self.ami.send_event(
+                Event='AsyncAGIStart',
+                Channel=f'PJSIP/abc-{i:08d}',
+                Uniqueid=f'1700000000.{i}',
+                Env=quote(ENV),
+            )
+        sessions = [self.sessions.get(timeout=TIMEOUT) for _ in range(20)]
+
+        # each session is handled by a single connection
+        assert_that(len({session.channel for session in sessions}), equal_to(20))
+        counts = [c.session_count for c in transport.connections]
+        assert sum(counts) == 20
+        assert all(counts)
+
+    def test_reconnects(self):
+        transport = self.start()
+        session = self.start_session()
+        connection = transport.connections[0]
+
+        clients, self.ami.clients = self.ami.clients, []
+        for client in clients:
+            client.connection.shutdown(socket.SHUT_RDWR)
+
+        self.ami.wait_clients(1)
+        assert connection.connected.wait(TIMEOUT)
+        assert session.fagi.hungup
+
+
+class TestAMIConnectionLogin(unittest.TestCase):
+    def test_login_failure(self):
+        ami = FakeAMI()
+        ami.accept_login = False
+        threading.Thread(target=ami.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(ami.server_close)
+        self.addCleanup(ami.shutdown)
+        host, port = ami.server_address
+        connection = AMIConnection(
+            0, 1, {'host': host, 'port': port}, {}, lambda session: None
+        )
+
+        self.assertRaises(ConnectionError, connection._serve)
+        connection._disconnected()
@@ -0,0 +1,87 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import signal
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock, Mock, call, patch
+
+from hamcrest import assert_that, contains_exactly
+
+from .. import agid
+from ..async_agid import AsyncAGID, process_request_async
+from ..bulkhead import BulkheadFull
+from ..database import PoolTimeout
+
+
+class TestProcessRequestAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = MagicMock(config={'agi_success_verbose': False})
+        patcher = patch.object(agid, '_server', self.server)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.agi = AsyncMock(args=[], params={}, env={})
+        self.handler = Mock(handler_name='foo', read_only=False)
+        self.handler.handle_async = AsyncMock()
+
+    async def test_success_is_only_reported_when_configured(self):
+        await process_request_async(self.agi, self.handler)
+        self.agi.verbose.assert_not_called()
+
+        self.server.config['agi_success_verbose'] = True
+        await process_request_async(self.agi, self.handler)
+        self.agi.verbose.assert_called_once_with(
+            "AGI handler 'foo' successfully executed"
+        )
+
+    async def test_overload_is_flagged(self):
+        for error in (BulkheadFull('dird'), PoolTimeout(5)):
+            self.agi.reset_mock()
+            self.handler.handle_async.side_effect = error
+
+            await process_request_async(self.agi, self.handler)
+
+            assert_that(
+                self.agi.mock_calls,
+                contains_exactly(
+                    call.set_variable('WAZO_AGID_OVERLOAD', '1'),
+                    call.appexec('Goto', 'agi_fail,s,1'),
+                    call.fail(),
+                ),
+            )
+
+
+class TestAsyncAGID(unittest.TestCase):
+    def setUp(self):
+        for signum in (signal.SIGHUP, signal.SIGUSR1, signal.SIGTERM):
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        config = {
+            'db_uri': 'postgresql://asterisk@localhost/asterisk',
+            'listen_address': '127.0.0.1',
+            'listen_port': 0,
+            'listen_backlog': 16,
+            'max_workers': 2,
+            'drain_timeout': 1,
+            'processes': 1,
+        }
+        with patch.object(agid, 'wait_for_database'):
+            self.server = AsyncAGID(config)
+
+    def test_reload_is_handled_before_serving(self):
+        assert signal.getsignal(signal.SIGHUP) is agid.sighup_handle
+
+    def test_stop_before_serving(self):
+        self.server.stop()
+
+        self.server.serve_forever()
+
+    def test_stop_while_serving(self):
+        stop = threading.Timer(0.1, self.server.stop)
+        stop.start()
+
+        self.server.serve_forever()
+
+        stop.join()
+        assert self.server._stop_requested
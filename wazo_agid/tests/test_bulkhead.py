@@ -0,0 +1,75 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import threading
+import unittest
+
+from hamcrest import assert_that, calling, equal_to, raises
+
+from ..bulkhead import Bulkhead, BulkheadFull
+
+
+class TestBulkhead(unittest.TestCase):
+    def test_acquire_under_limit(self):
+        bulkhead = Bulkhead('test', max_concurrent=2)
+
+        with bulkhead.acquire():
+            with bulkhead.acquire():
+                pass
+
+    def test_acquire_fails_fast_when_full(self):
+        bulkhead = Bulkhead('test', max_concurrent=1)
+
+        with bulkhead.acquire():
+            assert_that(calling(self._enter).with_args(bulkhead), raises(BulkheadFull))
+
+        self._enter(bulkhead)
+
+    def test_acquire_waits_for_a_slot(self):
+        bulkhead = Bulkhead('test', max_concurrent=1, max_wait=5)
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with bulkhead.acquire():
+                acquired.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        acquired.wait()
+        threading.Timer(0.05, release.set).start()
+
+        self._enter(bulkhead)
+        holder.join()
+
+    def test_acquire_times_out(self):
+        bulkhead = Bulkhead('test', max_concurrent=1, max_wait=0.01)
+
+        with bulkhead.acquire():
+            assert_that(calling(self._enter).with_args(bulkhead), raises(BulkheadFull))
+
+    def test_non_blocking_acquire_does_not_wait(self):
+        bulkhead = Bulkhead('test', max_concurrent=1, max_wait=5)
+
+        with bulkhead.acquire():
+            assert_that(
+                calling(self._enter).with_args(bulkhead, blocking=False),
+                raises(BulkheadFull),
+            )
+
+    def test_from_config(self):
+        bulkhead = Bulkhead.from_config(
+            'dird', {'max_concurrent': 3, 'max_wait': '0.5', 'skip_when_full': True}
+        )
+
+        assert_that(bulkhead.max_concurrent, equal_to(3))
+        assert_that(bulkhead.max_wait, equal_to(0.5))
+        assert_that(bulkhead.skip_when_full, equal_to(True))
+
+    @staticmethod
+    def _enter(bulkhead, blocking=True):
+        with bulkhead.acquire(blocking):
+            pass
@@ -0,0 +1,118 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import unittest
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, equal_to, is_, none
+
+from .. import call_context, metrics
+from ..call_context import MAX_ENTRIES_PER_CALL, CallContextStore
+
+
+def _agi(uniqueid='1700000000.1', **params):
+    return Mock(env={'agi_uniqueid': uniqueid}, params=params)
+
+
+class TestCallContextStore(unittest.TestCase):
+    def setUp(self):
+        self.store = CallContextStore(ttl=10, max_calls=2)
+
+    def test_get_set(self):
+        assert_that(self.store.get('call', 'key'), is_(none()))
+
+        self.store.set('call', 'key', 'value')
+
+        assert_that(self.store.get('call', 'key'), equal_to('value'))
+        assert_that(self.store.get('other', 'key'), is_(none()))
+
+    def test_hits_and_misses_are_counted(self):
+        before = metrics.snapshot()
+        self.store.set('call', 'key', 'value')
+
+        self.store.get('call', 'key')
+        self.store.get('call', 'other')
+        self.store.get('call', 'other')
+
+        after = metrics.snapshot()
+        assert after['call_context.hits'] - before.get('call_context.hits', 0) == 1
+        assert after['call_context.misses'] - before.get('call_context.misses', 0) == 2
+
+    def test_expiry(self):
+        with patch('time.monotonic', return_value=100):
+            self.store.set('call', 'key', 'value')
+
+        with patch('time.monotonic', return_value=109):
+            assert_that(self.store.get('call', 'key'), equal_to('value'))
+        with patch('time.monotonic', return_value=110):
+            assert_that(self.store.get('call', 'key'), is_(none()))
+
+        assert len(self.store) == 0
+
+    def test_expired_calls_are_dropped_on_set(self):
+        with patch('time.monotonic', return_value=100):
+            self.store.set('call', 'key', 'value')
+        with patch('time.monotonic', return_value=111):
+            self.store.set('other', 'key', 'value')
+
+        assert len(self.store) == 1
+
+    def test_oldest_calls_are_dropped(self):
+        for call in ('first', 'second', 'third'):
+            self.store.set(call, 'key', call)
+
+        assert len(self.store) == 2
+        assert_that(self.store.get('first', 'key'), is_(none()))
+        assert_that(self.store.get('third', 'key'), equal_to('third'))
+
+    def test_entries_per_call_are_limited(self):
+        for i in range(MAX_ENTRIES_PER_CALL + 1):
+            self.store.set('call', i, i)
+
+        assert_that(self.store.get('call', 0), is_(none()))
+        assert_that(
+            self.store.get('call', MAX_ENTRIES_PER_CALL),
+            equal_to(MAX_ENTRIES_PER_CALL),
+        )
+
+    def test_evict(self):
+        self.store.set('call', 'key', 'value')
+
+        self.store.evict('call')
+        self.store.evict('unknown')
+
+        assert_that(self.store.get('call', 'key'), is_(none()))
+
+
+class TestCallContext(unittest.TestCase):
+    def setUp(self):
+        call_context.configure({'enabled': True, 'ttl': 10, 'max_calls': 10})
+        self.addCleanup(call_context.configure, {})
+
+    def test_disabled(self):
+        call_context.configure({'enabled': False})
+
+        call_context.store(_agi(), 'key', 'value')
+
+        assert_that(call_context.lookup(_agi(), 'key'), is_(none()))
+
+    def test_requests_of_the_same_channel(self):
+        call_context.store(_agi(), 'key', 'value')
+
+        assert_that(call_context.lookup(_agi(), 'key'), equal_to('value'))
+        assert_that(call_context.lookup(_agi('1700000000.2'), 'key'), is_(none()))
+
+    def test_linkedid_parameter(self):
+        call_context.store(_agi('1700000000.1', linkedid='1700000000.1'), 'k', 'v')
+
+        agi = _agi('1700000000.2', linkedid='1700000000.1')
+        assert_that(call_context.lookup(agi, 'k'), equal_to('v'))
+
+    def test_evict(self):
+        call_context.store(_agi(), 'key', 'value')
+
+        call_context.evict(_agi())
+
+        assert_that(call_context.lookup(_agi(), 'key'), is_(none()))
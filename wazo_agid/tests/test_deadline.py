@@ -0,0 +1,88 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import unittest
+from unittest.mock import Mock
+
+from hamcrest import assert_that, calling, close_to, less_than_or_equal_to, raises
+
+from .. import deadline
+from ..deadline import DeadlineExceeded
+
+
+class TestDeadline(unittest.TestCase):
+    def test_no_deadline_outside_of_a_request(self):
+        assert deadline.current() is None
+        assert deadline.remaining() is None
+        deadline.check()
+
+    def test_deadline_is_reset_after_the_request(self):
+        with deadline.deadline(10) as request_deadline:
+            assert deadline.current() is request_deadline
+            assert_that(deadline.remaining(), close_to(10, 0.5))
+
+        assert deadline.current() is None
+
+    def test_zero_timeout_means_no_time_limit(self):
+        cursor = Mock()
+
+        with deadline.deadline(0) as request_deadline:
+            assert not request_deadline.limited
+            deadline.check()
+            deadline.set_statement_timeout(cursor)
+
+        cursor.execute.assert_not_called()
+
+    def test_cancel_raises_error_on_check(self):
+        with deadline.deadline(0) as request_deadline:
+            request_deadline.cancel(ValueError('hangup'))
+
+            assert_that(calling(deadline.check), raises(ValueError, 'hangup'))
+
+    def test_check_raises_when_expired(self):
+        with deadline.deadline(-1):
+            assert_that(calling(deadline.check), raises(DeadlineExceeded))
+
+    def test_set_statement_timeout(self):
+        cursor = Mock()
+
+        deadline.set_statement_timeout(cursor)
+        cursor.execute.assert_not_called()
+
+        with deadline.deadline(2):
+            deadline.set_statement_timeout(cursor)
+
+        query = cursor.execute.call_args[0][0]
+        assert query.startswith('SET LOCAL statement_timeout = ')
+        assert_that(int(query.split('= ')[1]), less_than_or_equal_to(2000))
+
+    def test_limit_client_timeout(self):
+        request = Mock()
+        client = Mock(timeout=10)
+        client.session.return_value = Mock(request=request)
+        deadline.limit_client_timeout(client)
+
+        with deadline.deadline(2):
+            client.session().request('GET', 'http://localhost')
+
+        assert_that(request.call_args[1]['timeout'], less_than_or_equal_to(2))
+
+    def test_limit_client_timeout_keeps_shorter_client_timeout(self):
+        request = Mock()
+        client = Mock(timeout=1)
+        client.session.return_value = Mock(request=request)
+        deadline.limit_client_timeout(client)
+
+        with deadline.deadline(20):
+            client.session().request('GET', 'http://localhost')
+
+        assert request.call_args[1]['timeout'] == 1
+
+    def test_limit_client_timeout_raises_when_expired(self):
+        client = Mock(timeout=10)
+        deadline.limit_client_timeout(client)
+
+        with deadline.deadline(-1):
+            assert_that(calling(client.session), raises(DeadlineExceeded))
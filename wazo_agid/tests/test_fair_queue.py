@@ -0,0 +1,80 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import unittest
+
+from hamcrest import assert_that, equal_to, none
+
+from ..fair_queue import FairQueue, FlowPolicy
+
+
+class TestFairQueue(unittest.TestCase):
+    def setUp(self):
+        self.queue = FairQueue()
+
+    def _pop_all(self):
+        items = []
+        while entry := self.queue.pop():
+            items.append(entry[1])
+        return items
+
+    def test_fifo_within_a_flow(self):
+        for i in range(3):
+            self.queue.append(i, 'a')
+
+        assert_that(self._pop_all(), equal_to([0, 1, 2]))
+
+    def test_flows_are_interleaved(self):
+        for i in range(4):
+            self.queue.append(f'a{i}', 'a')
+        self.queue.append('b0', 'b')
+        self.queue.append('b1', 'b')
+
+        assert_that(self._pop_all(), equal_to(['a0', 'b0', 'a1', 'b1', 'a2', 'a3']))
+
+    def test_weights(self):
+        for i in range(4):
+            self.queue.append(f'a{i}', 'a', weight=2)
+            self.queue.append(f'b{i}', 'b', weight=1)
+
+        result = self._pop_all()[:6]
+
+        assert_that(sorted(result), equal_to(['a0', 'a1', 'a2', 'a3', 'b0', 'b1']))
+
+    def test_idle_flow_does_not_keep_credit(self):
+        self.queue.append('a0', 'a')
+        self.queue.pop()
+        for i in range(3):
+            self.queue.append(f'b{i}', 'b')
+        self.queue.pop()
+        self.queue.pop()
+        self.queue.append('a1', 'a')
+
+        assert_that(self._pop_all(), equal_to(['a1', 'b2']))
+
+    def test_ineligible_flows_are_skipped(self):
+        self.queue.append('a0', 'a')
+        self.queue.append('b0', 'b')
+
+        assert_that(self.queue.pop(lambda flow: flow != 'a'), equal_to(('b', 'b0')))
+        assert_that(self.queue.pop(lambda flow: flow != 'a'), none())
+        assert_that(len(self.queue), equal_to(1))
+
+
+class TestFlowPolicy(unittest.TestCase):
+    def test_from_config(self):
+        config = {
+            'default_weight': 2,
+            'default_max_concurrent': 4,
+            'tenants': {'abc': {'weight': 5, 'max_concurrent': 0}},
+        }
+
+        policy = FlowPolicy.from_config(config)
+
+        assert_that(policy.weight('abc'), equal_to(5))
+        assert_that(policy.max_concurrent('abc'), equal_to(0))
+        assert_that(policy.weight('other'), equal_to(2))
+        assert_that(policy.max_concurrent('other'), equal_to(4))
+        assert_that(policy.max_concurrent(None), equal_to(0))
@@ -0,0 +1,521 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import asyncio
+import io
+import unittest
+from unittest.mock import Mock, call, patch
+
+from hamcrest import (
+    assert_that,
+    calling,
+    contains_exactly,
+    equal_to,
+    has_entries,
+    raises,
+)
+
+from .. import deadline
+from ..deadline import DeadlineExceeded
+from ..fastagi import (
+    MAX_MSET_ARGUMENTS,
+    MAX_MSET_PAIRS,
+    AsyncFastAGI,
+    FastAGI,
+    FastAGIAppError,
+    FastAGIInvalidCommand,
+    FastAGIResultHangup,
+    FastAGIUsageError,
+)
+
+ENV = b'''\
+agi_network: yes
+agi_network_script: foobar
+agi_channel: PJSIP/abc-0001
+agi_arg_1: one
+agi_arg_2: two
+
+'''
+
+
+def build_agi(responses: bytes = b'') -> tuple[FastAGI, io.BytesIO]:
+    outf = io.BytesIO()
+    agi = FastAGI(io.BytesIO(ENV + responses), outf, {})  # type: ignore[arg-type]
+    return agi, outf
+
+
+def build_pipelined_agi(responses: bytes = b'') -> tuple[FastAGI, io.BytesIO]:
+    outf = io.BytesIO()
+    config = {'agi_pipelining': True}
+    agi = FastAGI(io.BytesIO(ENV + responses), outf, config)  # type: ignore[arg-type]
+    return agi, outf
+
+
+def build_coalescing_agi(responses: bytes = b'') -> tuple[FastAGI, io.BytesIO]:
+    outf = io.BytesIO()
+    config = {'agi_coalesce_writes': True}
+    agi = FastAGI(io.BytesIO(ENV + responses), outf, config)  # type: ignore[arg-type]
+    return agi, outf
+
+
+class TestFastAGI(unittest.TestCase):
+    def test_env_and_args(self):
+        agi, _ = build_agi()
+
+        assert_that(
+            agi.env,
+            has_entries(
+                agi_network_script='foobar',
+                agi_channel='PJSIP/abc-0001',
+            ),
+        )
+        assert_that(agi.args, equal_to(['one', 'two']))
+
+    def test_env_is_read_from_the_buffer(self):
+        inf = io.BufferedReader(io.BytesIO(ENV + b'200 result=1 (bar)\n'))
+
+        agi = FastAGI(inf, io.BytesIO(), {})  # type: ignore[arg-type]
+
+        assert_that(agi.env, equal_to(build_agi()[0].env))
+        assert_that(agi.get_variable('FOO'), equal_to('bar'))
+
+    def test_env_without_blank_line(self):
+        inf = io.BufferedReader(io.BytesIO(b'agi_network_script: foo\nagi_arg_1:'))
+
+        agi = FastAGI(inf, io.BytesIO(), {})  # type: ignore[arg-type]
+
+        assert_that(agi.env, equal_to({'agi_network_script': 'foo', 'agi_arg_1': ''}))
+
+    def test_preloaded_env(self):
+        env = {'agi_network_script': 'foobar', 'agi_arg_1': 'one'}
+        inf = io.BytesIO()
+
+        agi = FastAGI(inf, io.BytesIO(), {}, env=env)  # type: ignore[arg-type]
+
+        assert_that(agi.env, equal_to(env))
+        assert_that(agi.args, equal_to(['one']))
+        assert_that(inf.tell(), equal_to(0))
+
+    def test_url_params_are_removed_from_script(self):
+        env = {'agi_network_script': 'foobar?tenant_uuid=abc&x=1'}
+
+        agi = FastAGI(io.BytesIO(), io.BytesIO(), {}, env=env)  # type: ignore[arg-type]
+
+        assert_that(agi.env['agi_network_script'], equal_to('foobar'))
+        assert_that(agi.params, equal_to({'tenant_uuid': 'abc', 'x': '1'}))
+
+    def test_get_variable(self):
+        agi, outf = build_agi(b'200 result=1 (bar)\n')
+
+        result = agi.get_variable('FOO')
+
+        assert_that(result, equal_to('bar'))
+        assert_that(outf.getvalue(), equal_to(b'GET VARIABLE "FOO"\n'))
+
+    def test_get_variable_hangup(self):
+        agi, _ = build_agi(b'200 result=1 (hangup)\n')
+
+        assert_that(agi.get_variable('FOO'), equal_to('hangup'))
+
+    def test_get_variables(self):
+        agi, outf = build_agi(b'200 result=1 (bar,a%2Cb%20c,;)\n')
+
+        result = agi.get_variables(['FOO', 'BAR', 'EMPTY'])
+
+        assert_that(result, equal_to({'FOO': 'bar', 'BAR': 'a,b c', 'EMPTY': ''}))
+        assert_that(
+            outf.getvalue(),
+            equal_to(
+                b'GET FULL VARIABLE "${URIENCODE(${FOO})},${URIENCODE(${BAR})},'
+                b'${URIENCODE(${EMPTY})};"\n'
+            ),
+        )
+
+    @patch('wazo_agid.fastagi.MAX_VARIABLES_EXPRESSION', 60)
+    def test_get_variables_batches_long_expressions(self):
+        agi, outf = build_agi(b'200 result=1 (a,b,c;)\n200 result=1 (d;)\n')
+
+        result = agi.get_variables(['A', 'B', 'C', 'D'])
+
+        assert_that(result, equal_to({'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}))
+        assert_that(outf.getvalue().count(b'GET FULL VARIABLE'), equal_to(2))
+
+    def test_get_variables_truncated(self):
+        agi, outf = build_agi(
+            b'200 result=1 (bar,trunc)\n200 result=1 (bar)\n200 result=1 (baz)\n'
+        )
+
+        result = agi.get_variables(['FOO', 'BAR'])
+
+        assert_that(result, equal_to({'FOO': 'bar', 'BAR': 'baz'}))
+        assert_that(outf.getvalue().count(b'GET VARIABLE'), equal_to(2))
+
+    def test_get_variables_hangup(self):
+        agi, _ = build_agi(b'200 result=1 (hangup)\n')
+
+        result = agi.get_variables(['FOO', 'BAR'])
+
+        assert_that(result, equal_to({'FOO': 'hangup', 'BAR': 'hangup'}))
+
+    def test_set_variables(self):
+        agi, outf = build_agi(b'200 result=0\n')
+
+        agi.set_variables({'A': '1', 'B': 'x,y"(z)\\', '__C': 2})
+
+        # Escaped for MSet, then quoted for AGI
+        assert_that(
+            outf.getvalue().decode(),
+            equal_to(r'EXEC MSet "A=1,B=x\\,y\\\"\\(z\\)\\\\,__C=2"' + '\n'),
+        )
+
+    def test_set_variables_functions_are_set_in_order(self):
+        agi, outf = build_agi(b'200 result=0\n' * 4)
+
+        agi.set_variables(
+            {'A': '1', 'CALLERID(num)': '1234', 'B': '"quoted"', 'C': '3', 'D': '4'}
+        )
+
+        assert_that(
+            outf.getvalue().decode().splitlines(),
+            contains_exactly(
+                'SET VARIABLE "A" "1"',
+                'SET VARIABLE "CALLERID(num)" "1234"',
+                'SET VARIABLE "B" "\\"quoted\\""',
+                'EXEC MSet "C=3,D=4"',
+            ),
+        )
+
+    @patch('wazo_agid.fastagi.MAX_MSET_ARGUMENTS', 8)
+    def test_set_variables_batches_long_arguments(self):
+        agi, outf = build_agi(b'200 result=0\n' * 2)
+
+        agi.set_variables({'A': '1', 'B': '2', 'C': '3'})
+
+        assert_that(
+            outf.getvalue().decode().splitlines(),
+            contains_exactly('EXEC MSet "A=1,B=2"', 'SET VARIABLE "C" "3"'),
+        )
+
+    def test_set_variables_batches_many_variables(self):
+        agi, outf = build_agi(b'200 result=0\n' * 2)
+        variables = {f'V{i}': '1' for i in range(150)}
+
+        agi.set_variables(variables)
+
+        commands = outf.getvalue().decode().splitlines()
+        assert_that(
+            [command.count('=') for command in commands],
+            contains_exactly(MAX_MSET_PAIRS, 150 - MAX_MSET_PAIRS),
+        )
+        assert all(len(command) < MAX_MSET_ARGUMENTS for command in commands)
+
+    def test_get_result(self):
+        responses = [
+            (b'200 result=0\n', ('0', '')),
+            (b'200 result=1 (a) (b)\r\n', ('1', 'a) (b')),
+            (b'200 result=1 ()\n', ('1', '')),
+            (b'200 result=1  (spaces)\n', ('1', 'spaces')),
+        ]
+        for response, expected in responses:
+            agi, _ = build_agi(response)
+
+            assert_that(agi.get_result(), equal_to({'result': expected}))
+
+    def test_get_result_with_other_values(self):
+        agi, _ = build_agi(b'200 result=0 (timeout) endpos=1234\n')
+
+        assert_that(
+            agi.get_result(),
+            equal_to({'result': ('0', 'timeout'), 'endpos': ('1234', '')}),
+        )
+
+    def test_execute_result_hangup(self):
+        agi, _ = build_agi(b'200 result=1 (hangup)\n')
+
+        assert_that(calling(agi.execute).with_args('NOOP'), raises(FastAGIResultHangup))
+
+    def test_execute_app_error(self):
+        agi, _ = build_agi(b'200 result=-1\n')
+
+        assert_that(calling(agi.execute).with_args('NOOP'), raises(FastAGIAppError))
+
+    def test_execute_invalid_command(self):
+        agi, _ = build_agi(b'510 Invalid or unknown command\n')
+
+        assert_that(
+            calling(agi.execute).with_args('FOO'), raises(FastAGIInvalidCommand)
+        )
+
+    def test_execute_usage(self):
+        agi, _ = build_agi(b'520-Invalid command syntax.\nUsage: foo\n520 End\n')
+
+        assert_that(calling(agi.execute).with_args('FOO'), raises(FastAGIUsageError))
+
+    def test_execute_after_deadline(self):
+        agi, outf = build_agi(b'200 result=1\n')
+
+        with deadline.deadline(-1):
+            assert_that(calling(agi.execute).with_args('FOO'), raises(DeadlineExceeded))
+
+        assert_that(outf.getvalue(), equal_to(b''))
+
+
+class TestPipelinedFastAGI(unittest.TestCase):
+    def test_deferred_commands_are_sent_with_next_command(self):
+        agi, outf = build_pipelined_agi(
+            b'200 result=1\n200 result=1\n200 result=1 (bar)\n'
+        )
+
+        agi.set_variable('A', '1')
+        agi.verbose('hello')
+        assert_that(outf.getvalue(), equal_to(b''))
+
+        value = agi.get_variable('FOO')
+
+        assert_that(value, equal_to('bar'))
+        assert_that(
+            outf.getvalue(),
+            equal_to(b'SET VARIABLE "A" "1"\nVERBOSE "hello" 1\nGET VARIABLE "FOO"\n'),
+        )
+
+    def test_flush(self):
+        agi, outf = build_pipelined_agi(b'200 result=1\n')
+        agi.set_variable('A', '1')
+
+        agi.flush()
+        agi.flush()
+
+        assert_that(outf.getvalue(), equal_to(b'SET VARIABLE "A" "1"\n'))
+
+    def test_deferred_command_error_is_attributed(self):
+        agi, _ = build_pipelined_agi(
+            b'510 Invalid or unknown command\n200 result=1 (bar)\n'
+        )
+        agi.execute_deferred('FOO')
+
+        assert_that(
+            calling(agi.get_variable).with_args('BAR'),
+            raises(FastAGIInvalidCommand),
+        )
+
+    def test_responses_stay_in_sync_after_error(self):
+        agi, _ = build_pipelined_agi(
+            b'510 Invalid or unknown command\n200 result=1\n200 result=1 (baz)\n'
+        )
+        agi.execute_deferred('FOO')
+        agi.set_variable('A', '1')
+
+        try:
+            agi.flush()
+        except FastAGIInvalidCommand as e:
+            assert_that(
+                e.__notes__, equal_to(["in response to the deferred command 'FOO'"])
+            )
+        else:
+            self.fail('FastAGIInvalidCommand not raised')
+
+        assert_that(agi.get_variable('BAZ'), equal_to('baz'))
+
+    def test_not_pipelined_by_default(self):
+        agi, outf = build_agi(b'200 result=1\n')
+
+        agi.set_variable('A', '1')
+
+        assert_that(outf.getvalue(), equal_to(b'SET VARIABLE "A" "1"\n'))
+
+
+class TestCoalescingFastAGI(unittest.TestCase):
+    def test_writes_are_sent_before_next_command(self):
+        agi, outf = build_coalescing_agi(b'200 result=0\n200 result=1 (bar)\n')
+
+        agi.set_variable('A', '1')
+        agi.set_variable('B', '2')
+        agi.set_variable('A', '3')
+        assert_that(outf.getvalue(), equal_to(b''))
+
+        value = agi.get_variable('FOO')
+
+        assert_that(value, equal_to('bar'))
+        assert_that(
+            outf.getvalue().decode().splitlines(),
+            contains_exactly('EXEC MSet "B=2,A=3"', 'GET VARIABLE "FOO"'),
+        )
+
+    def test_writes_are_sent_before_function_writes(self):
+        agi, outf = build_coalescing_agi(b'200 result=0\n' * 2)
+
+        agi.set_variable('A', '1')
+        agi.set_variable('CHANNEL(language)', 'fr_FR')
+
+        assert_that(
+            outf.getvalue().decode().splitlines(),
+            contains_exactly(
+                'SET VARIABLE "A" "1"', 'SET VARIABLE "CHANNEL(language)" "fr_FR"'
+            ),
+        )
+
+    def test_flush(self):
+        agi, outf = build_coalescing_agi(b'200 result=0\n')
+        agi.set_variables({'A': '1', 'B': '2'})
+
+        agi.flush()
+        agi.flush()
+
+        assert_that(outf.getvalue(), equal_to(b'EXEC MSet "A=1,B=2"\n'))
+
+    def test_pipelined(self):
+        outf = io.BytesIO()
+        config = {'agi_coalesce_writes': True, 'agi_pipelining': True}
+        agi = FastAGI(
+            io.BytesIO(ENV + b'200 result=0\n200 result=1 (bar)\n'),
+            outf,  # type: ignore[arg-type]
+            config,
+        )
+        agi.set_variable('A', '1')
+        agi.set_variable('B', '2')
+
+        value = agi.get_variable('FOO')
+
+        assert_that(value, equal_to('bar'))
+        assert_that(
+            outf.getvalue(),
+            equal_to(b'EXEC MSet "A=1,B=2"\nGET VARIABLE "FOO"\n'),
+        )
+
+
+class TestFastAGIVariableCache(unittest.TestCase):
+    def setUp(self):
+        self.outf = io.BytesIO()
+
+    def build_agi(self, responses: bytes = b'') -> FastAGI:
+        config = {'agi_variable_cache': True}
+        return FastAGI(
+            io.BytesIO(ENV + responses), self.outf, config  # type: ignore[arg-type]
+        )
+
+    def test_reads_are_memoized(self):
+        agi = self.build_agi(b'200 result=1 (bar)\n')
+
+        assert_that(agi.get_variable('FOO'), equal_to('bar'))
+        assert_that(agi.get_variable('FOO'), equal_to('bar'))
+
+        assert_that(self.outf.getvalue(), equal_to(b'GET VARIABLE "FOO"\n'))
+        assert_that(agi.variable_cache.hits, equal_to(1))
+
+    def test_writes_go_through(self):
+        agi = self.build_agi(b'200 result=1\n')
+
+        agi.set_variable('__FOO', 'bar')
+
+        assert_that(agi.get_variable('FOO'), equal_to('bar'))
+        assert_that(self.outf.getvalue(), equal_to(b'SET VARIABLE "__FOO" "bar"\n'))
+
+    def test_get_variables_reads_missing_variables(self):
+        agi = self.build_agi(b'200 result=1\n200 result=1 (baz;)\n')
+        agi.set_variable('FOO', 'bar')
+
+        result = agi.get_variables(['FOO', 'BAZ'])
+        agi.get_variable('BAZ')
+
+        assert_that(result, equal_to({'FOO': 'bar', 'BAZ': 'baz'}))
+        assert_that(
+            self.outf.getvalue().decode().splitlines(),
+            contains_exactly(
+                'SET VARIABLE "FOO" "bar"',
+                'GET FULL VARIABLE "${URIENCODE(${BAZ})};"',
+            ),
+        )
+
+    def test_denied_functions_are_always_read(self):
+        agi = self.build_agi(b'200 result=1 (INUSE)\n200 result=1 (NOT_INUSE)\n')
+
+        agi.get_variable('EXTENSION_STATE(1001@default)')
+        state = agi.get_variable('EXTENSION_STATE(1001@default)')
+
+        assert_that(state, equal_to('NOT_INUSE'))
+
+    def test_applications_clear_the_cache(self):
+        agi = self.build_agi(b'200 result=1 (bar)\n200 result=0\n200 result=1 (baz)\n')
+        agi.get_variable('FOO')
+
+        agi.appexec('Gosub', 'sub,s,1')
+
+        assert_that(agi.get_variable('FOO'), equal_to('baz'))
+
+    def test_disabled_by_default(self):
+        agi, _ = build_agi()
+
+        assert_that(agi.variable_cache, equal_to(None))
+
+
+class TestAsyncFastAGI(unittest.TestCase):
+    def _run(self, coro_fn, responses: bytes = b''):
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(ENV + responses)
+            reader.feed_eof()
+            writer = Mock(drain=Mock(side_effect=self._noop))
+            agi = await AsyncFastAGI.from_stream(reader, writer, {})
+            return await coro_fn(agi), agi, writer
+
+        return asyncio.run(run())
+
+    @staticmethod
+    async def _noop():
+        pass
+
+    def test_env_and_args(self):
+        async def env(agi):
+            return agi.env
+
+        result, agi, _ = self._run(env)
+
+        assert_that(result, has_entries(agi_network_script='foobar'))
+        assert_that(agi.args, equal_to(['one', 'two']))
+
+    def test_get_variable(self):
+        async def get(agi):
+            return await agi.get_variable('FOO')
+
+        result, _, writer = self._run(get, b'200 result=1 (bar)\n')
+
+        assert_that(result, equal_to('bar'))
+        writer.write.assert_called_once_with(b'GET VARIABLE "FOO"\n')
+
+    def test_get_variables(self):
+        async def get(agi):
+            return await agi.get_variables(['FOO', 'BAR'])
+
+        result, _, writer = self._run(get, b'200 result=1 (bar,%3Bbaz;)\n')
+
+        assert_that(result, equal_to({'FOO': 'bar', 'BAR': ';baz'}))
+        writer.write.assert_called_once_with(
+            b'GET FULL VARIABLE "${URIENCODE(${FOO})},${URIENCODE(${BAR})};"\n'
+        )
+
+    def test_set_variables(self):
+        async def set_(agi):
+            await agi.set_variables({'A': '1', 'CALLERID(num)': '2', 'B': '3'})
+
+        _, _, writer = self._run(set_, b'200 result=1\n' * 3)
+
+        writer.write.assert_has_calls(
+            [
+                call(b'SET VARIABLE "A" "1"\n'),
+                call(b'SET VARIABLE "CALLERID(num)" "2"\n'),
+                call(b'SET VARIABLE "B" "3"\n'),
+            ]
+        )
+
+    def test_execute_app_error(self):
+        async def noop(agi):
+            try:
+                await agi.noop()
+            except FastAGIAppError as e:
+                return e
+
+        result, _, _ = self._run(noop, b'200 result=-1\n')
+
+        assert isinstance(result, FastAGIAppError)
@@ -0,0 +1,96 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to
+
+from .. import file_watcher
+from ..file_watcher import FileWatcher
+
+
+@patch.object(file_watcher, 'DEBOUNCE_DELAY', 0.01)
+class BaseFileWatcherTest:
+    use_inotify: bool
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'watched.conf')
+        self._write('a')
+        self.changed = threading.Event()
+        self.calls = 0
+
+    def _write(self, content):
+        with open(self.path, 'w') as f:
+            f.write(content)
+
+    def _callback(self):
+        self.calls += 1
+        self.changed.set()
+
+    def _start(self, callbacks):
+        watcher = FileWatcher(
+            {self.path: callbacks}, poll_interval=0.05, use_inotify=self.use_inotify
+        )
+        watcher.start()
+        self.addCleanup(watcher.join, 1)
+        self.addCleanup(watcher.stop)
+        # let the watcher take its initial snapshot
+        threading.Event().wait(0.1)
+        return watcher
+
+    def test_callback_is_called_on_change(self):
+        self._start([self._callback])
+
+        self._write('bb')
+
+        assert self.changed.wait(2)
+
+    def test_callback_is_called_when_file_is_replaced(self):
+        self._start([self._callback])
+
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write('bb')
+        os.rename(tmp_path, self.path)
+
+        assert self.changed.wait(2)
+        assert_that(self.calls, equal_to(1))
+
+    def test_failing_callback_does_not_stop_watcher(self):
+        def fail():
+            raise ValueError('invalid')
+
+        self._start([fail, self._callback])
+
+        self._write('bb')
+        assert self.changed.wait(2)
+
+        self.changed.clear()
+        self._write('ccc')
+        assert self.changed.wait(2)
+
+    def test_file_watched_while_running(self):
+        watcher = self._start([])
+
+        watcher.watch(self.path, self._callback)
+        # the file is watched within the poll interval
+        threading.Event().wait(0.1)
+        self._write('bb')
+
+        assert self.changed.wait(2)
+
+
+class TestFileWatcherInotify(BaseFileWatcherTest, unittest.TestCase):
+    use_inotify = True
+
+
+class TestFileWatcherPolling(BaseFileWatcherTest, unittest.TestCase):
+    use_inotify = False
@@ -0,0 +1,89 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import socket
+import threading
+import unittest
+from unittest.mock import Mock
+
+from ..hangup_monitor import HangupMonitor, has_hung_up
+
+
+class TestHasHungUp(unittest.TestCase):
+    def setUp(self):
+        self.asterisk, self.agid = socket.socketpair()
+        self.addCleanup(self.asterisk.close)
+        self.addCleanup(self.agid.close)
+
+    def test_nothing_received(self):
+        assert not has_hung_up(self.agid)
+
+    def test_hangup_received(self):
+        self.asterisk.sendall(b'HANGUP\n')
+
+        assert has_hung_up(self.agid)
+        # the notification is not consumed
+        assert self.agid.recv(7) == b'HANGUP\n'
+
+    def test_connection_closed(self):
+        self.asterisk.close()
+
+        assert has_hung_up(self.agid)
+
+    def test_other_data_received(self):
+        self.asterisk.sendall(b'200 result=1\n')
+
+        assert not has_hung_up(self.agid)
+
+
+class TestHangupMonitor(unittest.TestCase):
+    def setUp(self):
+        self.asterisk, self.agid = socket.socketpair()
+        self.addCleanup(self.asterisk.close)
+        self.addCleanup(self.agid.close)
+        self.hungup = threading.Event()
+        self.fagi = Mock(in_command=False, commands=0)
+        self.fagi.notify_hangup.side_effect = self.hungup.set
+        self.monitor = HangupMonitor()
+        self.monitor.start()
+        self.addCleanup(self.monitor.join, 1)
+        self.addCleanup(self.monitor.stop)
+
+    def test_hangup_is_notified(self):
+        self.monitor.watch(self.agid, self.fagi)
+
+        self.asterisk.sendall(b'HANGUP\n')
+
+        assert self.hungup.wait(1)
+
+    def test_command_response_is_not_a_hangup(self):
+        self.fagi.in_command = True
+        self.monitor.watch(self.agid, self.fagi)
+
+        self.asterisk.sendall(b'200 result=1\n')
+
+        assert not self.hungup.wait(0.2)
+
+    def test_hangup_after_command_response(self):
+        self.fagi.in_command = True
+        self.monitor.watch(self.agid, self.fagi)
+        self.asterisk.sendall(b'200 result=1\n')
+        threading.Event().wait(0.05)
+
+        # the handler reads the response
+        self.agid.recv(13)
+        self.fagi.in_command = False
+        self.fagi.commands = 1
+        self.asterisk.sendall(b'HANGUP\n')
+
+        assert self.hungup.wait(1)
+
+    def test_unwatched_socket_is_not_notified(self):
+        self.monitor.watch(self.agid, self.fagi)
+        self.monitor.unwatch(self.agid)
+
+        self.asterisk.sendall(b'HANGUP\n')
+
+        assert not self.hungup.wait(0.2)
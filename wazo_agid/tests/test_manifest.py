@@ -0,0 +1,55 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import os
+import tempfile
+import textwrap
+import unittest
+
+from hamcrest import assert_that, equal_to, has_entries
+
+from .. import manifest
+
+
+class TestManifest(unittest.TestCase):
+    def test_manifest_is_up_to_date(self):
+        with open(manifest.MANIFEST_PATH) as f:
+            content = f.read()
+
+        assert content == manifest.render(manifest.scan_modules()), (
+            'the handler manifest is not up to date, '
+            'run `python3 -m wazo_agid.manifest`'
+        )
+
+    def test_scan_modules(self):
+        source = textwrap.dedent('''
+            from wazo_agid import agid
+
+            def foo(agi, cursor, args):
+                pass
+
+            async def bar(agi, cursor, args):
+                pass
+
+            agid.register(foo, bulkhead='dird', priority='critical')
+            agid.register(bar, read_only=True)
+            ''')
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'foobar.py'), 'w') as f:
+                f.write(source)
+
+            handlers = manifest.scan_modules(directory)
+
+        assert_that(
+            handlers,
+            has_entries(
+                foo=equal_to(
+                    {'module': 'foobar', 'bulkhead': 'dird', 'priority': 'critical'}
+                ),
+                bar=equal_to(
+                    {'module': 'foobar', 'coroutine': True, 'read_only': True}
+                ),
+            ),
+        )
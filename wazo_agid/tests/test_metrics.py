@@ -0,0 +1,42 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import unittest
+
+from hamcrest import assert_that, equal_to, has_entries, same_instance
+
+from .. import metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_is_registered_once(self):
+        counter = metrics.counter('test.counter')
+
+        assert_that(metrics.counter('test.counter'), same_instance(counter))
+
+    def test_snapshot(self):
+        metrics.counter('test.snapshot.counter').inc(3)
+        metrics.gauge('test.snapshot.gauge', lambda: 42)
+        summary = metrics.summary('test.snapshot.summary')
+        summary.observe(1)
+        summary.observe(3)
+
+        assert_that(
+            metrics.snapshot(),
+            has_entries(
+                {
+                    'test.snapshot.counter': 3,
+                    'test.snapshot.gauge': 42,
+                    'test.snapshot.summary': {'count': 2, 'avg': 2.0, 'max': 3},
+                }
+            ),
+        )
+
+    def test_gauge_inc_dec(self):
+        gauge = metrics.gauge('test.gauge')
+        gauge.inc(2)
+        gauge.dec()
+
+        assert_that(gauge.value, equal_to(1))
@@ -4,10 +4,12 @@
 from __future__ import annotations
 
 from unittest import TestCase
+from unittest.mock import Mock, patch
 
-from hamcrest import assert_that, is_
+from hamcrest import assert_that, is_, same_instance
 
-from ..objects import CallerID, VMBox
+from .. import call_context
+from ..objects import CallerID, VMBox, get_queue, get_user
 
 
 class VMBoxFastInit(VMBox):
@@ -65,3 +67,35 @@ class TestCallerID(TestCase):
         )
         for test_case, expected_result in test_cases:
             assert CallerID.parse(test_case) == expected_result
+
+
+class TestCallContextObjects(TestCase):
+    def setUp(self):
+        call_context.configure({'enabled': True})
+        self.addCleanup(call_context.configure, {})
+
+    def _agi(self):
+        return Mock(env={'agi_uniqueid': '1700000000.1'}, params={})
+
+    def test_queue_is_loaded_once_per_call(self):
+        with patch('wazo_agid.objects.Queue.__init__', return_value=None) as init:
+            first = get_queue(self._agi(), Mock(), 42)
+            other_agi, other_cursor = self._agi(), Mock()
+            second = get_queue(other_agi, other_cursor, 42)
+
+        init.assert_called_once()
+        assert_that(second.agi, same_instance(other_agi))
+        assert_that(second.cursor, same_instance(other_cursor))
+        assert second is not first
+
+    def test_user_vmbox_is_bound_to_the_request(self):
+        user = Mock(vmbox=VMBoxFastInit())
+
+        with patch('wazo_agid.objects.User', return_value=user) as user_class:
+            get_user(self._agi(), Mock(), 1)
+            agi = self._agi()
+            reused = get_user(agi, Mock(), 1)
+
+        user_class.assert_called_once()
+        assert_that(reused.vmbox.agi, same_instance(agi))
+        assert_that(user.vmbox.__dict__.get('agi'), is_(None))
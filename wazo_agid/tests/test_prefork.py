@@ -0,0 +1,71 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import gc
+import os
+import signal
+import threading
+import time
+import unittest
+
+from hamcrest import assert_that, greater_than, has_length
+
+from ..prefork import Supervisor, current_rss
+
+
+class TestSupervisor(unittest.TestCase):
+    def tearDown(self):
+        gc.unfreeze()
+
+    def test_workers_are_started_and_terminated(self):
+        read_fd, write_fd = os.pipe()
+
+        def serve():
+            os.write(write_fd, b'x')
+            time.sleep(30)
+
+        def terminate_when_started():
+            started = b''
+            while len(started) < 2:
+                started += os.read(read_fd, 2)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        terminator = threading.Thread(target=terminate_when_started)
+        terminator.start()
+
+        Supervisor(2, serve).run()
+
+        terminator.join()
+        os.close(read_fd)
+        os.close(write_fd)
+
+    def test_crashed_worker_is_respawned(self):
+        read_fd, write_fd = os.pipe()
+        starts = []
+
+        def serve():
+            os.write(write_fd, b'x')
+            # the first worker crashes right away
+            raise Exception('boom')
+
+        def terminate_when_respawned():
+            while len(starts) < 2:
+                starts.append(os.read(read_fd, 1))
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        terminator = threading.Thread(target=terminate_when_respawned)
+        terminator.start()
+
+        Supervisor(1, serve).run()
+
+        terminator.join()
+        assert_that(starts, has_length(2))
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+class TestCurrentRSS(unittest.TestCase):
+    def test_current_rss(self):
+        assert_that(current_rss(), greater_than(0))
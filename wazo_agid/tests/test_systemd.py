@@ -0,0 +1,52 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import os
+import socket
+import unittest
+from unittest.mock import patch
+
+from hamcrest import assert_that, empty, equal_to, has_key, has_length, is_not
+
+from .. import systemd
+
+
+class TestListenSockets(unittest.TestCase):
+    def setUp(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen()
+
+    def tearDown(self):
+        self.sock.close()
+
+    def test_no_socket_activation(self):
+        with patch.dict(os.environ, {}, clear=True):
+            assert_that(systemd.listen_sockets(), empty())
+
+    def test_sockets_of_another_process(self):
+        env = {'LISTEN_PID': str(os.getpid() + 1), 'LISTEN_FDS': '1'}
+        with patch.dict(os.environ, env, clear=True):
+            assert_that(systemd.listen_sockets(), empty())
+
+    def test_activated_sockets(self):
+        fd = os.dup(self.sock.fileno())
+        env = {
+            'LISTEN_PID': str(os.getpid()),
+            'LISTEN_FDS': '1',
+            'LISTEN_FDNAMES': 'background',
+        }
+        with patch.dict(os.environ, env, clear=True):
+            with patch.object(systemd, 'SD_LISTEN_FDS_START', fd):
+                sockets = systemd.listen_sockets()
+
+            assert_that(os.environ, is_not(has_key('LISTEN_FDS')))
+
+        assert_that(sockets, has_length(1))
+        name, sock = sockets[0]
+        assert_that(name, equal_to('background'))
+        assert_that(sock.getsockname(), equal_to(self.sock.getsockname()))
+        assert not os.get_inheritable(sock.fileno())
+        sock.close()
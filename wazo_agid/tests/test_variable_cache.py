@@ -0,0 +1,64 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import unittest
+
+from hamcrest import assert_that, equal_to, none
+
+from ..variable_cache import VariableCache, is_cacheable
+
+
+class TestIsCacheable(unittest.TestCase):
+    def test_variables(self):
+        assert is_cacheable('WAZO_TENANT_UUID')
+        assert not is_cacheable('BRIDGEPEER')
+
+    def test_functions(self):
+        assert is_cacheable('PJSIP_HEADER(read,To)')
+        assert not is_cacheable('EXTENSION_STATE(1001@default)')
+        assert not is_cacheable('queue_waiting_count(support)')
+
+
+class TestVariableCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = VariableCache()
+
+    def test_get_counts_hits_and_misses(self):
+        assert_that(self.cache.get('FOO'), none())
+        self.cache.store('FOO', 'bar')
+
+        assert_that(self.cache.get('FOO'), equal_to('bar'))
+        assert_that(self.cache.get('FOO'), equal_to('bar'))
+        assert_that((self.cache.hits, self.cache.misses), equal_to((2, 1)))
+
+    def test_uncacheable_names_are_not_stored(self):
+        self.cache.store('EXTENSION_STATE(1001@default)', 'INUSE')
+
+        assert_that(self.cache.get('EXTENSION_STATE(1001@default)'), none())
+        assert_that((self.cache.hits, self.cache.misses), equal_to((0, 0)))
+
+    def test_write_inherited_variable(self):
+        self.cache.write('__WAZO_FOO', '1')
+        self.cache.write('_WAZO_BAR', '2')
+
+        assert_that(self.cache.get('WAZO_FOO'), equal_to('1'))
+        assert_that(self.cache.get('WAZO_BAR'), equal_to('2'))
+
+    def test_write_function_invalidates_functions(self):
+        self.cache.store('CALLERID(all)', '"Alice" <1001>')
+        self.cache.store('FOO', 'bar')
+
+        self.cache.write('CALLERID(num)', '1002')
+
+        assert_that(self.cache.get('CALLERID(all)'), none())
+        assert_that(self.cache.get('CALLERID(num)'), none())
+        assert_that(self.cache.get('FOO'), equal_to('bar'))
+
+    def test_clear(self):
+        self.cache.store('FOO', 'bar')
+
+        self.cache.clear()
+
+        assert_that(self.cache.get('FOO'), none())
@@ -0,0 +1,41 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import threading
+import unittest
+from unittest.mock import Mock
+
+from ..warm_up import WarmUp
+
+
+class TestWarmUp(unittest.TestCase):
+    def test_run_calls_all_tasks(self):
+        task1, task2 = Mock(), Mock()
+        warm_up = WarmUp(timeout=1)
+        warm_up.add('task1', task1)
+        warm_up.add('task2', task2)
+
+        assert warm_up.run()
+
+        task1.assert_called_once_with()
+        task2.assert_called_once_with()
+
+    def test_failing_task_does_not_stop_other_tasks(self):
+        task = Mock()
+        warm_up = WarmUp(timeout=1)
+        warm_up.add('failing', Mock(side_effect=ValueError))
+        warm_up.add('task', task)
+
+        assert warm_up.run()
+
+        task.assert_called_once_with()
+
+    def test_run_gives_up_after_timeout(self):
+        blocked = threading.Event()
+        self.addCleanup(blocked.set)
+        warm_up = WarmUp(timeout=0.05)
+        warm_up.add('blocked', blocked.wait)
+
+        assert not warm_up.run()
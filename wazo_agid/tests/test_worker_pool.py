@@ -0,0 +1,127 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from hamcrest import assert_that, contains_inanyorder, equal_to, less_than
+
+from .. import metrics
+from ..fair_queue import FlowPolicy
+from ..worker_pool import WorkerPool
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = WorkerPool('test_pool', size=2, queue_size=2)
+
+    def tearDown(self):
+        self.pool.stop(timeout=1)
+
+    def test_submitted_tasks_are_executed(self):
+        results = []
+        done = threading.Event()
+
+        def task(value):
+            results.append(value)
+            if len(results) == 2:
+                done.set()
+
+        self.pool.start()
+        self.pool.submit(task, 'a')
+        self.pool.submit(task, 'b')
+
+        assert done.wait(1)
+        assert_that(results, contains_inanyorder('a', 'b'))
+
+    def test_submit_rejects_when_queue_is_full(self):
+        rejected = metrics.counter('test_pool.rejected')
+        rejected_before = rejected.value
+
+        assert self.pool.submit(print)
+        assert self.pool.submit(print)
+        assert not self.pool.submit(print)
+
+        assert_that(self.pool.queue_depth, equal_to(2))
+        assert_that(rejected.value, equal_to(rejected_before + 1))
+
+    def test_stop_drains_queued_tasks(self):
+        results = []
+
+        self.pool.submit(results.append, 'a')
+        self.pool.start()
+        self.pool.stop(timeout=1)
+
+        assert_that(results, equal_to(['a']))
+
+    def test_exception_does_not_kill_worker(self):
+        done = threading.Event()
+
+        def fail():
+            raise Exception('boom')
+
+        self.pool = WorkerPool('test_pool', size=1, queue_size=2)
+        self.pool.start()
+        self.pool.submit(fail)
+        self.pool.submit(done.set)
+
+        assert done.wait(1)
+
+    def test_higher_priority_tasks_run_first(self):
+        results = []
+
+        self.pool = WorkerPool('test_pool', size=1, queue_size=4, priorities=3)
+        self.pool.submit(results.append, 'background', priority=2)
+        self.pool.submit(results.append, 'normal', priority=1)
+        self.pool.submit(results.append, 'critical-1', priority=0)
+        self.pool.submit(results.append, 'critical-2', priority=0)
+        self.pool.start()
+        self.pool.stop(timeout=1)
+
+        assert_that(
+            results, equal_to(['critical-1', 'critical-2', 'normal', 'background'])
+        )
+
+    def test_queue_size_is_shared_by_priorities(self):
+        self.pool = WorkerPool('test_pool', size=1, queue_size=2, priorities=2)
+
+        assert self.pool.submit(print, priority=0)
+        assert self.pool.submit(print, priority=1)
+        assert not self.pool.submit(print, priority=0)
+
+    def test_flow_concurrency_limit(self):
+        release = threading.Event()
+        started = []
+        done = threading.Event()
+
+        def blocking(name):
+            started.append(name)
+            release.wait(1)
+
+        policy = FlowPolicy(default_max_concurrent=1)
+        self.pool = WorkerPool('test_pool', size=2, queue_size=4, flow_policy=policy)
+        self.pool.submit(blocking, 'a0', flow='a')
+        self.pool.submit(blocking, 'a1', flow='a')
+        self.pool.submit(done.set, flow='b')
+        self.pool.start()
+
+        assert done.wait(1)
+        assert_that(started, equal_to(['a0']))
+        release.set()
+
+    def test_stop_timeout_is_a_deadline(self):
+        release = threading.Event()
+
+        self.pool = WorkerPool('test_pool', size=2, queue_size=2)
+        self.pool.start()
+        self.pool.submit(release.wait, 1)
+        self.pool.submit(release.wait, 1)
+
+        start = time.monotonic()
+        self.pool.stop(timeout=0.1)
+
+        assert_that(time.monotonic() - start, less_than(0.5))
+        release.set()
@@ -0,0 +1,107 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+# Dialplan functions whose result changes while the AGI runs or that have side
+# effects, they are always read from Asterisk
+UNCACHED_FUNCTIONS = frozenset(
+    (
+        'CDR',
+        'CHANNEL',
+        'CURL',
+        'DB',
+        'DB_DELETE',
+        'DB_EXISTS',
+        'DB_KEYS',
+        'DEVICE_STATE',
+        'EXTENSION_STATE',
+        'GROUP_COUNT',
+        'GROUP_MATCH_COUNT',
+        'HINT',
+        'LOCK',
+        'ODBC',
+        'PRESENCE_STATE',
+        'QUEUE_EXISTS',
+        'QUEUE_GET_CHANNEL',
+        'QUEUE_MEMBER',
+        'QUEUE_MEMBER_COUNT',
+        'QUEUE_MEMBER_LIST',
+        'QUEUE_MEMBER_PENALTY',
+        'QUEUE_VARIABLES',
+        'QUEUE_WAITING_COUNT',
+        'RAND',
+        'SHELL',
+        'STAT',
+        'STRFTIME',
+        'TIMEOUT',
+        'TRYLOCK',
+        'UNLOCK',
+    )
+)
+# Variables set by Asterisk while the AGI runs
+UNCACHED_VARIABLES = frozenset(
+    (
+        'ATTENDEDTRANSFER',
+        'BLINDTRANSFER',
+        'BRIDGEPEER',
+        'BRIDGEPVTCALLID',
+        'DATETIME',
+        'EPOCH',
+        'HANGUPCAUSE',
+        'TIMESTAMP',
+    )
+)
+
+
+def is_cacheable(name: str) -> bool:
+    function, paren, _ = name.partition('(')
+    if paren:
+        return function.strip().upper() not in UNCACHED_FUNCTIONS
+    return name not in UNCACHED_VARIABLES
+
+
+class VariableCache:
+    """Channel variables read or set during a request. Reads are memoized and
+    writes go through the cache, so that a variable is read from Asterisk at
+    most once per request."""
+
+    def __init__(self) -> None:
+        self._values: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str) -> str | None:
+        if not is_cacheable(name):
+            return None
+        value = self._values.get(name)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def store(self, name: str, value: str) -> None:
+        """Called with the value read from Asterisk"""
+        if is_cacheable(name):
+            self._values[name] = value
+
+    def write(self, name: str, value: str) -> None:
+        """Called with the value set on the channel"""
+        if '(' in name:
+            # Dialplan functions write to shared state, e.g. CALLERID(num)
+            # also changes CALLERID(all)
+            self._values = {
+                key: cached for key, cached in self._values.items() if '(' not in key
+            }
+            return
+        # Inherited variables are read without their prefix
+        if name.startswith('__'):
+            name = name[2:]
+        elif name.startswith('_'):
+            name = name[1:]
+        self._values[name] = value
+
+    def clear(self) -> None:
+        """Called when a dialplan application may have changed the variables"""
+        self._values.clear()
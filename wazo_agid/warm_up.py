@@ -0,0 +1,118 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from wazo_agid import metrics
+
+if TYPE_CHECKING:
+    from wazo_agid.database import Database
+
+logger = logging.getLogger(__name__)
+
+# Queries of the call setup handlers (see wazo_agid.objects), their tables are
+# small and read on almost every call
+WARM_UP_QUERIES = (
+    "SELECT feature, exten, enabled FROM feature_extension",
+    "SELECT timezone FROM infos",
+    "SELECT uuid, country FROM tenant",
+    "SELECT name, commented FROM context",
+    "SELECT context, include, priority FROM contextinclude",
+)
+
+
+class WarmUp:
+    """Tasks run before accepting requests, so that the first calls do not pay
+    for cold imports, connections and caches. The tasks run concurrently and
+    the warm-up gives up on the ones still running after timeout seconds."""
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._tasks: list[tuple[str, Callable[[], None]]] = []
+        self._duration = metrics.gauge('warm_up.duration')
+        self._failed = metrics.counter('warm_up.failed')
+
+    def add(self, name: str, fn: Callable[[], None]) -> None:
+        self._tasks.append((name, fn))
+
+    def run(self) -> bool:
+        start = time.monotonic()
+        threads = [
+            threading.Thread(
+                target=self._run_task, args=(name, fn), name=f'warm-up-{name}'
+            )
+            for name, fn in self._tasks
+        ]
+        for thread in threads:
+            # Tasks still running after the timeout must not keep the process
+            # from exiting
+            thread.daemon = True
+            thread.start()
+
+        deadline = start + self.timeout
+        for thread in threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        pending = [thread.name for thread in threads if thread.is_alive()]
+
+        duration = time.monotonic() - start
+        self._duration.set(duration)
+        if pending:
+            logger.warning(
+                'warm-up timed out after %.3f s, still running: %s',
+                duration,
+                ', '.join(pending),
+            )
+            return False
+        logger.info('warm-up done in %.3f s', duration)
+        return True
+
+    def _run_task(self, name: str, fn: Callable[[], None]) -> None:
+        start = time.monotonic()
+        try:
+            fn()
+        except Exception:
+            self._failed.inc()
+            logger.exception('warm-up task %r failed', name)
+            return
+        logger.debug('warm-up task %r done in %.3f s', name, time.monotonic() - start)
+
+
+def warm_up_database(database: Database) -> None:
+    # The first requests do not wait for their connection to be opened
+    database.pool.fill()
+    with database.connection() as conn:
+        # The dialect of the engine shared with xivo_dao queries the server
+        # on its first connection
+        with database.dao_connection(conn), database.transaction(conn) as cursor:
+            for query in WARM_UP_QUERIES:
+                cursor.execute(query)
+                cursor.fetchall()
+
+
+def warm_up_sqlalchemy() -> None:
+    from sqlalchemy import text
+    from xivo_dao.helpers.db_utils import session_scope
+
+    # The engine and its pool are created by the first session
+    with session_scope() as session:
+        session.execute(text('SELECT 1'))
+
+
+def load_phone_metadata(database: Database) -> None:
+    import phonenumbers
+
+    with database.connection() as conn:
+        with database.transaction(conn) as cursor:
+            cursor.execute("SELECT DISTINCT country FROM tenant")
+            countries = [row['country'] for row in cursor.fetchall()]
+
+    # The metadata of a region is loaded on its first use
+    for country in countries:
+        if country:
+            phonenumbers.PhoneMetadata.metadata_for_region(country.upper())
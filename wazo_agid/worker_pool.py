@@ -0,0 +1,172 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+from wazo_agid import metrics
+from wazo_agid.fair_queue import FairQueue, Flow, FlowPolicy
+
+logger = logging.getLogger(__name__)
+
+
+Task = tuple[Callable[..., Any], tuple, float]
+
+
+class WorkerPool:
+    """Runs tasks on a fixed set of threads. Tasks are queued by priority, 0
+    being the highest. Tasks of the same priority are shared fairly between
+    their flows (e.g. tenants) according to the flow policy, and run in FIFO
+    order within a flow."""
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        queue_size: int,
+        stack_size: int | None = None,
+        priorities: int = 1,
+        flow_policy: FlowPolicy | None = None,
+    ) -> None:
+        self.name = name
+        self.size = size
+        self.queue_size = queue_size
+        self.stack_size = stack_size
+        self.flow_policy = flow_policy or FlowPolicy()
+
+        self._condition = threading.Condition()
+        self._queues = [FairQueue() for _ in range(priorities)]
+        self._threads: list[threading.Thread] = []
+        self._running = False
+        self._busy = 0
+        self._running_flows: Counter[Flow] = Counter()
+
+        self._rejected = metrics.counter(f'{name}.rejected')
+        self._queue_wait = metrics.summary(f'{name}.queue_wait')
+        metrics.gauge(f'{name}.queue_depth', lambda: self.queue_depth)
+        metrics.gauge(f'{name}.busy_workers', lambda: self._busy)
+        if priorities > 1:
+            for priority, queue in enumerate(self._queues):
+                metrics.gauge(
+                    f'{name}.queue_depth.{priority}',
+                    lambda queue=queue: len(queue),  # type: ignore[misc]
+                )
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues)
+
+    def start(self) -> None:
+        logger.debug(
+            '%s: starting %d workers (queue size: %d)',
+            self.name,
+            self.size,
+            self.queue_size,
+        )
+        with self._condition:
+            self._running = True
+
+        previous_stack_size = None
+        if self.stack_size:
+            previous_stack_size = threading.stack_size(self.stack_size)
+        try:
+            for i in range(self.size):
+                thread = threading.Thread(
+                    target=self._work, name=f'{self.name}-{i}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        finally:
+            if previous_stack_size is not None:
+                threading.stack_size(previous_stack_size)
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stops the workers once the queued tasks are done, waiting at most
+        timeout seconds in total"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            if deadline is None:
+                thread.join()
+            else:
+                thread.join(max(0, deadline - time.monotonic()))
+
+        busy = sum(thread.is_alive() for thread in self._threads)
+        if busy:
+            logger.warning(
+                '%s: %d workers still busy after %ss, %d tasks not started',
+                self.name,
+                busy,
+                timeout,
+                self.queue_depth,
+            )
+        self._threads = []
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: int = 0,
+        flow: Flow = None,
+    ) -> bool:
+        with self._condition:
+            if self.queue_depth >= self.queue_size:
+                self._rejected.inc()
+                return False
+            self._queues[priority].append(
+                (fn, args, time.monotonic()), flow, self.flow_policy.weight(flow)
+            )
+            self._condition.notify()
+        return True
+
+    def _is_eligible(self, flow: Flow) -> bool:
+        max_concurrent = self.flow_policy.max_concurrent(flow)
+        return not max_concurrent or self._running_flows[flow] < max_concurrent
+
+    def _pop(self) -> tuple[Flow, Task] | None:
+        # Concurrency limits are ignored while draining the queue on stop
+        is_eligible = self._is_eligible if self._running else None
+        for queue in self._queues:
+            if queue:
+                entry = queue.pop(is_eligible)
+                if entry:
+                    return entry
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not (entry := self._pop()):
+                    if not self._running and not self.queue_depth:
+                        return
+                    self._condition.wait()
+                flow, (fn, args, enqueued_at) = entry
+                self._busy += 1
+                self._running_flows[flow] += 1
+
+            queue_wait = time.monotonic() - enqueued_at
+            self._queue_wait.observe(queue_wait)
+            if flow is not None:
+                metrics.summary(f'{self.name}.queue_wait.{flow}').observe(queue_wait)
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception('%s: unexpected exception in worker', self.name)
+            finally:
+                with self._condition:
+                    self._busy -= 1
+                    self._running_flows[flow] -= 1
+                    if not self._running_flows[flow]:
+                        del self._running_flows[flow]
+                    # A task of this flow may have been waiting for the limit
+                    if self.flow_policy.max_concurrent(flow):
+                        self._condition.notify()